@@ -1,7 +1,7 @@
+import io
 import os
 import json
 import time
-import tempfile
 import threading
 from datetime import datetime
 from typing import Tuple, List, Dict
@@ -16,6 +16,9 @@ from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks
 from fastapi.responses import JSONResponse
 
 import face_recognition
+from PIL import Image
+
+from embedding_index import EmbeddingIndex
 
 app = FastAPI(title="SAVA Face AI Server", version="2.2")
 
@@ -40,6 +43,20 @@ ENROLL_MAX_FACES = int(os.getenv("ENROLL_MAX_FACES", "80"))
 UNKNOWN_PROB_THRESHOLD = float(os.getenv("UNKNOWN_PROB_THRESHOLD", "0.60"))
 UNKNOWN_DIST_THRESHOLD = float(os.getenv("UNKNOWN_DIST_THRESHOLD", "0.65"))
 
+# Orientation cache: after this many consecutive finds at the same rotation
+# only that rotation is tried; a full 4-rotation search still runs every
+# ORIENTATION_FULL_SEARCH_EVERY frames or after ORIENTATION_MAX_MISSES misses
+ORIENTATION_STABLE_HITS = int(os.getenv("ORIENTATION_STABLE_HITS", "3"))
+ORIENTATION_FULL_SEARCH_EVERY = int(os.getenv("ORIENTATION_FULL_SEARCH_EVERY", "50"))
+ORIENTATION_MAX_MISSES = int(os.getenv("ORIENTATION_MAX_MISSES", "5"))
+
+# Most images accepted by one /analyze-faces request
+ANALYZE_FACES_MAX_IMAGES = int(os.getenv("ANALYZE_FACES_MAX_IMAGES", "16"))
+
+# How often (seconds) the model registry stats the artifacts on disk, to pick
+# up a retrain done by another worker process
+MODEL_CHECK_SECONDS = float(os.getenv("MODEL_CHECK_SECONDS", "2.0"))
+
 TRAIN_LOCK = threading.Lock()
 TRAINING_STATE = {
     "is_training": False,
@@ -100,35 +117,90 @@ def _iter_people_embeddings():
     return people
 
 
+def _enrolled_mtimes() -> Dict[str, int]:
+    """person_name -> mtime_ns of its embeddings.json."""
+    if not os.path.isdir(RELATIVES_DIR):
+        return {}
+
+    mtimes = {}
+    for person_name in os.listdir(RELATIVES_DIR):
+        try:
+            mtimes[person_name] = os.stat(os.path.join(RELATIVES_DIR, person_name, "embeddings.json")).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return mtimes
+
+
+ARTIFACT_PATHS = (
+    os.path.join(MODELS_DIR, "face_svm.joblib"),
+    os.path.join(MODELS_DIR, "label_encoder.joblib"),
+    os.path.join(MODELS_DIR, "centroids.joblib"),
+)
+
+
 def _artifacts_exist() -> bool:
-    return all([
-        os.path.exists(os.path.join(MODELS_DIR, "face_svm.joblib")),
-        os.path.exists(os.path.join(MODELS_DIR, "label_encoder.joblib")),
-        os.path.exists(os.path.join(MODELS_DIR, "centroids.joblib")),
-    ])
+    return all(os.path.exists(p) for p in ARTIFACT_PATHS)
+
+
+def _artifact_mtimes():
+    """mtime_ns of each artifact, or None if any is missing."""
+    try:
+        return tuple(os.stat(p).st_mtime_ns for p in ARTIFACT_PATHS)
+    except FileNotFoundError:
+        return None
 
 
 def _load_artifacts():
-    svm_path = os.path.join(MODELS_DIR, "face_svm.joblib")
-    le_path = os.path.join(MODELS_DIR, "label_encoder.joblib")
-    cen_path = os.path.join(MODELS_DIR, "centroids.joblib")
-    if not (os.path.exists(svm_path) and os.path.exists(le_path) and os.path.exists(cen_path)):
+    if not _artifacts_exist():
         return None, None, None
-    clf = joblib.load(svm_path)
-    le = joblib.load(le_path)
-    centroids = joblib.load(cen_path)
+    clf = joblib.load(ARTIFACT_PATHS[0])
+    le = joblib.load(ARTIFACT_PATHS[1])
+    centroids = joblib.load(ARTIFACT_PATHS[2])
     return clf, le, centroids
 
 
-def _dist_to_centroid(emb: np.ndarray, centroid: List[float]) -> float:
-    return float(np.linalg.norm(emb.astype(np.float32) - np.array(centroid, dtype=np.float32)))
+def _dump_atomic(obj, path: str):
+    """joblib.dump via a temp file + rename, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
 
 
-def _read_image_bgr(path: str) -> np.ndarray:
-    img = cv2.imread(path)
+def _exif_orientation(data: bytes) -> int:
+    """EXIF Orientation tag (1-8) of an encoded image; 1 if absent/unreadable."""
+    try:
+        # Image.open only parses the header here, the pixels are not decoded
+        return int(Image.open(io.BytesIO(data)).getexif().get(0x0112, 1))
+    except Exception:
+        return 1
+
+
+def _apply_exif_orientation(img_bgr: np.ndarray, orientation: int) -> np.ndarray:
+    if orientation == 2:
+        return cv2.flip(img_bgr, 1)
+    if orientation == 3:
+        return cv2.rotate(img_bgr, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img_bgr, 0)
+    if orientation == 5:
+        return cv2.transpose(img_bgr)
+    if orientation == 6:
+        return cv2.rotate(img_bgr, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img_bgr), -1)
+    if orientation == 8:
+        return cv2.rotate(img_bgr, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img_bgr
+
+
+def _decode_image_bgr(data: bytes) -> np.ndarray:
+    """Decode uploaded image bytes in memory (no temp file), applying EXIF orientation."""
+    if not data:
+        raise ValueError("Empty upload.")
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
     if img is None:
-        raise ValueError("Failed to read image using OpenCV.")
-    return img
+        raise ValueError("Failed to decode image using OpenCV.")
+    return _apply_exif_orientation(img, _exif_orientation(data))
 
 
 def _rotate_bgr(img_bgr: np.ndarray, k: int) -> np.ndarray:
@@ -188,22 +260,262 @@ def _find_faces_with_enhancement(frame_bgr: np.ndarray):
     return None, None, None, None
 
 
-def _find_single_face_with_rotation(frame_bgr: np.ndarray):
+def _find_faces_with_rotation(frame_bgr: np.ndarray, rotations=(0, 1, 2, 3), single: bool = True):
     """
-    Try rotations 0/90/180/270 to find exactly 1 face.
+    Try rotations (default 0/90/180/270, in the given order) to find exactly
+    1 face, or with single=False at least one.
     Returns:
       (upright_bgr, rgb, locations, rotation_k)
     or (None, None, None, None)
     """
-    for k in (0, 1, 2, 3):
+    for k in rotations:
         rot_bgr = _rotate_bgr(frame_bgr, k)
         rgb = cv2.cvtColor(rot_bgr, cv2.COLOR_BGR2RGB)
         locations = face_recognition.face_locations(rgb)
-        if len(locations) == 1:
+        if len(locations) == 1 or (locations and not single):
             return rot_bgr, rgb, locations, k
     return None, None, None, None
 
 
+def _bbox(location, width: int, height: int) -> dict:
+    """face_recognition (top, right, bottom, left) -> normalized bbox + absolute pixels."""
+    top, right, bottom, left = location
+    return {
+        "x": left / width,
+        "y": top / height,
+        "width": (right - left) / width,
+        "height": (bottom - top) / height,
+        "absolute": {
+            "left": int(left),
+            "top": int(top),
+            "right": int(right),
+            "bottom": int(bottom)
+        }
+    }
+
+
+class OrientationCache:
+    """
+    Remembers the rotation faces were last found at, per patient/camera.
+
+    A fixed camera almost never changes orientation, so instead of up to
+    four HOG passes per frame (four on every empty-room frame):
+      - the last successful rotation_k is tried first
+      - once it has hit ORIENTATION_STABLE_HITS times in a row, only that
+        rotation is tried
+      - the full search comes back every ORIENTATION_FULL_SEARCH_EVERY
+        frames, or after ORIENTATION_MAX_MISSES frames in a row without a
+        face, in case the camera was turned
+      - a full search that finds nothing resets the miss count and the
+        following frames try only one rotation again, so an empty room
+        costs one full search per ORIENTATION_MAX_MISSES misses rather than
+        four passes on every frame
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+
+    def find_face(self, key: str, frame_bgr: np.ndarray, single: bool = True):
+        """_find_faces_with_rotation through the cache -> (result tuple, stats dict)."""
+        with self._lock:
+            e = self._entries.setdefault(key, {
+                "k": None, "stable": 0, "misses": 0, "since_full": 0, "idle": False,
+                "hits": 0, "total_misses": 0, "full_searches": 0, "detections": 0,
+            })
+            cached = (
+                (e["idle"] or (e["k"] is not None and e["stable"] >= ORIENTATION_STABLE_HITS))
+                and e["misses"] < ORIENTATION_MAX_MISSES
+                and e["since_full"] < ORIENTATION_FULL_SEARCH_EVERY
+            )
+            if cached:
+                rotations = (e["k"] if e["k"] is not None else 0,)
+            elif e["k"] is not None:
+                rotations = (e["k"],) + tuple(k for k in (0, 1, 2, 3) if k != e["k"])
+            else:
+                rotations = (0, 1, 2, 3)
+
+        result = _find_faces_with_rotation(frame_bgr, rotations, single)
+        k = result[3]
+        tried = len(rotations) if k is None else rotations.index(k) + 1
+
+        with self._lock:
+            e["detections"] += tried
+            if cached:
+                e["since_full"] += 1
+            else:
+                e["since_full"] = 0
+                e["full_searches"] += 1
+            if k is None:
+                e["total_misses"] += 1
+                if cached:
+                    e["misses"] += 1
+                else:
+                    # Nothing at any rotation: back to one rotation per frame
+                    e["misses"] = 0
+                    e["idle"] = True
+            else:
+                e["idle"] = False
+                if k == rotations[0]:
+                    e["hits"] += 1
+                e["stable"] = e["stable"] + 1 if k == e["k"] else 1
+                e["k"] = k
+                e["misses"] = 0
+            stats = {
+                "mode": "cached" if cached else "full",
+                "rotations_tried": tried,
+                "cached_k": e["k"],
+                "hits": e["hits"],
+                "misses": e["total_misses"],
+                "full_searches": e["full_searches"],
+                "detections": e["detections"],
+            }
+        return result, stats
+
+
+ORIENTATION_CACHE = OrientationCache()
+
+
+# ---------------------------
+# Model registry
+# ---------------------------
+
+class LoadedModel:
+    """One consistent set of trained artifacts (never mutated after load)."""
+
+    def __init__(self, version: int, clf, le, centroids: Dict[str, List[float]], mtimes):
+        self.version = version
+        self.clf = clf
+        self.le = le
+        names = list(centroids)
+        self.centroid_index = EmbeddingIndex.from_arrays(names, [centroids[n] for n in names])
+        self.mtimes = mtimes
+        self.loaded_at = datetime.utcnow().isoformat()
+
+    def centroid_distances(self, embs, names) -> np.ndarray:
+        """Distance of embs[i] to the centroid of names[i] (999.0 when there is none)."""
+        dists = self.centroid_index.distance_to(embs, names)
+        dists[~np.isfinite(dists)] = 999.0
+        return dists
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the SVM / LabelEncoder / centroids and of the
+    fallback gallery (flat reference images + enrolled embeddings).
+
+    current() hands out the loaded LoadedModel; a reload builds a new one
+    and swaps the reference, so a request never mixes artifacts from two
+    trainings. Reloads happen when train_face_svm_internal finishes and,
+    for retrains done by another worker, when the artifact mtimes change
+    (checked at most every MODEL_CHECK_SECONDS).
+
+    The gallery is updated in place: enrollment replaces that person's
+    rows through set_person(), and gallery() re-reads only the flat images
+    or embeddings.json files whose mtimes changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model = None
+        self._version = 0
+        self._checked_at = 0.0
+        self._gallery = EmbeddingIndex(capacity=512)
+        self._gallery_checked_at = 0.0
+        self._flat_sig = None
+        self._enrolled = {}     # person_name -> (embeddings.json mtime_ns, rows)
+
+    def current(self):
+        """LoadedModel, or None when no artifacts have been trained yet."""
+        now = time.monotonic()
+        if now - self._checked_at >= MODEL_CHECK_SECONDS:
+            self._checked_at = now
+            mtimes = _artifact_mtimes()
+            model = self._model
+            if mtimes is not None and (model is None or model.mtimes != mtimes):
+                self.reload()
+            elif mtimes is None and model is not None:
+                with self._lock:
+                    self._model = None
+        return self._model
+
+    def reload(self):
+        """Load the artifacts from disk and swap them in. Returns the new version."""
+        with self._lock:
+            for _ in range(3):
+                before = _artifact_mtimes()
+                if before is None:
+                    self._model = None
+                    return self._version
+                clf, le, centroids = _load_artifacts()
+                if _artifact_mtimes() == before:
+                    break
+                # A training run replaced a file mid-load; load again
+            self._version += 1
+            self._model = LoadedModel(self._version, clf, le, centroids, before)
+            self._checked_at = time.monotonic()
+            print(f"[ModelRegistry] loaded face model v{self._version} ({len(le.classes_)} classes)")
+            return self._version
+
+    def gallery(self) -> EmbeddingIndex:
+        """
+        Fallback reference index, label = person name. Keys are
+        ("flat", name_key) for uploads/relatives/*.jpg and
+        ("enrolled", person_name, i) for enrolled embeddings.
+        """
+        now = time.monotonic()
+        if now - self._gallery_checked_at >= MODEL_CHECK_SECONDS:
+            self._gallery_checked_at = now
+            with self._lock:
+                sig = _flat_files_signature()
+                if sig != self._flat_sig:
+                    encodings, names = load_known_encodings_flat()
+                    self._gallery.remove_where(lambda key: key[0] == "flat")
+                    if names:
+                        self._gallery.add_many([("flat", n) for n in names], encodings, names)
+                    self._flat_sig = sig
+
+                mtimes = _enrolled_mtimes()
+                for person_name in [p for p in self._enrolled if p not in mtimes]:
+                    self._set_person(person_name, [], None)
+                for person_name, mtime in mtimes.items():
+                    if self._enrolled.get(person_name, (None,))[0] != mtime:
+                        _, _, emb_path = _ensure_person_dirs(person_name)
+                        self._set_person(person_name, _load_json(emb_path, default=[]), mtime)
+        return self._gallery
+
+    def set_person(self, person_name: str, embeddings: List[List[float]], mtime=None):
+        """Replace person_name's gallery rows (called by enrollment after saving embeddings.json)."""
+        with self._lock:
+            self._set_person(person_name, embeddings, mtime)
+
+    def _set_person(self, person_name: str, embeddings, mtime):
+        # Overwrite rows 0..n-1 in place, then drop the surplus, so a concurrent
+        # query never sees the person missing
+        n = len(embeddings)
+        if n:
+            self._gallery.add_many([("enrolled", person_name, i) for i in range(n)], embeddings, [person_name] * n)
+        old_rows = self._enrolled.get(person_name, (None, 0))[1]
+        for i in range(n, old_rows):
+            self._gallery.remove(("enrolled", person_name, i))
+        if n:
+            self._enrolled[person_name] = (mtime, n)
+        else:
+            self._enrolled.pop(person_name, None)
+
+    def status(self) -> dict:
+        model = self._model
+        return {
+            "model_version": model.version if model else None,
+            "model_loaded_at": model.loaded_at if model else None,
+            "model_classes": [str(c) for c in model.le.classes_] if model else [],
+            "gallery_embeddings": len(self._gallery),
+        }
+
+
+MODEL_REGISTRY = ModelRegistry()
+
+
 # ---------------------------
 # Training
 # ---------------------------
@@ -245,9 +557,10 @@ def train_face_svm_internal():
         clf = SVC(kernel="rbf", probability=True, class_weight="balanced")
         clf.fit(X, y_enc)
 
-        joblib.dump(clf, os.path.join(MODELS_DIR, "face_svm.joblib"))
-        joblib.dump(le, os.path.join(MODELS_DIR, "label_encoder.joblib"))
-        joblib.dump(centroids, os.path.join(MODELS_DIR, "centroids.joblib"))
+        _dump_atomic(clf, ARTIFACT_PATHS[0])
+        _dump_atomic(le, ARTIFACT_PATHS[1])
+        _dump_atomic(centroids, ARTIFACT_PATHS[2])
+        MODEL_REGISTRY.reload()
 
         TRAINING_STATE["last_trained_at"] = datetime.utcnow().isoformat()
         TRAINING_STATE["last_train_status"] = "ok"
@@ -266,18 +579,32 @@ def train_face_svm_internal():
 # Fallback flat encodings
 # ---------------------------
 
+def _flat_image_files() -> List[str]:
+    if not os.path.isdir(RELATIVES_DIR):
+        return []
+    return sorted(
+        f for f in os.listdir(RELATIVES_DIR)
+        if f.lower().endswith((".jpg", ".jpeg", ".png"))
+    )
+
+
+def _flat_files_signature():
+    """(name, mtime_ns) of every flat reference image; changes when one is added/replaced."""
+    sig = []
+    for f in _flat_image_files():
+        try:
+            sig.append((f, os.stat(os.path.join(RELATIVES_DIR, f)).st_mtime_ns))
+        except FileNotFoundError:
+            continue
+    return tuple(sig)
+
+
 def load_known_encodings_flat() -> Tuple[List, List[str]]:
     """
     Fallback: load encodings from uploads/relatives/*.jpg|png (old behavior).
     Note: this only works if you keep single images directly inside RELATIVES_DIR.
     """
-    if not os.path.isdir(RELATIVES_DIR):
-        return [], []
-
-    files = [
-        f for f in os.listdir(RELATIVES_DIR)
-        if f.lower().endswith((".jpg", ".jpeg", ".png"))
-    ]
+    files = _flat_image_files()
     if not files:
         return [], []
 
@@ -301,6 +628,68 @@ def load_known_encodings_flat() -> Tuple[List, List[str]]:
     return known_encodings, known_keys
 
 
+# ---------------------------
+# Classification
+# ---------------------------
+
+def _classify_embeddings(embs) -> List[dict]:
+    """
+    Classify N face embeddings together: one predict_proba and one centroid
+    distance pass with a trained model, otherwise one gallery query.
+    Returns per embedding {"confidence", "payload", "raw"} as /analyze-face sends them.
+    """
+    embs = np.asarray(embs, dtype=np.float64).reshape(-1, 128)
+    if not len(embs):
+        return []
+
+    model = MODEL_REGISTRY.current()
+    if model is not None:
+        probs = model.clf.predict_proba(embs)
+        best_idx = np.argmax(probs, axis=1)
+        best_probs = probs[np.arange(len(embs)), best_idx]
+        pred_names = [str(n) for n in model.le.inverse_transform(best_idx)]
+        dists = model.centroid_distances(embs, pred_names)
+
+        results = []
+        for pred_name, best_prob, dist in zip(pred_names, best_probs.tolist(), dists.tolist()):
+            is_unknown = (best_prob < UNKNOWN_PROB_THRESHOLD) or (dist > UNKNOWN_DIST_THRESHOLD)
+            if is_unknown:
+                payload = {"known": False, "person_name": None, "status": "unknown"}
+            else:
+                payload = {"known": True, "person_name": pred_name, "status": "match"}
+            results.append({
+                "confidence": best_prob,
+                "payload": payload,
+                "raw": {"predicted": pred_name, "prob": best_prob, "dist": dist, "model_version": model.version},
+            })
+        return results
+
+    gallery = MODEL_REGISTRY.gallery()
+    if not len(gallery):
+        return [{
+            "confidence": 1.0,
+            "payload": {"known": False, "person_name": None, "status": "no_known_faces"},
+            "raw": {"status": "no_known_faces"},
+        } for _ in embs]
+
+    dists, _, names = gallery.query(embs, k=1)
+    results = []
+    for dist, name in zip(dists[:, 0].tolist(), names):
+        if dist <= TOLERANCE:
+            results.append({
+                "confidence": 1.0,
+                "payload": {"known": True, "person_name": name[0], "status": "match"},
+                "raw": {"status": "match", "name_key": name[0], "dist": dist, "confidence": 1.0},
+            })
+        else:
+            results.append({
+                "confidence": 1.0,
+                "payload": {"known": False, "person_name": None, "status": "no_match"},
+                "raw": {"status": "no_match", "confidence": 1.0},
+            })
+    return results
+
+
 # ---------------------------
 # Routes
 # ---------------------------
@@ -312,7 +701,8 @@ def health():
 
 @app.get("/training-status")
 def training_status():
-    return {"status": "ok", **TRAINING_STATE, "artifacts_exist": _artifacts_exist()}
+    MODEL_REGISTRY.current()
+    return {"status": "ok", **TRAINING_STATE, "artifacts_exist": _artifacts_exist(), **MODEL_REGISTRY.status()}
 
 
 @app.post("/enroll-relative")
@@ -341,6 +731,7 @@ async def enroll_relative(
     saved = 0
     frame_idx = 0
     last_kept_emb = None
+    orientation = OrientationCache()   # one video -> one orientation
 
     debug = {
         "frames_read": 0,
@@ -383,7 +774,7 @@ async def enroll_relative(
                 debug["blur_reject"] += 1
                 continue
 
-            upright_bgr, rgb, locations, k = _find_single_face_with_rotation(frame_bgr)
+            (upright_bgr, rgb, locations, k), _ = orientation.find_face("enroll", frame_bgr)
             if upright_bgr is None:
                 debug["no_single_face"] += 1
                 continue
@@ -430,6 +821,7 @@ async def enroll_relative(
             embeddings = embeddings[-400:]
 
         _save_json(emb_path, embeddings)
+        MODEL_REGISTRY.set_person(person_name, embeddings, os.stat(emb_path).st_mtime_ns)
 
         background_tasks.add_task(train_face_svm_internal)
 
@@ -463,30 +855,29 @@ async def enroll_relative(
 async def analyze_face(
     patient_id: str = Form(...),
     frame: UploadFile = File(...),
+    camera_id: str = Form(""),
 ):
     """
     Returns standardized JSON for Django.
-    Handles rotated images by trying 0/90/180/270 rotations.
+    Handles rotated images by trying 0/90/180/270 rotations, starting from
+    (or, once stable, only) the rotation last found for this patient/camera;
+    raw["orientation"] carries the cache stats.
     """
-    tmp_path = None
     try:
-        suffix = os.path.splitext(frame.filename or "")[1] or ".jpg"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp_path = tmp.name
-            tmp.write(await frame.read())
-
         try:
-            frame_bgr = _read_image_bgr(tmp_path)
+            frame_bgr = _decode_image_bgr(await frame.read())
         except Exception as e:
             return JSONResponse(status_code=400, content={"status": "error", "message": f"Failed to read image: {str(e)}"})
 
-        upright_bgr, rgb, locations, rot_k = _find_single_face_with_rotation(frame_bgr)
+        (upright_bgr, rgb, locations, rot_k), orientation = ORIENTATION_CACHE.find_face(
+            f"{patient_id}:{camera_id}", frame_bgr,
+        )
         if upright_bgr is None:
             return {
                 "event_type": "FACE",
                 "confidence": 0.0,
                 "payload": {"known": True, "person_name": None, "status": "no_face"},
-                "raw": {"status": "no_face"},
+                "raw": {"status": "no_face", "orientation": orientation},
             }
 
         unknown_encodings = face_recognition.face_encodings(rgb, known_face_locations=locations)
@@ -495,74 +886,81 @@ async def analyze_face(
                 "event_type": "FACE",
                 "confidence": 0.0,
                 "payload": {"known": True, "person_name": None, "status": "no_face"},
-                "raw": {"status": "no_face"},
+                "raw": {"status": "no_face", "orientation": orientation},
             }
 
-        emb = unknown_encodings[0]
+        result = _classify_embeddings(unknown_encodings[:1])[0]
+        result["raw"].update(rotation_k=rot_k, orientation=orientation)
+        return {"event_type": "FACE", **result}
 
-        clf, le, centroids = _load_artifacts()
-        if clf is not None:
-            probs = clf.predict_proba([emb])[0]
-            best_idx = int(np.argmax(probs))
-            best_prob = float(probs[best_idx])
-            pred_name = le.inverse_transform([best_idx])[0]
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
-            centroid = centroids.get(pred_name)
-            dist = _dist_to_centroid(emb, centroid) if centroid is not None else 999.0
 
-            is_unknown = (best_prob < UNKNOWN_PROB_THRESHOLD) or (dist > UNKNOWN_DIST_THRESHOLD)
+@app.post("/analyze-faces")
+async def analyze_faces(
+    patient_id: str = Form(...),
+    frames: List[UploadFile] = File(...),
+    camera_id: str = Form(""),
+):
+    """
+    Batched /analyze-face for several frames or person crops in one request,
+    identifying every face in each (not only single-face images):
+      - per image: rotation search through the orientation cache (keyed
+        apart from /analyze-face's full frames), then one face_encodings
+        call for all of its faces
+      - all faces of all images are classified together (_classify_embeddings)
+    Returns one entry per uploaded image, in order, each with its faces,
+    their boxes (in the upright image, see rotation_k) and embeddings (as
+    /track-person returns them, so a caller can start tracking a match).
+    """
+    if len(frames) > ANALYZE_FACES_MAX_IMAGES:
+        return JSONResponse(status_code=400, content={
+            "status": "error", "message": f"At most {ANALYZE_FACES_MAX_IMAGES} images per request",
+        })
 
-            if is_unknown:
-                return {
-                    "event_type": "FACE",
-                    "confidence": best_prob,
-                    "payload": {"known": False, "person_name": None, "status": "unknown"},
-                    "raw": {"predicted": pred_name, "prob": best_prob, "dist": dist, "rotation_k": rot_k},
-                }
+    try:
+        images = []
+        embeddings = []
+        for i, upload in enumerate(frames):
+            image = {"index": i, "filename": upload.filename, "faces": []}
+            images.append(image)
+            try:
+                frame_bgr = _decode_image_bgr(await upload.read())
+            except Exception as e:
+                image.update(status="error", message=f"Failed to read image: {str(e)}")
+                continue
 
-            return {
-                "event_type": "FACE",
-                "confidence": best_prob,
-                "payload": {"known": True, "person_name": pred_name, "status": "match"},
-                "raw": {"predicted": pred_name, "prob": best_prob, "dist": dist, "rotation_k": rot_k},
-            }
+            (upright_bgr, rgb, locations, rot_k), orientation = ORIENTATION_CACHE.find_face(
+                f"{patient_id}:{camera_id}:crops", frame_bgr, single=False,
+            )
+            image.update(status="no_face", rotation_k=rot_k, orientation=orientation)
+            if upright_bgr is None:
+                continue
 
-        known_encodings, known_keys = load_known_encodings_flat()
-        if not known_encodings:
-            return {
-                "event_type": "FACE",
-                "confidence": 1.0,
-                "payload": {"known": False, "person_name": None, "status": "no_known_faces"},
-                "raw": {"status": "no_known_faces", "rotation_k": rot_k},
-            }
+            encodings = face_recognition.face_encodings(rgb, known_face_locations=locations)
+            height, width = rgb.shape[:2]
+            for location, emb in zip(locations, encodings):
+                image["faces"].append({"bbox": _bbox(location, width, height), "embedding": emb.tolist()})
+                embeddings.append(emb)
+            if encodings:
+                image["status"] = "ok"
 
-        matches = face_recognition.compare_faces(known_encodings, emb, tolerance=TOLERANCE)
-        if True in matches:
-            idx = matches.index(True)
-            return {
-                "event_type": "FACE",
-                "confidence": 1.0,
-                "payload": {"known": True, "person_name": known_keys[idx], "status": "match"},
-                "raw": {"status": "match", "name_key": known_keys[idx], "confidence": 1.0, "rotation_k": rot_k},
-            }
+        faces = [face for image in images for face in image["faces"]]
+        for face, result in zip(faces, _classify_embeddings(embeddings)):
+            face.update(result)
 
         return {
             "event_type": "FACE",
-            "confidence": 1.0,
-            "payload": {"known": False, "person_name": None, "status": "no_match"},
-            "raw": {"status": "no_match", "confidence": 1.0, "rotation_k": rot_k},
+            "status": "ok",
+            "faces_total": len(faces),
+            "known_total": sum(1 for face in faces if face["payload"]["known"]),
+            "images": images,
         }
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
-    finally:
-        try:
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
-
 
 @app.post("/track-person")
 async def track_person(
@@ -573,15 +971,9 @@ async def track_person(
     Person tracking endpoint that returns face embedding and bounding box.
     Used for detecting new persons and tracking them across frames.
     """
-    tmp_path = None
     try:
-        suffix = os.path.splitext(frame.filename or "")[1] or ".jpg"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp_path = tmp.name
-            tmp.write(await frame.read())
-
         try:
-            frame_bgr = _read_image_bgr(tmp_path)
+            frame_bgr = _decode_image_bgr(await frame.read())
         except Exception as e:
             return JSONResponse(status_code=400, content={"status": "error", "message": f"Failed to read image: {str(e)}"})
 
@@ -607,22 +999,10 @@ async def track_person(
             }
 
         emb = unknown_encodings[0]
-        top, right, bottom, left = locations[0]
-        
-        # Convert to normalized coordinates (0-1)
+
+        # Normalized coordinates (0-1)
         height, width = rgb.shape[:2]
-        bbox = {
-            "x": left / width,
-            "y": top / height,
-            "width": (right - left) / width,
-            "height": (bottom - top) / height,
-            "absolute": {
-                "left": int(left),
-                "top": int(top),
-                "right": int(right),
-                "bottom": int(bottom)
-            }
-        }
+        bbox = _bbox(locations[0], width, height)
 
         return {
             "status": "success",
@@ -634,10 +1014,3 @@ async def track_person(
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
-
-    finally:
-        try:
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
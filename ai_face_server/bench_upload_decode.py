@@ -0,0 +1,124 @@
+"""
+bench_upload_decode.py
+----------------------
+Benchmark: latency of turning an uploaded JPEG into a BGR array under
+concurrent load.
+
+  disk    NamedTemporaryFile on the container filesystem + cv2.imread
+          (what /analyze-face and /track-person used to do)
+  tmpfs   the same temp-file dance in /dev/shm
+  memory  cv2.imdecode on the bytes + EXIF orientation lookup
+          (_decode_image_bgr, what the endpoints do now)
+
+Each mode runs --requests decodes from --concurrency threads and reports
+per-request p50 / p95 / p99 latency and throughput.
+
+With --url, POSTs the image to a running face server instead and reports
+end-to-end request latency under the same concurrency:
+    python bench_upload_decode.py --url http://127.0.0.1:8000/analyze-face
+
+Run from ai_face_server:
+    python bench_upload_decode.py [--image test.jpg] [--concurrency 8] [--requests 400]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+def _synthetic_jpeg(width=1280, height=720) -> bytes:
+    rng = np.random.default_rng(0)
+    img = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    assert ok
+    return buf.tobytes()
+
+
+def _via_file(data: bytes, directory: str) -> np.ndarray:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg", dir=directory) as tmp:
+        tmp_path = tmp.name
+        tmp.write(data)
+    try:
+        img = cv2.imread(tmp_path)
+        if img is None:
+            raise ValueError("imread failed")
+        return img
+    finally:
+        os.remove(tmp_path)
+
+
+def _in_memory(data: bytes) -> np.ndarray:
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img is None:
+        raise ValueError("imdecode failed")
+    try:
+        from PIL import Image
+        Image.open(io.BytesIO(data)).getexif().get(0x0112, 1)
+    except ImportError:
+        pass
+    return img
+
+
+def _run(fn, concurrency: int, requests: int):
+    def one(_):
+        t0 = time.perf_counter()
+        fn()
+        return (time.perf_counter() - t0) * 1000.0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(min(requests, concurrency * 2))))   # warm-up
+        t0 = time.perf_counter()
+        latencies = sorted(pool.map(one, range(requests)))
+        wall = time.perf_counter() - t0
+    pct = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+    return pct(0.50), pct(0.95), pct(0.99), requests / wall
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--image", help="JPEG to upload (default: synthetic 1280x720)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--disk-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                    help="directory on the container filesystem for the disk mode")
+    ap.add_argument("--url", help="POST to a running face server endpoint instead")
+    args = ap.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            data = f.read()
+    else:
+        data = _synthetic_jpeg()
+    print(f"{len(data) / 1024:.0f} KiB JPEG, {args.requests} requests, concurrency {args.concurrency}\n")
+
+    if args.url:
+        import requests
+        session = requests.Session()
+        post = lambda: session.post(
+            args.url, files={"frame": ("frame.jpg", data, "image/jpeg")},
+            data={"patient_id": "bench"}, timeout=60,
+        ).raise_for_status()
+        modes = [(args.url, post)]
+    else:
+        modes = [
+            (f"disk ({args.disk_dir})", lambda: _via_file(data, args.disk_dir)),
+            ("memory", lambda: _in_memory(data)),
+        ]
+        if os.path.isdir("/dev/shm"):
+            modes.insert(1, ("tmpfs (/dev/shm)", lambda: _via_file(data, "/dev/shm")))
+        assert np.array_equal(_via_file(data, args.disk_dir), _in_memory(data)), "decode paths differ"
+
+    print(f"{'mode':<40} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name, fn in modes:
+        p50, p95, p99, rps = _run(fn, args.concurrency, args.requests)
+        print(f"{name:<40} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {rps:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+EmbeddingIndex
+--------------
+Nearest-neighbour index over face embeddings, shared by the face server
+(centroids, enrolled gallery) and Django's PersonTrackingService.
+
+Rows live in one contiguous float32 matrix, L2-normalised, with each
+row's original norm kept alongside, so a single matrix product answers a
+whole batch of queries:
+  cosine     1 - q̂·r̂
+  euclidean  sqrt(|q|² + |r|² - 2|q||r| q̂·r̂)   — identical to
+             np.linalg.norm(q - r), so the existing face_recognition
+             thresholds (0.6 / 0.65) still apply
+
+add() / remove() are incremental: rows are appended into spare capacity
+(doubling when full) and a removed row is back-filled with the last one.
+
+Only numpy is needed, so Django imports it from here as well:
+    from ai_face_server.embedding_index import EmbeddingIndex
+"""
+
+import threading
+
+import numpy as np
+
+
+class EmbeddingIndex:
+
+    def __init__(self, dim: int = 128, capacity: int = 64):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._unit = np.zeros((max(1, capacity), dim), dtype=np.float32)   # L2-normalised rows
+        self._norms = np.zeros(max(1, capacity), dtype=np.float32)
+        self._keys: list = []
+        self._labels: list = []
+        self._row_of: dict = {}     # key -> row
+
+    @classmethod
+    def from_arrays(cls, keys, vectors, labels=None, dim: int = 128) -> "EmbeddingIndex":
+        index = cls(dim=dim, capacity=max(1, len(keys)))
+        index.add_many(keys, vectors, labels)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._row_of
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._keys)
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def _as_matrix(self, vectors) -> np.ndarray:
+        return np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._norms)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        unit = np.zeros((capacity, self.dim), dtype=np.float32)
+        norms = np.zeros(capacity, dtype=np.float32)
+        n = len(self._keys)
+        unit[:n] = self._unit[:n]
+        norms[:n] = self._norms[:n]
+        self._unit, self._norms = unit, norms
+
+    def add_many(self, keys, vectors, labels=None) -> None:
+        """Insert rows (a key already present is overwritten in place)."""
+        arr = self._as_matrix(vectors)
+        if len(keys) != len(arr):
+            raise ValueError("keys and vectors differ in length")
+        norms = np.linalg.norm(arr, axis=1)
+        unit = arr / np.maximum(norms, 1e-12)[:, None]
+        labels = list(labels) if labels is not None else list(keys)
+
+        with self._lock:
+            self._grow(len(self._keys) + len(keys))
+            for key, u, n, label in zip(keys, unit, norms, labels):
+                row = self._row_of.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    self._keys.append(key)
+                    self._labels.append(label)
+                    self._row_of[key] = row
+                else:
+                    self._labels[row] = label
+                self._unit[row] = u
+                self._norms[row] = n
+
+    def add(self, key, vector, label=None) -> None:
+        self.add_many([key], [vector], [label if label is not None else key])
+
+    def remove(self, key) -> bool:
+        with self._lock:
+            row = self._row_of.pop(key, None)
+            if row is None:
+                return False
+            last = len(self._keys) - 1
+            if row != last:
+                # Back-fill the hole with the last row
+                self._unit[row] = self._unit[last]
+                self._norms[row] = self._norms[last]
+                self._keys[row] = self._keys[last]
+                self._labels[row] = self._labels[last]
+                self._row_of[self._keys[row]] = row
+            self._keys.pop()
+            self._labels.pop()
+            return True
+
+    def remove_where(self, predicate) -> int:
+        """Remove every row whose key satisfies predicate(key). Returns rows removed."""
+        with self._lock:
+            doomed = [k for k in self._keys if predicate(k)]
+        return sum(self.remove(k) for k in doomed)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _to_distance(cos, q_norm, r_norm, metric: str) -> np.ndarray:
+        if metric == "cosine":
+            return 1.0 - cos
+        return np.sqrt(np.maximum(q_norm ** 2 + r_norm ** 2 - 2.0 * q_norm * r_norm * cos, 0.0))
+
+    @staticmethod
+    def _normalise(q: np.ndarray):
+        q_norm = np.linalg.norm(q, axis=1)
+        return q / np.maximum(q_norm, 1e-12)[:, None], q_norm
+
+    def query(self, vectors, k: int = 1, metric: str = "euclidean"):
+        """
+        Top-k nearest rows for each query vector (batched).
+        Returns (distances (m, k'), keys [[...]], labels [[...]]), k' = min(k, len).
+        """
+        q = self._as_matrix(vectors)
+        with self._lock:
+            n = len(self._keys)
+            if n == 0 or len(q) == 0:
+                return np.zeros((len(q), 0), dtype=np.float32), [[] for _ in q], [[] for _ in q]
+            q_unit, q_norm = self._normalise(q)
+            cos = q_unit @ self._unit[:n].T
+            dist = self._to_distance(cos, q_norm[:, None], self._norms[:n][None, :], metric)
+            keys, labels = list(self._keys), list(self._labels)
+
+        k = min(k, n)
+        if k < n:
+            idx = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(n), (len(q), n))
+        part = np.take_along_axis(dist, idx, axis=1)
+        order = np.argsort(part, axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+        return part, [[keys[i] for i in row] for row in idx], [[labels[i] for i in row] for row in idx]
+
+    def distance_to(self, vectors, keys, metric: str = "euclidean") -> np.ndarray:
+        """Distance of vectors[i] to the row stored under keys[i] (inf if absent)."""
+        q = self._as_matrix(vectors)
+        out = np.full(len(q), np.inf, dtype=np.float32)
+        with self._lock:
+            pairs = [(i, self._row_of[key]) for i, key in enumerate(keys) if key in self._row_of]
+            if pairs:
+                qi, rows = map(list, zip(*pairs))
+                q_unit, q_norm = self._normalise(q[qi])
+                cos = np.einsum("ij,ij->i", q_unit, self._unit[rows])
+                out[qi] = self._to_distance(cos, q_norm, self._norms[rows], metric)
+        return out
@@ -0,0 +1,77 @@
+"""
+OrientationCache detection-cost check
+-------------------------------------
+Replaces _find_faces_with_rotation with a stub (a "frame" is just the
+rotation a face is visible at, or None for an empty room) and counts the
+HOG passes OrientationCache.find_face asks for. Verifies that:
+  - an empty room runs one full 4-rotation search per ORIENTATION_MAX_MISSES
+    misses, not one on every frame (from a cold start and after the
+    camera's rotation was stable)
+  - once stable, a frame with a face costs a single pass
+  - a turned camera is still picked up by the next full search
+
+Run from ai_face_server (needs the face server's requirements):
+    python test_orientation_cache.py
+"""
+
+import sys
+
+import ai_face_server as afs
+
+
+def _stub_find(frame, rotations=(0, 1, 2, 3), single=True):
+    for k in rotations:
+        if frame == k:
+            return "upright", "rgb", [(0, 10, 10, 0)], k
+    return None, None, None, None
+
+
+def _run(cache, key, frames):
+    """(passes, full searches) spent on frames."""
+    passes = fulls = 0
+    for frame in frames:
+        _, stats = cache.find_face(key, frame)
+        passes += stats["rotations_tried"]
+        fulls += stats["mode"] == "full"
+    return passes, fulls
+
+
+def main() -> int:
+    afs._find_faces_with_rotation = _stub_find
+    max_misses = afs.ORIENTATION_MAX_MISSES
+    empty = 120
+    # One full search, then up to max_misses single-rotation misses
+    max_fulls = -(-empty // (max_misses + 1)) + 1
+    failures = []
+
+    cache = afs.OrientationCache()
+    passes, fulls = _run(cache, "cold", [None] * empty)
+    print(f"cold empty room:   {empty} frames -> {passes} passes, {fulls} full searches")
+    if fulls > max_fulls:
+        failures.append(f"cold start: {fulls} full searches for {empty} empty frames (max {max_fulls})")
+
+    passes, fulls = _run(cache, "stable", [1] * (afs.ORIENTATION_STABLE_HITS + 2))
+    passes, fulls = _run(cache, "stable", [1] * 5)
+    print(f"stable face:       5 frames -> {passes} passes")
+    if passes != 5:
+        failures.append(f"stable rotation: {passes} passes for 5 frames (expected 5)")
+
+    passes, fulls = _run(cache, "stable", [None] * empty)
+    print(f"stable empty room: {empty} frames -> {passes} passes, {fulls} full searches")
+    if fulls > max_fulls:
+        failures.append(f"after stable: {fulls} full searches for {empty} empty frames (max {max_fulls})")
+
+    passes, fulls = _run(cache, "stable", [3] * (max_misses + 2))
+    _, stats = cache.find_face("stable", 3)
+    print(f"camera turned:     cached_k={stats['cached_k']}")
+    if stats["cached_k"] != 3:
+        failures.append(f"turned camera not picked up (cached_k={stats['cached_k']})")
+
+    for f in failures:
+        print("FAIL:", f)
+    print("OK" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
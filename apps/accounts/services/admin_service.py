@@ -5,6 +5,7 @@ from apps.monitoring.models import User, Patient, PatientRelativeLink
 from apps.accounts.services.base import (
     get_user, get_patient, BadRequestError, ForbiddenError, NotFoundError,
 )
+from apps.monitoring.services import recipient_cache
 
 
 class AdminService:
@@ -33,6 +34,7 @@ class AdminService:
             raise ForbiddenError("Only admins can delete users.")
         target = get_user(user_id)
         target.delete()
+        recipient_cache.invalidate_all()
 
     @staticmethod
     def reject_caregiver(caregiver_id: str, admin_id: str) -> None:
@@ -43,6 +45,7 @@ class AdminService:
         if caregiver.role != User.ROLE_CAREGIVER:
             raise BadRequestError("Target user is not a CAREGIVER.")
         caregiver.delete()
+        recipient_cache.invalidate_all()
 
     @staticmethod
     def change_relative_role(patient_id: str, relative_id: str, new_role: str, admin_id: str) -> PatientRelativeLink:
@@ -12,6 +12,7 @@ from apps.accounts.services.base import (
     NotFoundError, BadRequestError, ConflictError, ForbiddenError,
 )
 from apps.accounts.services.relative_service import RelativeService
+from apps.monitoring.services import recipient_cache
 
 
 class CaregiverService:
@@ -90,6 +91,7 @@ class CaregiverService:
             raise BadRequestError("Action must be ACCEPT or DECLINE.")
 
         contract.save()
+        recipient_cache.invalidate(contract.patient.id)
         return contract
 
     @staticmethod
@@ -115,6 +117,7 @@ class CaregiverService:
         contract.status = CaregiverContract.STATUS_ENDED
         contract.ended_at = datetime.utcnow()
         contract.save()
+        recipient_cache.invalidate(contract.patient.id)
         return contract
 
     @staticmethod
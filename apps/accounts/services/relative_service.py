@@ -8,6 +8,7 @@ from apps.accounts.services.base import (
     get_user, get_patient,
     BadRequestError, ConflictError, ForbiddenError, NotFoundError,
 )
+from apps.monitoring.services import recipient_cache
 
 
 class RelativeService:
@@ -59,12 +60,14 @@ class RelativeService:
             if existing_primary >= 2:
                 raise BadRequestError("A patient can have at most 2 primary relatives.")
 
-        return PatientRelativeLink(
+        link = PatientRelativeLink(
             patient=patient,
             relative=new_relative,
             role_type=role_type,
             created_at=datetime.utcnow(),
         ).save()
+        recipient_cache.invalidate(patient.id)
+        return link
 
     @staticmethod
     def get_relatives_for_patient(patient_id: str) -> List[dict]:
@@ -87,6 +90,7 @@ class RelativeService:
         if link.role_type == PatientRelativeLink.ROLE_PRIMARY:
             raise ForbiddenError("Cannot remove a primary relative.")
         link.delete()
+        recipient_cache.invalidate(patient.id)
 
     @staticmethod
     def change_relative_role(patient_id: str, requester_id: str, relative_id: str, new_role: str) -> PatientRelativeLink:
@@ -0,0 +1,134 @@
+"""
+python manage.py check_query_plans [--ensure-indexes] [--sync-ttl] [--patient <id>]
+
+Runs explain() on every hot monitoring query and fails (exit 1) when a
+winning plan scans the whole collection (COLLSCAN) or sorts in memory
+(SORT) — i.e. when a query is no longer served by one of the compound
+indexes declared in the model meta.
+
+--ensure-indexes  create any missing indexes first
+--sync-ttl        apply changed *_RETENTION_DAYS to existing TTL indexes
+                  (MongoDB refuses to re-create an index with new options)
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitoring.models import ActivityLog, Alert, Event, Patient, SensorBucket, SensorReading
+
+MODELS = (ActivityLog, Event, Alert, SensorReading, SensorBucket)
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+
+def _stages(plan) -> list[str]:
+    """Every stage name in an explain plan tree (classic and SBE layouts)."""
+    if isinstance(plan, list):
+        return [s for p in plan for s in _stages(p)]
+    if not isinstance(plan, dict):
+        return []
+    out = [plan["stage"]] if "stage" in plan else []
+    for key in ("queryPlan", "inputStage", "inputStages", "shards", "winningPlan"):
+        if key in plan:
+            out += _stages(plan[key])
+    return out
+
+
+def _winning_plan(explain: dict) -> dict:
+    planner = explain.get("queryPlanner", {})
+    if "winningPlan" in planner:
+        return planner["winningPlan"]
+    # Aggregation explain: the $cursor stage carries the query planner
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            return stage["$cursor"]["queryPlanner"]["winningPlan"]
+    return {}
+
+
+def _hot_queries(patient_id: ObjectId, recipient_id: ObjectId) -> list[tuple]:
+    """(name, explain dict) for the queries behind the busy endpoints."""
+    now = datetime.utcnow()
+    cooldown_since = now - timedelta(seconds=settings.ALERT_COOLDOWN_SECONDS)
+    return [
+        ("ActivityLogView: activity_logs by patient, newest first",
+         ActivityLog.objects(patient=patient_id).order_by("-created_at").limit(50).explain()),
+        ("ActivityHistoryView: events by patient + type, last N minutes",
+         Event.objects(
+             patient=patient_id,
+             event_type__in=[Event.TYPE_ACTIVITY, Event.TYPE_FALL],
+             created_at__gte=now - timedelta(minutes=60),
+         ).order_by("-created_at").explain()),
+        ("AlertService: cooldown check, last alert per patient + type",
+         Alert._get_collection()
+         .find({"patient": patient_id, "alert_type": "FALL_DETECTED", "created_at": {"$gt": cooldown_since}},
+               {"created_at": 1})
+         .sort("created_at", -1).limit(1).explain()),
+        ("AlertsListView: recipient, newest first",
+         Alert.objects(recipient=recipient_id).order_by("-created_at").limit(200).explain()),
+        ("AlertsListView: recipient + status, newest first",
+         Alert.objects(recipient=recipient_id, status=Alert.STATUS_NEW).order_by("-created_at").limit(200).explain()),
+        ("AlertsListView: patient, newest first",
+         Alert.objects(patient=patient_id).order_by("-created_at").limit(200).explain()),
+        ("SensorHistoryView: sensor_buckets by patient + range",
+         SensorBucket._get_collection()
+         .find({"patient": patient_id, "bucket_start": {"$gte": now - timedelta(hours=1), "$lt": now}})
+         .sort("bucket_start", 1).explain()),
+        ("sensor_readings by patient, newest first",
+         SensorReading.objects(patient=patient_id).order_by("-created_at").limit(50).explain()),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Explain the hot monitoring queries and fail if any is not served by an index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--patient", help="Patient id to plan against (default: first patient)")
+        parser.add_argument("--ensure-indexes", action="store_true", help="Create missing indexes first")
+        parser.add_argument("--sync-ttl", action="store_true", help="Update expireAfterSeconds on existing TTL indexes")
+
+    def handle(self, *args, **options):
+        if options["sync_ttl"]:
+            self._sync_ttl()
+        if options["ensure_indexes"]:
+            for model in MODELS:
+                model.ensure_indexes()
+                self.stdout.write(f"indexes ensured: {model._get_collection_name()}")
+
+        if options["patient"]:
+            patient_id = ObjectId(options["patient"])
+        else:
+            patient = Patient.objects.only("id").first()
+            patient_id = patient.id if patient else ObjectId()
+        recipient_id = ObjectId()
+
+        failures = []
+        for name, explain in _hot_queries(patient_id, recipient_id):
+            stages = _stages(_winning_plan(explain))
+            bad = sorted(BAD_STAGES.intersection(stages))
+            line = f"{name}\n    plan: {' <- '.join(stages) or '?'}"
+            if bad:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"[FAIL] {line}  ({', '.join(bad)})"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[ OK ] {line}"))
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries are not index-covered")
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index."))
+
+    def _sync_ttl(self) -> None:
+        """collMod the TTL of each declared expireAfterSeconds index that already exists."""
+        for model in MODELS:
+            collection = model._get_collection()
+            existing = {tuple(info["key"]): name for name, info in collection.index_information().items()}
+            for spec in model._meta.get("index_specs", []):
+                ttl = spec.get("expireAfterSeconds")
+                name = existing.get(tuple(spec["fields"]))
+                if ttl is None or name is None:
+                    continue
+                collection.database.command(
+                    "collMod", collection.name, index={"name": name, "expireAfterSeconds": ttl},
+                )
+                self.stdout.write(f"TTL {collection.name}.{name} = {ttl}s")
@@ -4,4 +4,4 @@ from apps.monitoring.models.caregiver import CaregiverContract, MedicationEntry,
 from apps.monitoring.models.tracking import PersonTracking
 from apps.monitoring.models.events import Event, Alert
 from apps.monitoring.models.activity_log import ActivityLog
-from apps.monitoring.models.sensor import SensorReading
+from apps.monitoring.models.sensor import SensorReading, SensorBucket
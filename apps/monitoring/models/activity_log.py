@@ -1,4 +1,5 @@
 from datetime import datetime
+from django.conf import settings
 from mongoengine import Document, StringField, DateTimeField, FloatField, ReferenceField, DictField
 
 from apps.monitoring.models.patient import Patient
@@ -25,5 +26,13 @@ class ActivityLog(Document):
 
     meta = {
         "collection": "activity_logs",
-        "indexes": ["patient", "activity", "-created_at"],
+        "indexes": [
+            # ActivityLogView: patient, newest first
+            {"fields": ["patient", "-created_at"]},
+            "activity",
+        ] + (
+            # Raw logs expire after ACTIVITY_LOG_RETENTION_DAYS (0 = keep forever)
+            [{"fields": ["created_at"], "expireAfterSeconds": settings.ACTIVITY_LOG_RETENTION_DAYS * 86400}]
+            if settings.ACTIVITY_LOG_RETENTION_DAYS else ["-created_at"]
+        ),
     }
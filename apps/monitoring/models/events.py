@@ -27,7 +27,13 @@ class Event(Document):
 
     meta = {
         "collection": "events",
-        "indexes": ["patient", "event_type", "person_tracking", "-created_at"],
+        "indexes": [
+            # ActivityHistoryView: patient + event_type $in + time range, newest first
+            {"fields": ["patient", "event_type", "-created_at"]},
+            {"fields": ["patient", "-created_at"]},
+            "person_tracking",
+            "-created_at",
+        ],
     }
 
 
@@ -50,9 +56,12 @@ class Alert(Document):
     meta = {
         "collection": "alerts",
         "indexes": [
-            "patient",
-            "recipient",
-            "alert_type",
+            # AlertService cooldown: patient + alert_type, newest first
+            {"fields": ["patient", "alert_type", "-created_at"]},
+            # AlertsListView: recipient (+ status), newest first
+            {"fields": ["recipient", "status", "-created_at"]},
+            {"fields": ["recipient", "-created_at"]},
+            {"fields": ["patient", "-created_at"]},
             "-created_at",
         ],
     }
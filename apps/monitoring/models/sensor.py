@@ -1,5 +1,6 @@
 from datetime import datetime
-from mongoengine import Document, ReferenceField, FloatField, DateTimeField
+from django.conf import settings
+from mongoengine import Document, ReferenceField, FloatField, DateTimeField, IntField, ListField, DictField
 
 from apps.monitoring.models.patient import Patient
 
@@ -8,6 +9,8 @@ class SensorReading(Document):
     """
     One reading pushed by the Raspberry Pi alongside a video frame.
     All sensor fields are optional — Pi may not have all sensors attached.
+
+    Legacy per-frame storage: new readings are appended to SensorBucket.
     """
 
     patient = ReferenceField(Patient, required=True)
@@ -21,5 +24,47 @@ class SensorReading(Document):
 
     meta = {
         "collection": "sensor_readings",
-        "indexes": ["patient", "-created_at"],
+        "indexes": [
+            {"fields": ["patient", "-created_at"]},
+        ] + (
+            [{"fields": ["created_at"], "expireAfterSeconds": settings.SENSOR_RETENTION_DAYS * 86400}]
+            if settings.SENSOR_RETENTION_DAYS else []
+        ),
+    }
+
+
+class SensorBucket(Document):
+    """
+    All sensor samples for one patient in one UTC minute.
+
+    Arrays are index-aligned: sample i was taken at bucket_start + t[i]
+    seconds and has hrv[i], accel_x[i], ... (None where that sensor sent
+    nothing). `stats` holds per-channel {"n", "sum", "min", "max"} so
+    minute-or-coarser queries never touch the arrays.
+
+    Written with raw upserts by services/sensor_store.py.
+    """
+
+    CHANNELS = ("hrv", "accel_x", "accel_y", "accel_z")
+
+    patient = ReferenceField(Patient, required=True)
+    bucket_start = DateTimeField(required=True)     # minute floor, UTC
+
+    count = IntField(default=0)
+    t = ListField()             # seconds since bucket_start
+    hrv = ListField()
+    accel_x = ListField()
+    accel_y = ListField()
+    accel_z = ListField()
+    stats = DictField()         # channel -> {"n", "sum", "min", "max"}
+
+    meta = {
+        "collection": "sensor_buckets",
+        "indexes": [
+            {"fields": ["patient", "bucket_start"], "unique": True},
+        ] + (
+            # Buckets expire SENSOR_RETENTION_DAYS after their minute (0 = keep forever)
+            [{"fields": ["bucket_start"], "expireAfterSeconds": settings.SENSOR_RETENTION_DAYS * 86400}]
+            if settings.SENSOR_RETENTION_DAYS else []
+        ),
     }
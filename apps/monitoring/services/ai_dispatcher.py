@@ -1,21 +1,27 @@
 """
 AIDispatcher
 
-Sends JPEG frames to the AI microservices in background threads.
-Results are POSTed back to Django's /api/stream/ai-result endpoint
-so the response can be processed by ResultProcessor in the normal
-request cycle.
+Sends JPEG frames to the AI microservices from bounded worker pools.
+Results are handed to an in-process ResultWorker, which caches them in
+StreamManager and runs ResultProcessor — no HTTP round-trip back to
+Django's own /api/stream/ai-result endpoint.
+
+Each AI server gets its own DestinationPool:
+  - a fixed number of worker threads (no thread per frame)
+  - one keep-alive requests.Session shared by those workers
+  - at most one pending frame per patient: a newer frame replaces the
+    queued one (drop-oldest), so a slow server sees the latest frame
+    instead of an ever-growing backlog
+  - counters for in-flight / pending / dropped calls and call latency
 """
 
 import threading
 import time
+from collections import OrderedDict, deque
+
 import requests
 from django.conf import settings
-
-
-def _callback_url(port: int) -> str:
-    host = getattr(settings, "DJANGO_HOST", "127.0.0.1")
-    return f"http://{host}:{port}/api/stream/ai-result"
+from requests.adapters import HTTPAdapter
 
 # How often (seconds) to send a frame to the Activity Server per patient
 ACTIVITY_RECOGNITION_INTERVAL = 1.0
@@ -23,96 +29,238 @@ ACTIVITY_RECOGNITION_INTERVAL = 1.0
 # How often (seconds) to send a frame to the face AI server per patient
 FACE_RECOGNITION_INTERVAL = 5.0
 
-_last_activity_check: dict[str, float] = {}
-_activity_lock = threading.Lock()
+# Recent call latencies kept per pool for the percentiles in stats()
+LATENCY_SAMPLES = 500
+
+
+def _pooled_session(pool_size: int) -> requests.Session:
+    """Keep-alive session whose connection pool matches the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class DestinationPool:
+    """Bounded worker pool in front of one AI server endpoint."""
+
+    def __init__(self, source: str, url: str, on_result, workers: int = 2,
+                 max_pending: int = 64, timeout: float = 10.0):
+        """
+        source      : "ACTIVITY_SERVER" | "FACE_SERVER" (passed to on_result)
+        url         : full endpoint URL the frame is POSTed to
+        on_result   : callable(source, patient_id, result_dict) run on the worker
+        workers     : concurrent calls to this server
+        max_pending : queued patients; beyond this the oldest queued frame is dropped
+        """
+        self.source = source
+        self.url = url
+        self._on_result = on_result
+        self._workers = max(1, int(workers))
+        self._max_pending = max(1, int(max_pending))
+        self._timeout = timeout
+        self._session = _pooled_session(self._workers)
+
+        self._cond = threading.Condition()
+        self._pending: OrderedDict[str, bytes] = OrderedDict()   # patient_id -> latest frame
+        self._in_flight: set[str] = set()
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+
+        self._latency_ms = deque(maxlen=LATENCY_SAMPLES)
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._dropped = 0
+
+    def start(self) -> None:
+        for i in range(self._workers):
+            t = threading.Thread(target=self._worker, name=f"{self.source}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._session.close()
+
+    def submit(self, patient_id: str, jpeg_bytes: bytes) -> None:
+        """Queue a frame; replaces any frame still queued for the same patient."""
+        with self._cond:
+            self._submitted += 1
+            if patient_id in self._pending:
+                del self._pending[patient_id]
+                self._dropped += 1
+            elif len(self._pending) >= self._max_pending:
+                self._pending.popitem(last=False)
+                self._dropped += 1
+            self._pending[patient_id] = jpeg_bytes
+            self._cond.notify()
+
+    def _take(self):
+        """Oldest queued patient that has no call in flight, or None."""
+        for patient_id in self._pending:
+            if patient_id not in self._in_flight:
+                jpeg_bytes = self._pending.pop(patient_id)
+                self._in_flight.add(patient_id)
+                return patient_id, jpeg_bytes
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while not self._closed and (job := self._take()) is None:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            patient_id, jpeg_bytes = job
+
+            result = None
+            t0 = time.perf_counter()
+            try:
+                resp = self._session.post(
+                    self.url,
+                    files={"frame": ("frame.jpg", jpeg_bytes, "image/jpeg")},
+                    data={"patient_id": patient_id},
+                    timeout=self._timeout,
+                )
+                if resp.status_code == 200:
+                    result = resp.json()
+                else:
+                    print(f"[AIDispatcher] {self.source} returned {resp.status_code}")
+            except Exception as e:
+                print(f"[AIDispatcher] {self.source} error: {e}")
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+            with self._cond:
+                self._in_flight.discard(patient_id)
+                self._latency_ms.append(elapsed_ms)
+                if result is None:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                # A frame for this patient may have been waiting on the in-flight call
+                self._cond.notify()
 
-_last_face_check: dict[str, float] = {}
-_face_lock = threading.Lock()
+            if result is not None:
+                try:
+                    self._on_result(self.source, patient_id, result)
+                except Exception as e:
+                    print(f"[AIDispatcher] {self.source} result handling error: {e}")
 
+    def stats(self) -> dict:
+        with self._cond:
+            latencies = sorted(self._latency_ms)
+            out = {
+                "workers": self._workers,
+                "in_flight": len(self._in_flight),
+                "pending": len(self._pending),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "dropped": self._dropped,
+            }
+        if latencies:
+            out["latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2], 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+                "max": round(latencies[-1], 1),
+            }
+        else:
+            out["latency_ms"] = {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        return out
 
-def dispatch(patient_id: str, jpeg_bytes: bytes, django_port: int = 8000) -> None:
+
+class AIDispatcher:
+    """Rate-limits frames per patient and hands them to one pool per AI server."""
+
+    def __init__(self, activity_url: str, face_url: str, on_result,
+                 activity_workers: int = 4, face_workers: int = 2, max_pending: int = 64):
+        self.activity = DestinationPool("ACTIVITY_SERVER", activity_url, on_result,
+                                        workers=activity_workers, max_pending=max_pending, timeout=15)
+        self.face = DestinationPool("FACE_SERVER", face_url, on_result,
+                                    workers=face_workers, max_pending=max_pending, timeout=10)
+        self._lock = threading.Lock()
+        self._last_activity_check: dict[str, float] = {}
+        self._last_face_check: dict[str, float] = {}
+
+    def start(self) -> None:
+        self.activity.start()
+        self.face.start()
+
+    def close(self) -> None:
+        self.activity.close()
+        self.face.close()
+
+    def dispatch(self, patient_id: str, jpeg_bytes: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            activity_due = (now - self._last_activity_check.get(patient_id, 0)) >= ACTIVITY_RECOGNITION_INTERVAL
+            if activity_due:
+                self._last_activity_check[patient_id] = now
+            face_due = (now - self._last_face_check.get(patient_id, 0)) >= FACE_RECOGNITION_INTERVAL
+            if face_due:
+                self._last_face_check[patient_id] = now
+
+        if activity_due:
+            self.activity.submit(patient_id, jpeg_bytes)
+        if face_due:
+            self.face.submit(patient_id, jpeg_bytes)
+
+    def stats(self) -> dict:
+        return {"activity": self.activity.stats(), "face": self.face.stats()}
+
+
+# ── Process-wide dispatcher used by the push-frame endpoint ───────────────────
+
+_dispatcher: AIDispatcher | None = None
+_result_worker = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> AIDispatcher:
+    """Create the dispatcher, result worker and their threads on first use (after gunicorn forks)."""
+    global _dispatcher, _result_worker
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            # Imported here so the pools stay usable without the models (test_ai_dispatcher.py)
+            from apps.monitoring.services.result_worker import ResultWorker
+
+            _result_worker = ResultWorker(
+                workers=settings.AI_RESULT_WORKERS,
+                max_queue=settings.AI_RESULT_MAX_QUEUE,
+            )
+            _result_worker.start()
+            _dispatcher = AIDispatcher(
+                activity_url=settings.ACTIVITY_SERVER_URL.rstrip("/") + "/process-frame",
+                face_url=settings.AI_SERVER_URL.rstrip("/") + settings.AI_FACE_ENDPOINT,
+                on_result=_result_worker.submit,
+                activity_workers=settings.AI_DISPATCH_ACTIVITY_WORKERS,
+                face_workers=settings.AI_DISPATCH_FACE_WORKERS,
+                max_pending=settings.AI_DISPATCH_MAX_PENDING,
+            )
+            _dispatcher.start()
+        return _dispatcher
+
+
+def dispatch(patient_id: str, jpeg_bytes: bytes) -> None:
     """
-    Fire-and-forget dispatcher called by the push-frame endpoint.
+    Non-blocking dispatcher called by the push-frame endpoint.
 
-    Spawns background threads to:
-      1. Send frame to Activity Server (every ACTIVITY_RECOGNITION_INTERVAL seconds)
-      2. Send frame to Face AI Server  (every FACE_RECOGNITION_INTERVAL seconds)
+    Queues the frame for:
+      1. Activity Server (every ACTIVITY_RECOGNITION_INTERVAL seconds)
+      2. Face AI Server  (every FACE_RECOGNITION_INTERVAL seconds)
 
-    Each thread POSTs the AI result back to Django's ai-result endpoint.
+    Results go to the in-process ResultWorker.
     """
-    callback = _callback_url(django_port)
-    now = time.time()
+    get_dispatcher().dispatch(patient_id, jpeg_bytes)
 
-    with _activity_lock:
-        last = _last_activity_check.get(patient_id, 0)
-        activity_due = (now - last) >= ACTIVITY_RECOGNITION_INTERVAL
-        if activity_due:
-            _last_activity_check[patient_id] = now
-
-    if activity_due:
-        threading.Thread(
-            target=_call_activity_server,
-            args=(patient_id, jpeg_bytes, callback),
-            daemon=True,
-        ).start()
-
-    with _face_lock:
-        last = _last_face_check.get(patient_id, 0)
-        due = (now - last) >= FACE_RECOGNITION_INTERVAL
-        if due:
-            _last_face_check[patient_id] = now
-
-    if due:
-        threading.Thread(
-            target=_call_face_server,
-            args=(patient_id, jpeg_bytes, callback),
-            daemon=True,
-        ).start()
-
-
-def _call_activity_server(patient_id: str, jpeg_bytes: bytes, callback: str) -> None:
-    """POST frame to Activity Server, forward result to Django."""
-    url = settings.ACTIVITY_SERVER_URL.rstrip("/") + "/process-frame"
-    try:
-        resp = requests.post(
-            url,
-            files={"frame": ("frame.jpg", jpeg_bytes, "image/jpeg")},
-            data={"patient_id": patient_id},
-            timeout=15,
-        )
-        if resp.status_code == 200:
-            _post_result(callback, {
-                "source": "ACTIVITY_SERVER",
-                "patient_id": patient_id,
-                "result": resp.json(),
-            })
-    except Exception as e:
-        print(f"[AIDispatcher] Activity server error: {e}")
-
-
-def _call_face_server(patient_id: str, jpeg_bytes: bytes, callback: str) -> None:
-    """POST frame to Face AI Server, forward result to Django."""
-    url = settings.AI_SERVER_URL.rstrip("/") + settings.AI_FACE_ENDPOINT
-    try:
-        resp = requests.post(
-            url,
-            files={"frame": ("frame.jpg", jpeg_bytes, "image/jpeg")},
-            data={"patient_id": patient_id},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            _post_result(callback, {
-                "source": "FACE_SERVER",
-                "patient_id": patient_id,
-                "result": resp.json(),
-            })
-    except Exception as e:
-        print(f"[AIDispatcher] Face server error: {e}")
-
-
-def _post_result(callback: str, payload: dict) -> None:
-    """POST AI result back to Django's ai-result endpoint."""
-    try:
-        requests.post(callback, json=payload, timeout=10)
-    except Exception as e:
-        print(f"[AIDispatcher] Callback error: {e}")
+
+def stats() -> dict:
+    """Pool + result-worker counters for health endpoints (empty until the first frame)."""
+    if _dispatcher is None:
+        return {}
+    return {**_dispatcher.stats(), "results": _result_worker.stats()}
@@ -1,18 +1,75 @@
+import threading
 from datetime import datetime, timedelta
+
+from bson import ObjectId
 from django.conf import settings
 
-from apps.monitoring.models import Alert, Event, Patient
+from apps.monitoring.models import Alert, Event
+from apps.monitoring.services import recipient_cache
 from apps.accounts.services.caregiver_service import CaregiverService
 
 
+class CooldownIndex:
+    """
+    (patient_id, alert_type) -> time of the last alert, in memory.
+
+    A key still in cooldown here is answered without touching Mongo. When
+    it is not, the latest alert of that type is looked up through the
+    (patient, alert_type, -created_at) index, so alerts written by another
+    worker are honoured. The cooldown only starts when the alerts have
+    been inserted (record); until then the key is pending, which holds back
+    a concurrent event in this process, and release() frees it if the
+    insert fails.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: dict[tuple[str, str], datetime] = {}
+        self._pending: dict[tuple[str, str], datetime] = {}
+
+    def try_acquire(self, patient_id: str, alert_type: str, now: datetime) -> bool:
+        """True if the cooldown has passed; the key is then pending until record() / release()."""
+        key = (patient_id, alert_type)
+        cooldown = timedelta(seconds=settings.ALERT_COOLDOWN_SECONDS)
+        with self._lock:
+            for held in (self._last.get(key), self._pending.get(key)):
+                if held is not None and now - held < cooldown:
+                    return False
+            self._pending[key] = now
+
+        try:
+            latest = Alert._get_collection().find_one(
+                {"patient": ObjectId(patient_id), "alert_type": alert_type, "created_at": {"$gt": now - cooldown}},
+                {"created_at": 1},
+                sort=[("created_at", -1)],
+            )
+        except Exception:
+            self.release(patient_id, alert_type)
+            raise
+        if latest is not None:
+            self.record(patient_id, alert_type, latest["created_at"])
+            return False
+        return True
+
+    def record(self, patient_id: str, alert_type: str, created_at: datetime) -> None:
+        with self._lock:
+            key = (patient_id, alert_type)
+            self._pending.pop(key, None)
+            if key not in self._last or self._last[key] < created_at:
+                self._last[key] = created_at
+
+    def release(self, patient_id: str, alert_type: str) -> None:
+        with self._lock:
+            self._pending.pop((patient_id, alert_type), None)
+
+
+_cooldowns = CooldownIndex()
+
+
 class AlertService:
     @staticmethod
-    def _cooldown_passed(patient: Patient, alert_type: str) -> bool:
-        last = Alert.objects(patient=patient, alert_type=alert_type).order_by("-created_at").first()
-        if not last:
-            return True
-        cooldown = timedelta(seconds=settings.ALERT_COOLDOWN_SECONDS)
-        return (datetime.utcnow() - last.created_at) >= cooldown
+    def _recipients(patient_id: str) -> list:
+        return recipient_cache.get(patient_id, CaregiverService.get_alert_recipients)
 
     @staticmethod
     def should_alert_for_event(event: Event) -> bool:
@@ -48,18 +105,17 @@ class AlertService:
         else:
             return False
 
-        if not AlertService._cooldown_passed(event.patient, alert_type):
-            return False
-
-        recipients = CaregiverService.get_alert_recipients(str(event.patient.id))
-        if not recipients:
+        patient_id = str(event.patient.id)
+        if not AlertService._recipients(patient_id):
             return False
 
-        return True
+        # Checked last: a passing check holds the cooldown until create_alerts_for_event
+        return _cooldowns.try_acquire(patient_id, alert_type, datetime.utcnow())
 
     @staticmethod
     def create_alerts_for_event(event: Event) -> list[Alert]:
-        recipients = CaregiverService.get_alert_recipients(str(event.patient.id))
+        patient_id = str(event.patient.id)
+        recipients = AlertService._recipients(patient_id)
 
         if event.event_type == Event.TYPE_FACE:
             alert_type = "UNKNOWN_FACE"
@@ -84,17 +140,30 @@ class AlertService:
             alert_type = event.event_type
             message = f"Event: {event.event_type}"
 
-        alerts = []
-        for recipient in recipients:
-            alerts.append(
-                Alert(
-                    patient=event.patient,
-                    recipient=recipient,
-                    event=event,
-                    alert_type=alert_type,
-                    message=message,
-                    status=Alert.STATUS_NEW,
-                    created_at=datetime.utcnow(),
-                ).save()
+        now = datetime.utcnow()
+        alerts = [
+            Alert(
+                id=ObjectId(),
+                patient=event.patient,
+                recipient=recipient,
+                event=event,
+                alert_type=alert_type,
+                message=message,
+                status=Alert.STATUS_NEW,
+                created_at=now,
             )
+            for recipient in recipients
+        ]
+        if not alerts:
+            _cooldowns.release(patient_id, alert_type)
+            return alerts
+        try:
+            for alert in alerts:
+                alert.validate()
+            # One insert_many for all recipients instead of a save() each
+            Alert._get_collection().insert_many([a.to_mongo() for a in alerts])
+        except Exception:
+            _cooldowns.release(patient_id, alert_type)
+            raise
+        _cooldowns.record(patient_id, alert_type, now)
         return alerts
@@ -1,5 +1,6 @@
 from datetime import datetime
 from apps.monitoring.models import Event, User
+from apps.monitoring.services.write_buffer import buffered
 
 class EventService:
     @staticmethod
@@ -11,3 +12,14 @@ class EventService:
             payload=payload or {},
             created_at=datetime.utcnow(),
         ).save()
+
+    @staticmethod
+    def queue_event(patient: User, event_type: str, confidence: float, payload: dict) -> Event:
+        """Like create_event, but batched via WriteBuffer — only for events that never alert."""
+        return buffered(Event(
+            patient=patient,
+            event_type=event_type,
+            confidence=float(confidence),
+            payload=payload or {},
+            created_at=datetime.utcnow(),
+        ))
@@ -0,0 +1,172 @@
+"""
+FrameHub
+--------
+Publish/subscribe fan-out of pushed frames to live-stream viewers.
+
+StreamManager.push_frame() publishes every frame here. Each patient has a
+channel holding only the latest frame and a sequence number:
+  - publish() bumps the sequence and wakes every waiting viewer — sync
+    viewers through a Condition, async viewers by setting their
+    asyncio.Event on their own event loop
+  - a viewer remembers the last sequence it sent and only ever receives
+    the newest frame, so a slow viewer skips frames instead of queueing
+  - when nothing new arrives for keepalive seconds the viewer re-sends
+    the current frame (or the placeholder); under WSGI that write is how
+    a disconnected client is noticed
+  - subscriptions are removed in a finally block when the response is
+    closed (WSGI) or the task is cancelled on disconnect (ASGI)
+
+subscribe() is the blocking generator for WSGI workers; subscribe_async()
+is the async generator used under ASGI, where one event loop serves any
+number of viewers.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class _Channel:
+    __slots__ = ("frame", "seq", "ts", "subscribers", "async_waiters")
+
+    def __init__(self):
+        self.frame: bytes | None = None
+        self.seq = 0
+        self.ts = 0.0
+        self.subscribers = 0
+        self.async_waiters: set[tuple] = set()   # (loop, asyncio.Event)
+
+
+class FrameHub:
+
+    def __init__(self, stale_seconds: float = 30.0, keepalive: float = 5.0):
+        self._stale = stale_seconds
+        self._keepalive = keepalive
+        self._cond = threading.Condition()
+        self._channels: dict[str, _Channel] = {}
+
+        self._published = 0
+        self._delivered = 0
+        self._skipped = 0
+
+    def _channel(self, patient_id: str) -> _Channel:
+        ch = self._channels.get(patient_id)
+        if ch is None:
+            ch = self._channels[patient_id] = _Channel()
+        return ch
+
+    def publish(self, patient_id: str, jpeg_bytes: bytes) -> None:
+        with self._cond:
+            ch = self._channel(patient_id)
+            ch.frame = jpeg_bytes
+            ch.seq += 1
+            ch.ts = time.time()
+            self._published += 1
+            waiters = list(ch.async_waiters)
+            if ch.subscribers:
+                self._cond.notify_all()
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass    # loop already closed; its subscriber is being torn down
+
+    def _current(self, ch: _Channel) -> bytes | None:
+        if ch.frame is None or time.time() - ch.ts > self._stale:
+            return None
+        return ch.frame
+
+    def _take(self, ch: _Channel, last_seq: int) -> tuple[int, bytes | None]:
+        """Newest frame after last_seq (counts skipped frames); caller holds the lock."""
+        if last_seq >= 0:
+            self._skipped += max(0, ch.seq - last_seq - 1)
+        self._delivered += 1
+        return ch.seq, self._current(ch)
+
+    # ── WSGI ──────────────────────────────────────────────────────────────────
+
+    def subscribe(self, patient_id: str, min_interval: float = 0.0):
+        """
+        Blocking generator of JPEG frames for one viewer: the current frame
+        first, then each newer frame, or a repeat every keepalive seconds.
+        Yields None when there is no fresh frame.
+        """
+        with self._cond:
+            ch = self._channel(patient_id)
+            ch.subscribers += 1
+        try:
+            last_seq = -1
+            while True:
+                with self._cond:
+                    if ch.seq == last_seq:
+                        self._cond.wait_for(lambda: ch.seq != last_seq, timeout=self._keepalive)
+                    if ch.seq != last_seq:
+                        last_seq, frame = self._take(ch, last_seq)
+                    else:
+                        frame = self._current(ch)
+                sent_at = time.monotonic()
+                yield frame
+                if min_interval:
+                    remaining = min_interval - (time.monotonic() - sent_at)
+                    if remaining > 0:
+                        time.sleep(remaining)
+        finally:
+            with self._cond:
+                ch.subscribers -= 1
+
+    # ── ASGI ──────────────────────────────────────────────────────────────────
+
+    async def subscribe_async(self, patient_id: str, min_interval: float = 0.0):
+        """Async counterpart of subscribe(); never blocks the event loop."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            ch = self._channel(patient_id)
+            ch.subscribers += 1
+            ch.async_waiters.add(waiter)
+        event = waiter[1]
+        try:
+            last_seq = -1
+            while True:
+                # Clear before checking, so a publish in between still wakes us
+                event.clear()
+                with self._cond:
+                    fresh = ch.seq != last_seq
+                    if fresh:
+                        last_seq, frame = self._take(ch, last_seq)
+                if not fresh:
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout=self._keepalive)
+                        continue
+                    except asyncio.TimeoutError:
+                        with self._cond:
+                            frame = self._current(ch)
+                sent_at = time.monotonic()
+                yield frame
+                if min_interval:
+                    remaining = min_interval - (time.monotonic() - sent_at)
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+        finally:
+            with self._cond:
+                ch.subscribers -= 1
+                ch.async_waiters.discard(waiter)
+
+    def prune(self) -> list[str]:
+        """Drop channels (and their frames) nobody is watching. Returns watched patient ids."""
+        with self._cond:
+            for pid in [pid for pid, ch in self._channels.items() if not ch.subscribers]:
+                del self._channels[pid]
+            return list(self._channels)
+
+    def subscribed_patients(self) -> list[str]:
+        with self._cond:
+            return [pid for pid, ch in self._channels.items() if ch.subscribers]
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "viewers": {pid: ch.subscribers for pid, ch in self._channels.items() if ch.subscribers},
+                "published": self._published,
+                "delivered": self._delivered,
+                "skipped": self._skipped,
+            }
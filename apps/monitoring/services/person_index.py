@@ -0,0 +1,101 @@
+"""
+Tracked-person embedding index
+------------------------------
+patient_id -> EmbeddingIndex over that patient's recently seen
+IDENTIFIED / UNKNOWN PersonTracking records (key = person id), so
+find_matching_person is one matrix query instead of a loop over Mongo
+documents.
+
+An entry is rebuilt from Mongo (ids, embeddings and last_seen only) once
+it is PERSON_INDEX_REFRESH_SECONDS old. In between, PersonTrackingService
+keeps it current: put() when recognition settles a person, touch() when
+one is seen again, discard() when records are cleaned up. The TTL only
+bounds staleness across worker processes.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from ai_face_server.embedding_index import EmbeddingIndex
+
+_lock = threading.Lock()
+_entries: dict[str, tuple[float, EmbeddingIndex, dict]] = {}   # patient_id -> (expires_at, index, last_seen by key)
+_hits = 0
+_misses = 0
+
+
+def _entry(patient_id: str, loader):
+    """(index, last_seen) for patient_id; loader(patient_id) yields (key, embedding, last_seen)."""
+    global _hits, _misses
+    now = time.time()
+    with _lock:
+        entry = _entries.get(patient_id)
+        if entry is not None and entry[0] > now:
+            _hits += 1
+            return entry[1], entry[2]
+        _misses += 1
+
+    index = EmbeddingIndex()
+    last_seen = {}
+    keys, vectors = [], []
+    for key, embedding, seen in loader(patient_id):
+        if embedding and len(embedding) == index.dim:
+            keys.append(key)
+            vectors.append(embedding)
+            last_seen[key] = seen
+    if keys:
+        index.add_many(keys, vectors)
+    with _lock:
+        _entries[patient_id] = (now + settings.PERSON_INDEX_REFRESH_SECONDS, index, last_seen)
+    return index, last_seen
+
+
+def candidates(patient_id: str, embedding, loader, threshold: float, since, k: int = 5) -> list:
+    """Keys of up to k indexed persons within threshold of embedding and seen since `since`, nearest first."""
+    index, last_seen = _entry(patient_id, loader)
+    if not embedding or len(embedding) != index.dim or not len(index):
+        return []
+    dists, keys, _ = index.query(embedding, k=k)
+    return [
+        key for dist, key in zip(dists[0], keys[0])
+        if dist < threshold and last_seen.get(key) is not None and last_seen[key] >= since
+    ]
+
+
+def put(patient_id: str, key: str, embedding, last_seen) -> None:
+    """Add or replace one person in a cached entry (no-op when none is cached; the next load sees it)."""
+    with _lock:
+        entry = _entries.get(patient_id)
+    if entry is None or not embedding or len(embedding) != entry[1].dim:
+        return
+    entry[1].add(key, embedding)
+    entry[2][key] = last_seen
+
+
+def touch(patient_id: str, key: str, last_seen) -> None:
+    with _lock:
+        entry = _entries.get(patient_id)
+        if entry is not None and key in entry[2]:
+            entry[2][key] = last_seen
+
+
+def discard(patient_id: str, keys) -> None:
+    with _lock:
+        entry = _entries.get(patient_id)
+    if entry is None:
+        return
+    for key in keys:
+        entry[1].remove(key)
+        entry[2].pop(key, None)
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "patients": len(_entries),
+            "persons": sum(len(e[1]) for e in _entries.values()),
+            "hits": _hits,
+            "misses": _misses,
+        }
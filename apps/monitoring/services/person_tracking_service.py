@@ -4,8 +4,11 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Tuple, Dict
 
 from apps.monitoring.models import PersonTracking, Event, User
+from apps.monitoring.services import person_index
 from apps.monitoring.services.ai_client import analyze_face, AIClientError
 
+ACTIVE_STATUSES = [PersonTracking.STATUS_IDENTIFIED, PersonTracking.STATUS_UNKNOWN]
+
 
 class PersonTrackingService:
     
@@ -27,27 +30,27 @@ class PersonTrackingService:
         """Find existing person tracking record by face embedding"""
         # Look for recently seen persons (last 5 minutes)
         recent_time = datetime.utcnow() - timedelta(minutes=5)
-        
-        active_persons = PersonTracking.objects(
-            patient=patient,
-            status__in=[PersonTracking.STATUS_IDENTIFIED, PersonTracking.STATUS_UNKNOWN],
-            last_seen__gte=recent_time,
-            face_embedding__ne=[]
-        )
-        
-        best_match = None
-        best_distance = float('inf')
-        
-        for person in active_persons:
-            if person.face_embedding:
-                distance = PersonTrackingService.calculate_embedding_distance(
-                    face_embedding, person.face_embedding
-                )
-                if distance < threshold and distance < best_distance:
-                    best_match = person
-                    best_distance = distance
-        
-        return best_match
+
+        def load_active_persons(patient_id):
+            docs = PersonTracking.objects(
+                patient=patient_id,
+                status__in=ACTIVE_STATUSES,
+                last_seen__gte=recent_time,
+                face_embedding__ne=[]
+            ).only("id", "face_embedding", "last_seen").as_pymongo()
+            return ((str(d["_id"]), d.get("face_embedding"), d.get("last_seen")) for d in docs)
+
+        patient_id = str(patient.id)
+        for person_id in person_index.candidates(
+            patient_id, face_embedding, load_active_persons, threshold, recent_time
+        ):
+            person = PersonTracking.objects(id=person_id).first()
+            if person is not None and person.status in ACTIVE_STATUSES and person.last_seen >= recent_time:
+                return person
+            # Deleted or re-processed by another worker since the index was built
+            person_index.discard(patient_id, [person_id])
+
+        return None
     
     @staticmethod
     def create_new_person(patient: User, face_embedding: List[float] = None,
@@ -74,6 +77,12 @@ class PersonTrackingService:
         if bbox:
             person.last_bbox = bbox
         person.save()
+        person_index.touch(str(person.patient.id), str(person.id), person.last_seen)
+
+    @staticmethod
+    def _index_person(person: PersonTracking) -> None:
+        """Make a person whose recognition has settled matchable by find_matching_person"""
+        person_index.put(str(person.patient.id), str(person.id), person.face_embedding, person.last_seen)
     
     @staticmethod
     def process_face_recognition(person: PersonTracking, frame_file) -> Dict:
@@ -100,6 +109,7 @@ class PersonTrackingService:
                 person.confidence = confidence
             
             person.save()
+            PersonTrackingService._index_person(person)
             
             return {
                 "success": True,
@@ -112,6 +122,7 @@ class PersonTrackingService:
         except AIClientError as e:
             person.status = PersonTracking.STATUS_UNKNOWN
             person.save()
+            PersonTrackingService._index_person(person)
             return {
                 "success": False,
                 "error": str(e),
@@ -122,6 +133,7 @@ class PersonTrackingService:
         except Exception as e:
             person.status = PersonTracking.STATUS_UNKNOWN
             person.save()
+            PersonTrackingService._index_person(person)
             return {
                 "success": False,
                 "error": f"Processing error: {str(e)}",
@@ -160,6 +172,7 @@ class PersonTrackingService:
             patient=patient,
             last_seen__lt=cutoff_time
         )
-        count = old_persons.count()
+        old_ids = [str(pid) for pid in old_persons.scalar("id")]
         old_persons.delete()
-        return count
+        person_index.discard(str(patient.id), old_ids)
+        return len(old_ids)
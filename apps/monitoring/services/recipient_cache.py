@@ -0,0 +1,104 @@
+"""
+Alert recipient cache
+---------------------
+patient_id -> list of alert recipients (active caregiver + linked
+relatives), kept for ALERT_RECIPIENT_CACHE_SECONDS.
+
+The account services call invalidate(patient_id) whenever a caregiver
+contract or relative link for that patient changes, and invalidate_all()
+when a user is deleted. Both also bump a shared generation counter in
+MongoDB (cache_generations); every worker checks it at most every
+ALERT_RECIPIENT_SYNC_SECONDS and drops its entries when it moved, so an
+invalidation in one worker reaches the others within seconds.
+
+No imports from apps.accounts here — caregiver_service / relative_service
+import this module, and AlertService passes the loader in.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from mongoengine.connection import get_db
+
+_SHARED_ID = "alert_recipients"
+
+_lock = threading.Lock()
+_entries: dict[str, tuple[float, list]] = {}    # patient_id -> (expires_at, recipients)
+_generation = 0     # bumped by every invalidation; a load that raced one is not cached
+_shared_generation = None   # last seen value of the cross-worker counter
+_synced_at = 0.0
+_hits = 0
+_misses = 0
+
+
+def _shared():
+    return get_db()["cache_generations"]
+
+
+def _sync(now: float) -> None:
+    """Drop every entry if another worker invalidated since the last check."""
+    global _generation, _shared_generation, _synced_at
+    with _lock:
+        if now - _synced_at < settings.ALERT_RECIPIENT_SYNC_SECONDS:
+            return
+        _synced_at = now
+    try:
+        doc = _shared().find_one({"_id": _SHARED_ID}, {"generation": 1})
+    except Exception as e:
+        print(f"[recipient_cache] generation check failed: {e}")
+        return
+    shared = doc["generation"] if doc else 0
+    with _lock:
+        if _shared_generation is not None and shared != _shared_generation:
+            _generation += 1
+            _entries.clear()
+        _shared_generation = shared
+
+
+def _bump_shared() -> None:
+    try:
+        _shared().update_one({"_id": _SHARED_ID}, {"$inc": {"generation": 1}}, upsert=True)
+    except Exception as e:
+        print(f"[recipient_cache] generation bump failed: {e}")
+
+
+def get(patient_id: str, loader) -> list:
+    """Cached recipients for `patient_id`; calls loader(patient_id) on a miss."""
+    global _hits, _misses
+    now = time.time()
+    _sync(now)
+    with _lock:
+        entry = _entries.get(patient_id)
+        if entry is not None and entry[0] > now:
+            _hits += 1
+            return entry[1]
+        _misses += 1
+        generation = _generation
+
+    recipients = list(loader(patient_id))
+    with _lock:
+        if generation == _generation:
+            _entries[patient_id] = (now + settings.ALERT_RECIPIENT_CACHE_SECONDS, recipients)
+    return recipients
+
+
+def invalidate(patient_id) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.pop(str(patient_id), None)
+    _bump_shared()
+
+
+def invalidate_all() -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+    _bump_shared()
+
+
+def stats() -> dict:
+    with _lock:
+        return {"entries": len(_entries), "hits": _hits, "misses": _misses}
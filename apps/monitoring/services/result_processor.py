@@ -6,6 +6,9 @@ Interprets the JSON result returned by an AI server and decides:
   - Is it a normal activity log? → create ActivityLog
 
 Keeps AlertService as the single authority on alert rules.
+
+Alert-capable events are saved synchronously; routine ActivityLogs and
+low-danger object events go through the WriteBuffer (batched inserts).
 """
 
 from datetime import datetime
@@ -14,6 +17,7 @@ from apps.monitoring.models import Alert, ActivityLog
 from apps.monitoring.models.events import Event
 from apps.monitoring.services.alert_service import AlertService
 from apps.monitoring.services.event_service import EventService
+from apps.monitoring.services.write_buffer import buffered
 from apps.accounts.services.patient_service import PatientService
 from apps.accounts.services.base import NotFoundError
 
@@ -83,14 +87,14 @@ class ResultProcessor:
 
         # ── Normal activity log ────────────────────────────────────────
         elif activity in LOG_ACTIVITIES:
-            log = ActivityLog(
+            log = buffered(ActivityLog(
                 patient=patient,
                 activity=activity,
                 confidence=confidence,
                 source="ACTIVITY_SERVER",
                 payload=result,
                 created_at=datetime.utcnow(),
-            ).save()
+            ))
             summary["logs"].append(str(log.id))
 
         # ── Dangerous objects ──────────────────────────────────────────
@@ -99,19 +103,22 @@ class ResultProcessor:
             label = obj.get("label", "unknown")
             obj_conf = float(obj.get("confidence", 0.0))
 
-            event = EventService.create_event(
+            is_dangerous = danger_level in ALERT_OBJECTS
+            # Only dangerous objects can alert, so only they need a synchronous save
+            create = EventService.create_event if is_dangerous else EventService.queue_event
+            event = create(
                 patient=patient,
                 event_type=Event.TYPE_OBJECT,
                 confidence=obj_conf,
                 payload={
                     "object_class": label,
                     "danger_level": danger_level,
-                    "is_dangerous": danger_level in ALERT_OBJECTS,
+                    "is_dangerous": is_dangerous,
                     "box": obj.get("box", {}),
                 },
             )
             summary["events"].append(str(event.id))
-            if AlertService.should_alert_for_event(event):
+            if is_dangerous and AlertService.should_alert_for_event(event):
                 alerts = AlertService.create_alerts_for_event(event)
                 summary["alerts"] += [str(a.id) for a in alerts]
 
@@ -139,14 +146,14 @@ class ResultProcessor:
                 alerts = AlertService.create_alerts_for_event(event)
                 summary["alerts"] += [str(a.id) for a in alerts]
         else:
-            log = ActivityLog(
+            log = buffered(ActivityLog(
                 patient=patient,
                 activity="UNKNOWN_FACE" if not known else "FACE_RECOGNIZED",
                 confidence=confidence,
                 source="FACE_SERVER",
                 payload=payload,
                 created_at=datetime.utcnow(),
-            ).save()
+            ))
             summary["logs"].append(str(log.id))
 
         return summary
@@ -0,0 +1,103 @@
+"""
+ResultWorker
+------------
+In-process delivery of AI results produced by AIDispatcher.
+
+Dispatcher pool workers put (source, patient_id, result) on a queue; a
+small number of result threads drain it and do exactly what the
+/api/stream/ai-result endpoint does — cache the result in StreamManager
+for the Flutter overlay and hand it to ResultProcessor — without the
+extra HTTP request + DRF parse per result.
+
+The ai-result endpoint stays in place for AI servers running outside
+this process.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+from apps.monitoring.services.stream_manager import StreamManager
+from apps.monitoring.services.result_processor import ResultProcessor
+
+# Recent processing times kept for the percentiles in stats()
+LATENCY_SAMPLES = 500
+
+
+class ResultWorker:
+
+    def __init__(self, workers: int = 1, max_queue: int = 256):
+        """
+        workers   : threads draining the queue (each does MongoDB writes)
+        max_queue : queue bound; when full, submit() blocks the dispatcher
+                    pool worker, which in turn makes the pools drop frames
+        """
+        self._workers = max(1, int(workers))
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._threads: list[threading.Thread] = []
+
+        self._stats_lock = threading.Lock()
+        self._latency_ms = deque(maxlen=LATENCY_SAMPLES)
+        self._processed = 0
+        self._errors = 0
+
+    def start(self) -> None:
+        for i in range(self._workers):
+            t = threading.Thread(target=self._loop, name=f"ai-result-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def submit(self, source: str, patient_id: str, result: dict) -> None:
+        """Called by AIDispatcher pool workers (on_result)."""
+        self._queue.put((source, patient_id, result))
+
+    def _loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            source, patient_id, result = item
+
+            t0 = time.perf_counter()
+            try:
+                # Cache the latest result so Flutter can poll for live AR overlay
+                StreamManager.set_detection(patient_id, source, result)
+                summary = ResultProcessor.process(source, patient_id, result)
+                ok = "error" not in summary
+                if not ok:
+                    print(f"[ResultWorker] {source} result for {patient_id}: {summary['error']}")
+            except Exception as e:
+                ok = False
+                print(f"[ResultWorker] {source} result for {patient_id} failed: {e}")
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+            with self._stats_lock:
+                self._latency_ms.append(elapsed_ms)
+                if ok:
+                    self._processed += 1
+                else:
+                    self._errors += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            latencies = sorted(self._latency_ms)
+            out = {
+                "workers": self._workers,
+                "queue_depth": self._queue.qsize(),
+                "processed": self._processed,
+                "errors": self._errors,
+            }
+        if latencies:
+            out["latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2], 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+                "max": round(latencies[-1], 1),
+            }
+        else:
+            out["latency_ms"] = {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        return out
@@ -0,0 +1,260 @@
+"""
+SensorStore
+-----------
+Time-bucketed sensor storage: one SensorBucket document per patient per
+UTC minute instead of one SensorReading per frame.
+
+Ingestion: append() collects samples in memory per (patient, minute);
+a flusher thread writes them every flush_interval seconds with one
+bulk_write of upserts that $push the samples onto the bucket's arrays
+and $inc / $min / $max its per-channel summary. Samples are visible to
+query() after the next flush.
+
+Query: query(patient_id, start, end, resolution) returns points at
+  "raw"            every stored sample
+  "10s"            bins computed from the bucket arrays
+  "1m" "5m" "15m" "1h"  bins merged from the bucket summaries only
+                   (the sample arrays are not even fetched)
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from django.conf import settings
+from pymongo import UpdateOne
+
+from apps.monitoring.models import SensorBucket
+
+CHANNELS = SensorBucket.CHANNELS
+BUCKET_SECONDS = 60
+_EPOCH = datetime(1970, 1, 1)
+RESOLUTIONS = {"raw": 0, "10s": 10, "1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+
+
+def _bucket_start(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+class SensorStore:
+
+    def __init__(self, flush_interval: float = 5.0):
+        self._flush_interval = max(0.5, float(flush_interval))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[tuple, dict] = {}    # (patient ObjectId, bucket_start) -> samples
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._appended = 0
+        self._flushes = 0
+        self._upserts = 0
+        self._errors = 0
+        self._last_flush_ms = 0.0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="sensor-store", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def append(self, patient_id: str, values: dict, ts: datetime | None = None) -> bool:
+        """
+        Queue one sample. values: {channel: float or None}. Returns False when
+        patient_id is not an ObjectId or no channel has a value.
+        """
+        if not ObjectId.is_valid(patient_id):
+            return False
+        sample = {ch: (float(values[ch]) if values.get(ch) is not None else None) for ch in CHANNELS}
+        if all(v is None for v in sample.values()):
+            return False
+
+        ts = ts or datetime.utcnow()
+        start = _bucket_start(ts)
+        key = (ObjectId(patient_id), start)
+        with self._lock:
+            acc = self._pending.get(key)
+            if acc is None:
+                acc = self._pending[key] = {"t": [], **{ch: [] for ch in CHANNELS}}
+            acc["t"].append(round((ts - start).total_seconds(), 3))
+            for ch in CHANNELS:
+                acc[ch].append(sample[ch])
+            self._appended += 1
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    @staticmethod
+    def _upsert(key: tuple, acc: dict) -> UpdateOne:
+        patient, start = key
+        inc = {"count": len(acc["t"])}
+        mins, maxs = {}, {}
+        for ch in CHANNELS:
+            vals = [v for v in acc[ch] if v is not None]
+            if vals:
+                inc[f"stats.{ch}.n"] = len(vals)
+                inc[f"stats.{ch}.sum"] = sum(vals)
+                mins[f"stats.{ch}.min"] = min(vals)
+                maxs[f"stats.{ch}.max"] = max(vals)
+
+        update = {
+            "$push": {field: {"$each": acc[field]} for field in ("t", *CHANNELS)},
+            "$inc": inc,
+        }
+        if mins:
+            update["$min"] = mins
+            update["$max"] = maxs
+        return UpdateOne({"patient": patient, "bucket_start": start}, update, upsert=True)
+
+    def flush(self) -> int:
+        """Upsert every pending (patient, minute) in one bulk_write. Returns buckets written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            t0 = time.perf_counter()
+            ops = [self._upsert(key, acc) for key, acc in pending.items()]
+            try:
+                SensorBucket._get_collection().bulk_write(ops, ordered=False)
+                errors = 0
+            except Exception as e:
+                errors = len(ops)
+                print(f"[SensorStore] bulk_write of {len(ops)} buckets failed: {e}")
+
+            with self._lock:
+                self._flushes += 1
+                self._upserts += len(ops) - errors
+                self._errors += errors
+                self._last_flush_ms = (time.perf_counter() - t0) * 1000.0
+            return len(ops) - errors
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "flush_interval_seconds": self._flush_interval,
+                "pending_buckets": len(self._pending),
+                "samples_appended": self._appended,
+                "flushes": self._flushes,
+                "bucket_upserts": self._upserts,
+                "errors": self._errors,
+                "last_flush_ms": round(self._last_flush_ms, 1),
+            }
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+
+def _summary(n: int, total: float, lo: float, hi: float) -> dict | None:
+    if not n:
+        return None
+    return {"mean": round(total / n, 4), "min": lo, "max": hi, "n": n}
+
+
+def _bin_start(ts: datetime, seconds: int) -> datetime:
+    epoch = int((ts - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=epoch - epoch % seconds)
+
+
+def query(patient_id: str, start: datetime, end: datetime, resolution: str = "1m") -> list[dict]:
+    """
+    Sensor points for [start, end) (naive UTC datetimes) at `resolution`
+    (one of RESOLUTIONS). Raw points are {"timestamp", <channel>: value};
+    binned points are {"timestamp", "count", <channel>: {"mean", "min", "max", "n"} or None}.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {list(RESOLUTIONS)}")
+    seconds = RESOLUTIONS[resolution]
+
+    spec = {"patient": ObjectId(patient_id), "bucket_start": {"$gte": _bucket_start(start), "$lt": end}}
+    if seconds >= BUCKET_SECONDS:
+        projection = {"bucket_start": 1, "count": 1, "stats": 1}
+    else:
+        projection = {"bucket_start": 1, "t": 1, **{ch: 1 for ch in CHANNELS}}
+    buckets = SensorBucket._get_collection().find(spec, projection).sort("bucket_start", 1)
+
+    # Raw samples
+    if seconds == 0:
+        points = []
+        for b in buckets:
+            for i, offset in enumerate(b["t"]):
+                ts = b["bucket_start"] + timedelta(seconds=offset)
+                if start <= ts < end:
+                    points.append({"timestamp": ts.isoformat(), **{ch: b[ch][i] for ch in CHANNELS}})
+        return points
+
+    bins: dict[datetime, dict] = {}
+
+    def _bin(ts):
+        return bins.setdefault(_bin_start(ts, seconds), {
+            "count": 0, **{ch: [0, 0.0, float("inf"), float("-inf")] for ch in CHANNELS},
+        })
+
+    if seconds >= BUCKET_SECONDS:
+        # Whole buckets: merge the stored per-minute summaries
+        for b in buckets:
+            acc = _bin(b["bucket_start"])
+            acc["count"] += b.get("count", 0)
+            for ch, s in b.get("stats", {}).items():
+                if ch in CHANNELS:
+                    a = acc[ch]
+                    a[0] += s["n"]
+                    a[1] += s["sum"]
+                    a[2] = min(a[2], s["min"])
+                    a[3] = max(a[3], s["max"])
+    else:
+        # Sub-minute: bin the individual samples
+        for b in buckets:
+            for i, offset in enumerate(b["t"]):
+                ts = b["bucket_start"] + timedelta(seconds=offset)
+                if not start <= ts < end:
+                    continue
+                acc = _bin(ts)
+                acc["count"] += 1
+                for ch in CHANNELS:
+                    v = b[ch][i]
+                    if v is not None:
+                        a = acc[ch]
+                        a[0] += 1
+                        a[1] += v
+                        a[2] = min(a[2], v)
+                        a[3] = max(a[3], v)
+
+    return [
+        {"timestamp": ts.isoformat(), "count": acc["count"],
+         **{ch: _summary(*acc[ch]) for ch in CHANNELS}}
+        for ts, acc in sorted(bins.items())
+    ]
+
+
+# ── Process-wide store used by the push-frame endpoint ────────────────────────
+
+_store: SensorStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_sensor_store() -> SensorStore:
+    """Create and start the process-wide store on first use (after gunicorn forks)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SensorStore(flush_interval=settings.SENSOR_FLUSH_SECONDS)
+            _store.start()
+            atexit.register(_store.close)
+        return _store
+
+
+def append(patient_id: str, values: dict) -> bool:
+    return get_sensor_store().append(patient_id, values)
+
+
+def stats() -> dict:
+    return _store.stats() if _store is not None else {}
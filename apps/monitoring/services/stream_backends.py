@@ -0,0 +1,432 @@
+"""
+StreamManager storage backends
+------------------------------
+Where the latest frame and AI detections per patient live.
+
+  MemoryBackend        module-local dicts with a byte budget (default; one
+                       worker process)
+  SharedMemoryBackend  one shared-memory segment with a fixed-size slot per
+                       patient, visible to every gunicorn worker on the host
+
+Both keep a sequence number per patient for frames and for detections and
+report timestamps, so StreamManager can apply staleness and build ETags.
+Select with STREAM_BACKEND = "memory" | "shm".
+
+Backend interface
+  put_frame(pid, jpeg) -> seq          get_frame(pid) -> (seq, ts, jpeg|None)
+  frame_seq(pid) -> seq                frame_times(since) -> {pid: ts}
+  set_detection(pid, source, result) -> seq
+  get_detections(pid, stale_seconds) -> (seq, {source: result}, next_expiry)
+      drops results older than stale_seconds (bumping seq) and returns the
+      seconds until the next one goes stale
+  prune(frame_stale, detection_stale) -> patients dropped (janitor)
+  token                                changes when the storage is recreated
+  shared                               True if other processes write too
+"""
+
+import fcntl
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+
+def _expire(dets: dict, stale_seconds: float, now: float) -> tuple[bool, float]:
+    """Drop stale entries of {source: {result, timestamp}} in place -> (changed, next_expiry)."""
+    stale = [s for s, e in dets.items() if now - e["timestamp"] > stale_seconds]
+    for source in stale:
+        del dets[source]
+    if not dets:
+        return bool(stale), stale_seconds
+    oldest = min(e["timestamp"] for e in dets.values())
+    return bool(stale), max(0.01, oldest + stale_seconds - now)
+
+
+class MemoryBackend:
+    """
+    Process-local dicts, bounded by max_bytes: when frames + detections
+    exceed it, whole patients are evicted least recently written first.
+    prune() (run by StreamManager's janitor) drops stale frames and
+    results and forgets patients with nothing left.
+
+    Sequence numbers come from one backend-wide counter, so a patient that
+    is evicted and comes back never reuses an ETag.
+    """
+
+    shared = False
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self._max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self._frames: dict[str, tuple[int, float, bytes]] = {}   # pid -> (seq, ts, jpeg)
+        self._detections: dict[str, dict] = {}                   # pid -> {source: {result, timestamp, bytes}}
+        self._detection_seq: dict[str, int] = {}
+        self._lru: OrderedDict[str, float] = OrderedDict()       # pid -> last write, oldest first
+        self._seq = 0
+        self._bytes = 0
+        self._evictions = 0
+        self._expired = 0
+        self.token = f"{os.getpid():x}{int(time.time()):x}"
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _touch(self, patient_id: str, now: float) -> None:
+        self._lru[patient_id] = now
+        self._lru.move_to_end(patient_id)
+
+    def _drop_patient(self, patient_id: str) -> None:
+        frame = self._frames.pop(patient_id, None)
+        if frame is not None:
+            self._bytes -= len(frame[2])
+        for entry in self._detections.pop(patient_id, {}).values():
+            self._bytes -= entry["bytes"]
+        self._detection_seq.pop(patient_id, None)
+        self._lru.pop(patient_id, None)
+
+    def _enforce_budget(self, keep: str) -> None:
+        while self._bytes > self._max_bytes and len(self._lru) > 1:
+            oldest = next(iter(self._lru))
+            if oldest == keep:
+                self._lru.move_to_end(keep)
+                continue
+            self._drop_patient(oldest)
+            self._evictions += 1
+
+    def put_frame(self, patient_id: str, jpeg_bytes: bytes) -> int:
+        now = time.time()
+        with self._lock:
+            old = self._frames.get(patient_id)
+            if old is not None:
+                self._bytes -= len(old[2])
+            seq = self._next_seq()
+            self._frames[patient_id] = (seq, now, jpeg_bytes)
+            self._bytes += len(jpeg_bytes)
+            self._touch(patient_id, now)
+            self._enforce_budget(keep=patient_id)
+            return seq
+
+    def get_frame(self, patient_id: str) -> tuple[int, float, bytes | None]:
+        with self._lock:
+            return self._frames.get(patient_id, (0, 0.0, None))
+
+    def frame_seq(self, patient_id: str) -> int:
+        with self._lock:
+            return self._frames.get(patient_id, (0,))[0]
+
+    def frame_times(self, since: float = 0.0) -> dict[str, float]:
+        """{pid: frame ts} for patients written at or after `since` (newest first)."""
+        with self._lock:
+            out = {}
+            for pid in reversed(self._lru):
+                if self._lru[pid] < since:
+                    break
+                frame = self._frames.get(pid)
+                if frame is not None and frame[1] >= since:
+                    out[pid] = frame[1]
+            return out
+
+    def set_detection(self, patient_id: str, source: str, result: dict) -> int:
+        now = time.time()
+        size = len(json.dumps(result, default=str))
+        with self._lock:
+            dets = self._detections.setdefault(patient_id, {})
+            old = dets.get(source)
+            if old is not None:
+                self._bytes -= old["bytes"]
+            dets[source] = {"result": result, "timestamp": now, "bytes": size}
+            self._bytes += size
+            seq = self._detection_seq[patient_id] = self._next_seq()
+            self._touch(patient_id, now)
+            self._enforce_budget(keep=patient_id)
+            return seq
+
+    def get_detections(self, patient_id: str, stale_seconds: float) -> tuple[int, dict, float]:
+        with self._lock:
+            dets = self._detections.get(patient_id, {})
+            before = sum(e["bytes"] for e in dets.values())
+            changed, next_expiry = _expire(dets, stale_seconds, time.time())
+            if changed:
+                self._bytes -= before - sum(e["bytes"] for e in dets.values())
+                self._detection_seq[patient_id] = self._next_seq()
+            seq = self._detection_seq.get(patient_id, 0)
+            return seq, {s: e["result"] for s, e in dets.items()}, next_expiry
+
+    def prune(self, frame_stale_seconds: float, detection_stale_seconds: float) -> int:
+        """Drop patients whose frame and results are all stale. Returns patients dropped."""
+        now = time.time()
+        with self._lock:
+            idle = [
+                pid for pid, last in self._lru.items()
+                if now - last > max(frame_stale_seconds, detection_stale_seconds)
+            ]
+            for pid in idle:
+                self._drop_patient(pid)
+            self._expired += len(idle)
+            return len(idle)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "patients": len(self._lru),
+                "bytes_held": self._bytes,
+                "max_bytes": self._max_bytes,
+                "evictions": self._evictions,
+                "expired": self._expired,
+            }
+
+
+class SharedMemoryBackend:
+    """
+    Layout of the segment:
+      header   MAGIC, slot count, frame / detection area sizes, token,
+               seq floor
+      slots    [slot header | frame bytes | detection JSON] x slots
+
+    A slot belongs to one patient (id in its header) and is reused for
+    the least recently written patient when all are taken. The seq floor
+    is the highest seq any reclaimed slot reached; new slots start from it,
+    so a patient's seqs (and ETags) keep rising across slot reuse. Writes and
+    reads hold an fcntl byte-range lock on the slot's byte in a lock file
+    (exclusive to write, shared to read), plus a thread lock, since
+    POSIX record locks are per process.
+    """
+
+    shared = True
+    MAGIC = b"SAVASTR2"
+    _HEADER = struct.Struct("<8sIIIQ")             # magic, slots, frame_bytes, detection_bytes, token
+    _FLOOR = struct.Struct("<Q")                   # seq floor, right after _HEADER
+    _SLOT = struct.Struct("<32sQdIQdI")            # pid, frame seq/ts/len, detection seq/ts/len
+    _HEADER_SIZE = 64
+
+    def __init__(self, name: str, slots: int = 64, frame_bytes: int = 512 * 1024,
+                 detection_bytes: int = 64 * 1024):
+        self._slots = max(1, int(slots))
+        self._frame_bytes = int(frame_bytes)
+        self._detection_bytes = int(detection_bytes)
+        self._slot_size = self._SLOT.size + self._frame_bytes + self._detection_bytes
+        size = self._HEADER_SIZE + self._slots * self._slot_size
+
+        self._thread_lock = threading.RLock()     # _claim nests the segment and a slot lock
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        self._slot_of: dict[str, int] = {}     # pid -> slot index cache (verified on use)
+        self._oversize = 0
+
+        with self._locked(-1, exclusive=True):
+            self._shm = self._open(name, size)
+        self.token = f"{self._HEADER.unpack_from(self._shm.buf, 0)[4]:x}"
+
+    # ── Segment / locking ─────────────────────────────────────────────────────
+
+    def _open(self, name: str, size: int) -> shared_memory.SharedMemory:
+        """Attach to the segment, creating (or re-creating on layout change) it."""
+        header = (self.MAGIC, self._slots, self._frame_bytes, self._detection_bytes)
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+            self._untrack(shm)
+            if shm.size >= size and self._HEADER.unpack_from(shm.buf, 0)[:4] == header:
+                return shm
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._untrack(shm)
+        self._HEADER.pack_into(shm.buf, 0, *header, int.from_bytes(os.urandom(6), "big"))
+        return shm
+
+    @staticmethod
+    def _untrack(shm) -> None:
+        # The segment outlives any one worker; without this the first worker
+        # to exit would unlink it for everybody.
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+    class _Locked:
+        def __init__(self, backend, index: int, exclusive: bool):
+            self._backend, self._offset, self._exclusive = backend, index + 1, exclusive
+
+        def __enter__(self):
+            self._backend._thread_lock.acquire()
+            mode = fcntl.LOCK_EX if self._exclusive else fcntl.LOCK_SH
+            fcntl.lockf(self._backend._lock_fd, mode, 1, self._offset)
+
+        def __exit__(self, *exc):
+            fcntl.lockf(self._backend._lock_fd, fcntl.LOCK_UN, 1, self._offset)
+            self._backend._thread_lock.release()
+
+    def _locked(self, index: int, exclusive: bool):
+        """index -1 guards the segment itself (creation, slot assignment)."""
+        return self._Locked(self, index, exclusive)
+
+    def _offset(self, index: int) -> int:
+        return self._HEADER_SIZE + index * self._slot_size
+
+    def _read_slot(self, index: int) -> list:
+        return list(self._SLOT.unpack_from(self._shm.buf, self._offset(index)))
+
+    def _write_slot(self, index: int, fields: list) -> None:
+        self._SLOT.pack_into(self._shm.buf, self._offset(index), *fields)
+
+    @staticmethod
+    def _pid_key(patient_id: str) -> bytes:
+        return patient_id.encode()[:32].ljust(32, b"\0")
+
+    def _find(self, patient_id: str) -> int | None:
+        key = self._pid_key(patient_id)
+        index = self._slot_of.get(patient_id)
+        if index is not None and self._read_slot(index)[0] == key:
+            return index
+        for i in range(self._slots):
+            if self._read_slot(i)[0] == key:
+                self._slot_of[patient_id] = i
+                return i
+        self._slot_of.pop(patient_id, None)
+        return None
+
+    def _claim(self, patient_id: str) -> int:
+        """Slot for patient_id, taking an empty or the least recently written one."""
+        with self._locked(-1, exclusive=True):
+            index = self._find(patient_id)
+            if index is not None:
+                return index
+            slots = [self._read_slot(i) for i in range(self._slots)]
+            index = min(range(self._slots), key=lambda i: (slots[i][0] != b"\0" * 32, max(slots[i][2], slots[i][5])))
+            with self._locked(index, exclusive=True):
+                old = self._read_slot(index)
+                floor = max(self._FLOOR.unpack_from(self._shm.buf, self._HEADER.size)[0], old[1], old[4])
+                self._FLOOR.pack_into(self._shm.buf, self._HEADER.size, floor)
+                self._write_slot(index, [self._pid_key(patient_id), floor, 0.0, 0, floor, 0.0, 0])
+            self._slot_of[patient_id] = index
+            return index
+
+    # ── Frames ────────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _owned(self, patient_id: str):
+        """Yield (index, slot header) under the slot's exclusive lock, re-claiming
+        if another process reassigned the slot between lookup and lock."""
+        key = self._pid_key(patient_id)
+        while True:
+            index = self._find(patient_id)
+            if index is None:
+                index = self._claim(patient_id)
+            with self._locked(index, exclusive=True):
+                slot = self._read_slot(index)
+                if slot[0] == key:
+                    yield index, slot
+                    return
+
+    def put_frame(self, patient_id: str, jpeg_bytes: bytes) -> int:
+        if len(jpeg_bytes) > self._frame_bytes:
+            self._oversize += 1
+            print(f"[StreamManager] frame of {len(jpeg_bytes)} bytes exceeds STREAM_SHM_FRAME_BYTES; dropped")
+            return self.frame_seq(patient_id)
+        with self._owned(patient_id) as (index, slot):
+            start = self._offset(index) + self._SLOT.size
+            self._shm.buf[start:start + len(jpeg_bytes)] = jpeg_bytes
+            slot[1:4] = [slot[1] + 1, time.time(), len(jpeg_bytes)]
+            self._write_slot(index, slot)
+            return slot[1]
+
+    def get_frame(self, patient_id: str) -> tuple[int, float, bytes | None]:
+        index = self._find(patient_id)
+        if index is None:
+            return 0, 0.0, None
+        with self._locked(index, exclusive=False):
+            key, seq, ts, length, *_ = self._read_slot(index)
+            if key != self._pid_key(patient_id) or not ts:      # ts 0: claimed, no frame written yet
+                return 0, 0.0, None
+            start = self._offset(index) + self._SLOT.size
+            return seq, ts, bytes(self._shm.buf[start:start + length])
+
+    def frame_seq(self, patient_id: str) -> int:
+        index = self._find(patient_id)
+        if index is None:
+            return 0
+        with self._locked(index, exclusive=False):
+            key, seq, *_ = self._read_slot(index)
+            return seq if key == self._pid_key(patient_id) else 0
+
+    def frame_times(self, since: float = 0.0) -> dict[str, float]:
+        out = {}
+        for i in range(self._slots):
+            key, _, ts, *_ = self._read_slot(i)
+            if ts and ts >= since:
+                out[key.rstrip(b"\0").decode()] = ts
+        return out
+
+    # ── Detections ────────────────────────────────────────────────────────────
+
+    def _load_detections(self, index: int, slot: list) -> dict:
+        if not slot[6]:
+            return {}
+        start = self._offset(index) + self._SLOT.size + self._frame_bytes
+        return json.loads(bytes(self._shm.buf[start:start + slot[6]]))
+
+    def _store_detections(self, index: int, slot: list, dets: dict) -> bool:
+        data = json.dumps(dets, default=str).encode()
+        if len(data) > self._detection_bytes:
+            self._oversize += 1
+            print(f"[StreamManager] detections of {len(data)} bytes exceed STREAM_SHM_DETECTION_BYTES; dropped")
+            return False
+        start = self._offset(index) + self._SLOT.size + self._frame_bytes
+        self._shm.buf[start:start + len(data)] = data
+        slot[4:7] = [slot[4] + 1, time.time(), len(data)]
+        self._write_slot(index, slot)
+        return True
+
+    def set_detection(self, patient_id: str, source: str, result: dict) -> int:
+        with self._owned(patient_id) as (index, slot):
+            dets = self._load_detections(index, slot)
+            dets[source] = {"result": result, "timestamp": time.time()}
+            self._store_detections(index, slot, dets)
+            return slot[4]
+
+    def get_detections(self, patient_id: str, stale_seconds: float) -> tuple[int, dict, float]:
+        key = self._pid_key(patient_id)
+        index = self._find(patient_id)
+        if index is None:
+            return 0, {}, stale_seconds
+        # The slot may be reassigned between _find() and each lock; re-check the owner
+        with self._locked(index, exclusive=False):
+            slot = self._read_slot(index)
+            if slot[0] != key:
+                return 0, {}, stale_seconds
+            dets = self._load_detections(index, slot)
+        changed, next_expiry = _expire(dets, stale_seconds, time.time())
+        if changed:
+            with self._locked(index, exclusive=True):
+                slot = self._read_slot(index)
+                if slot[0] != key:
+                    return 0, {}, stale_seconds
+                dets = self._load_detections(index, slot)
+                changed, next_expiry = _expire(dets, stale_seconds, time.time())
+                if changed:
+                    self._store_detections(index, slot, dets)
+        return slot[4], {s: e["result"] for s, e in dets.items()}, next_expiry
+
+    def prune(self, frame_stale_seconds: float, detection_stale_seconds: float) -> int:
+        """Nothing to free: the segment is fixed-size and slots are reused LRU."""
+        return 0
+
+    def stats(self) -> dict:
+        slots = [self._read_slot(i) for i in range(self._slots)]
+        used = [s for s in slots if s[0] != b"\0" * 32]
+        return {
+            "backend": "shm",
+            "patients": len(used),
+            "bytes_held": sum(s[3] + s[6] for s in used),
+            "slots": self._slots,
+            "slot_bytes": self._slot_size,
+            "oversize_dropped": self._oversize,
+        }
@@ -1,22 +1,96 @@
 """
 StreamManager
 -------------
-Holds the latest JPEG frame per patient in memory.
-Provides an MJPEG frame generator for Django streaming responses.
-
-All state is process-local (RAM only) — no database involvement.
+Holds the latest JPEG frame and AI detections per patient.
+Provides MJPEG frame generators for Django streaming responses, fed by
+FrameHub: viewers wake on push_frame() and only receive new frames.
+
+Frames and detection results carry per-patient sequence numbers, exposed
+as ETags so pollers can get 304 Not Modified, and detections can be
+long-polled with wait_for_detections().
+
+Storage is a pluggable backend (stream_backends, STREAM_BACKEND):
+  "memory"  process-local dicts — fine for a single worker
+  "shm"     a shared-memory segment every worker on the host reads and
+            writes, so a frame pushed to one gunicorn worker is served by
+            all of them. Each worker polls the segment for the patients it
+            has live viewers / long-polls for (STREAM_SHM_POLL_SECONDS).
+No database involvement either way.
+
+A janitor thread (every STREAM_JANITOR_SECONDS) forgets patients whose
+frame and results have all gone stale, and drops FrameHub channels
+nobody is watching; the memory backend also evicts least recently
+written patients beyond STREAM_MAX_BYTES.
 """
 
 import threading
 import time
 
-_lock = threading.Lock()
-_buffers: dict[str, bytes] = {}   # patient_id -> latest JPEG bytes
-_timestamps: dict[str, float] = {}  # patient_id -> epoch of last push
-_detections: dict[str, dict] = {}  # patient_id -> {source: {result, timestamp}}
+from django.conf import settings
+
+from apps.monitoring.services.frame_hub import FrameHub
+from apps.monitoring.services.stream_backends import MemoryBackend, SharedMemoryBackend
 
 FRAME_STALE_SECONDS = 30          # treat frame as gone after this many seconds
 DETECTION_STALE_SECONDS = 10       # treat detection as gone after this
+FRAME_KEEPALIVE_SECONDS = 5        # re-send the current frame to idle viewers after this
+
+_hub = FrameHub(stale_seconds=FRAME_STALE_SECONDS, keepalive=FRAME_KEEPALIVE_SECONDS)
+_detections_changed = threading.Condition()   # local set_detection() -> long-pollers
+_detections_generation = 0                    # bumped under _detections_changed
+
+_backend = None
+_backend_lock = threading.Lock()
+_published_seq: dict[str, int] = {}   # patient_id -> backend frame seq last sent to _hub
+
+
+def _store():
+    """Create the configured backend on first use (after gunicorn forks)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.STREAM_BACKEND == "shm":
+                    _backend = SharedMemoryBackend(
+                        name=settings.STREAM_SHM_NAME,
+                        slots=settings.STREAM_SHM_SLOTS,
+                        frame_bytes=settings.STREAM_SHM_FRAME_BYTES,
+                        detection_bytes=settings.STREAM_SHM_DETECTION_BYTES,
+                    )
+                    threading.Thread(target=_watch_shared_frames, name="stream-shm-watch", daemon=True).start()
+                else:
+                    _backend = MemoryBackend(max_bytes=settings.STREAM_MAX_BYTES)
+                threading.Thread(target=_janitor, name="stream-janitor", daemon=True).start()
+    return _backend
+
+
+def _janitor() -> None:
+    while True:
+        time.sleep(settings.STREAM_JANITOR_SECONDS)
+        try:
+            _backend.prune(FRAME_STALE_SECONDS, DETECTION_STALE_SECONDS)
+            watched = set(_hub.prune())
+            for patient_id in list(_published_seq):
+                if patient_id not in watched:
+                    _published_seq.pop(patient_id, None)
+        except Exception as e:
+            print(f"[StreamManager] janitor error: {e}")
+
+
+def _watch_shared_frames() -> None:
+    """Publish frames pushed by other workers to this worker's live viewers."""
+    while True:
+        time.sleep(settings.STREAM_SHM_POLL_SECONDS)
+        for patient_id in _hub.subscribed_patients():
+            try:
+                if _backend.frame_seq(patient_id) == _published_seq.get(patient_id):
+                    continue
+                seq, _, frame = _backend.get_frame(patient_id)
+                if frame is not None:
+                    _published_seq[patient_id] = seq
+                    _hub.publish(patient_id, frame)
+            except Exception as e:
+                print(f"[StreamManager] shared frame watch error: {e}")
 
 
 class StreamManager:
@@ -24,67 +98,115 @@ class StreamManager:
     @staticmethod
     def push_frame(patient_id: str, jpeg_bytes: bytes) -> None:
         """Store the latest frame for a patient. Called by the push-frame endpoint."""
-        with _lock:
-            _buffers[patient_id] = jpeg_bytes
-            _timestamps[patient_id] = time.time()
+        _published_seq[patient_id] = _store().put_frame(patient_id, jpeg_bytes)
+        _hub.publish(patient_id, jpeg_bytes)
 
     @staticmethod
     def get_latest_frame(patient_id: str) -> bytes | None:
         """Return the most recent JPEG bytes for a patient, or None if stale/absent."""
-        with _lock:
-            last_ts = _timestamps.get(patient_id, 0)
-            if time.time() - last_ts > FRAME_STALE_SECONDS:
-                return None
-            return _buffers.get(patient_id)
+        return StreamManager.get_latest_frame_etag(patient_id)[0]
+
+    @staticmethod
+    def get_latest_frame_etag(patient_id: str) -> tuple[bytes | None, str]:
+        """Latest frame (None if stale/absent) and its ETag."""
+        seq, ts, frame = _store().get_frame(patient_id)
+        if time.time() - ts > FRAME_STALE_SECONDS:
+            return None, etag(seq)
+        return frame, etag(seq)
 
     @staticmethod
     def mjpeg_generator(patient_id: str, fps: int = 10):
         """
-        Generator that yields MJPEG multipart chunks.
-        Blocks between frames to honour the requested fps.
-
+        Generator that yields MJPEG multipart chunks (WSGI).
+        Blocks until a new frame is pushed; sends at most `fps` frames/s.
         """
-        interval = 1.0 / max(fps, 1)
-        _PLACEHOLDER = _make_placeholder()
+        placeholder = _make_placeholder()
+        for frame in _hub.subscribe(patient_id, min_interval=1.0 / max(fps, 1)):
+            yield _mjpeg_part(frame or placeholder)
 
-        while True:
-            frame = StreamManager.get_latest_frame(patient_id) or _PLACEHOLDER
-            yield (
-                b"--frame\r\n"
-                b"Content-Type: image/jpeg\r\n\r\n"
-                + frame
-                + b"\r\n"
-            )
-            time.sleep(interval)
+    @staticmethod
+    async def mjpeg_generator_async(patient_id: str, fps: int = 10):
+        """Async generator of MJPEG multipart chunks (ASGI)."""
+        placeholder = _make_placeholder()
+        async for frame in _hub.subscribe_async(patient_id, min_interval=1.0 / max(fps, 1)):
+            yield _mjpeg_part(frame or placeholder)
+
+    @staticmethod
+    def hub_stats() -> dict:
+        return _hub.stats()
 
     @staticmethod
     def set_detection(patient_id: str, source: str, result: dict) -> None:
         """Store latest AI result for a patient/source pair."""
-        with _lock:
-            patient_dets = _detections.setdefault(patient_id, {})
-            patient_dets[source] = {"result": result, "timestamp": time.time()}
+        global _detections_generation
+        _store().set_detection(patient_id, source, result)
+        with _detections_changed:
+            _detections_generation += 1
+            _detections_changed.notify_all()
 
     @staticmethod
     def get_detections(patient_id: str) -> dict:
         """Return all non-stale detections for a patient as {source: result}."""
-        now = time.time()
-        out = {}
-        with _lock:
-            patient_dets = _detections.get(patient_id, {})
-            for source, entry in patient_dets.items():
-                if now - entry["timestamp"] <= DETECTION_STALE_SECONDS:
-                    out[source] = entry["result"]
-        return out
+        return StreamManager.get_detections_seq(patient_id)[1]
+
+    @staticmethod
+    def get_detections_seq(patient_id: str) -> tuple[int, dict]:
+        """(sequence, detections) read together."""
+        seq, detections, _ = _store().get_detections(patient_id, DETECTION_STALE_SECONDS)
+        return seq, detections
+
+    @staticmethod
+    def wait_for_detections(patient_id: str, since: int, timeout: float) -> tuple[int, dict]:
+        """
+        Block up to `timeout` seconds until the patient's detection sequence
+        moves past `since` (a new result, or one going stale), then return
+        (sequence, detections). On timeout the sequence is unchanged (== since).
+        """
+        store = _store()
+        deadline = time.monotonic() + timeout
+        while True:
+            with _detections_changed:
+                generation = _detections_generation
+            seq, detections, next_expiry = store.get_detections(patient_id, DETECTION_STALE_SECONDS)
+            remaining = deadline - time.monotonic()
+            if seq != since or remaining <= 0:
+                return seq, detections
+            wait = min(remaining, next_expiry)
+            if store.shared:
+                # Results stored by other workers do not notify this process
+                wait = min(wait, settings.STREAM_SHM_POLL_SECONDS)
+            with _detections_changed:
+                if generation == _detections_generation:
+                    _detections_changed.wait(wait)
 
     @staticmethod
     def active_patients() -> list[str]:
         """Return patient_ids that have a non-stale frame."""
-        now = time.time()
-        with _lock:
-            return [
-                pid for pid, ts in _timestamps.items()
-                if now - ts <= FRAME_STALE_SECONDS
-            ]
+        return list(_store().frame_times(since=time.time() - FRAME_STALE_SECONDS))
+
+    @staticmethod
+    def backend_stats() -> dict:
+        """Storage counters (bytes held, evictions, ...) plus live patients."""
+        return {**_store().stats(), "live_patients": len(StreamManager.active_patients())}
+
+
+def etag(seq: int) -> str:
+    return f'"{_store().token}-{seq}"'
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """True if the If-None-Match header lists `tag` (weak or strong) or is *."""
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in candidates or tag in candidates
+
+
+def _mjpeg_part(frame: bytes) -> bytes:
+    return (
+        b"--frame\r\n"
+        b"Content-Type: image/jpeg\r\n\r\n"
+        + frame
+        + b"\r\n"
+    )
 
 
 def _make_placeholder() -> bytes:
@@ -0,0 +1,165 @@
+"""
+WriteBuffer
+-----------
+Write-behind buffer for high-volume, non-alerting documents
+(ActivityLog, routine Event). Sensor samples go to SensorStore instead.
+
+Documents are validated and given their ObjectId on add(), so callers can
+still report ids immediately. They are grouped per collection and written
+with a single insert_many when either:
+  - a collection reaches max_batch pending documents, or
+  - the oldest pending document is max_delay seconds old.
+
+Anything that can raise an Alert (FALL, CHEST_PAIN, dangerous objects,
+unknown faces) must NOT go through here — those are saved synchronously
+because the Alert references the saved Event.
+
+The buffer drains on interpreter shutdown (atexit), so a gunicorn worker
+restart flushes what it holds.
+"""
+
+import atexit
+import threading
+import time
+
+from bson import ObjectId
+from django.conf import settings
+
+
+class WriteBuffer:
+
+    def __init__(self, max_batch: int = 200, max_delay: float = 2.0):
+        self._max_batch = max(1, int(max_batch))
+        self._max_delay = max(0.05, float(max_delay))
+
+        self._lock = threading.Condition()
+        self._pending: dict[type, list] = {}        # Document class -> docs
+        self._oldest: float | None = None           # enqueue time of oldest pending doc
+        self._flush_lock = threading.Lock()         # one insert_many round at a time
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+        self._flushes = 0
+        self._written = 0
+        self._failed = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="write-buffer", daemon=True)
+        self._thread.start()
+
+    def add(self, doc):
+        """Validate, assign an id and queue `doc` for insertion. Returns `doc`."""
+        if doc.id is None:
+            doc.id = ObjectId()
+        doc.validate()
+        with self._lock:
+            docs = self._pending.setdefault(type(doc), [])
+            docs.append(doc)
+            if self._oldest is None:
+                self._oldest = time.time()
+            if len(docs) >= self._max_batch:
+                self._lock.notify()
+        return doc
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed:
+                    full = any(len(d) >= self._max_batch for d in self._pending.values())
+                    if full:
+                        break
+                    if self._oldest is not None:
+                        wait = self._oldest + self._max_delay - time.time()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._lock.wait(wait)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything pending with one insert_many per collection. Returns docs written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending, self._oldest = self._pending, {}, None
+            if not pending:
+                return 0
+
+            t0 = time.perf_counter()
+            written = failed = 0
+            for doc_cls, docs in pending.items():
+                try:
+                    doc_cls._get_collection().insert_many(
+                        [d.to_mongo() for d in docs], ordered=False,
+                    )
+                    written += len(docs)
+                except Exception as e:
+                    # BulkWriteError with ordered=False: the rest of the batch was still written
+                    n_ok = (getattr(e, "details", None) or {}).get("nInserted", 0)
+                    written += n_ok
+                    failed += len(docs) - n_ok
+                    print(f"[WriteBuffer] insert_many into {doc_cls._get_collection_name()} failed: {e}")
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+            with self._lock:
+                self._flushes += 1
+                self._written += written
+                self._failed += failed
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            return written
+
+    def close(self) -> None:
+        """Stop the flusher thread and drain whatever is still pending."""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_batch": self._max_batch,
+                "max_delay_seconds": self._max_delay,
+                "pending": {cls._get_collection_name(): len(d) for cls, d in self._pending.items()},
+                "flushes": self._flushes,
+                "written": self._written,
+                "failed": self._failed,
+                "mean_batch": round(self._written / self._flushes, 1) if self._flushes else 0.0,
+                "last_flush_ms": round(self._last_flush_ms, 1),
+                "max_flush_ms": round(self._max_flush_ms, 1),
+            }
+
+
+_buffer: WriteBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer() -> WriteBuffer:
+    """Create and start the process-wide buffer on first use (after gunicorn forks)."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = WriteBuffer(
+                max_batch=settings.WRITE_BUFFER_MAX_BATCH,
+                max_delay=settings.WRITE_BUFFER_MAX_DELAY_SECONDS,
+            )
+            _buffer.start()
+            atexit.register(_buffer.close)
+        return _buffer
+
+
+def buffered(doc):
+    """Queue a document for a batched insert instead of doc.save(). Returns `doc`."""
+    return get_write_buffer().add(doc)
+
+
+def stats() -> dict:
+    """Flush counters for health endpoints (empty until the first buffered write)."""
+    return _buffer.stats() if _buffer is not None else {}
@@ -81,9 +81,9 @@ class ActivityEventView(APIView):
                 alerts = AlertService.create_alerts_for_event(event)
                 alerts_created += len(alerts)
 
-        # --- Handle normal activities (log only) ---
+        # --- Handle normal activities (log only, batched write) ---
         elif activity in self.NORMAL_ACTIVITIES:
-            event = EventService.create_event(
+            event = EventService.queue_event(
                 patient=patient,
                 event_type=Event.TYPE_ACTIVITY,
                 confidence=float(confidence),
@@ -1,6 +1,18 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from apps.monitoring.services import ai_dispatcher, person_index, recipient_cache, sensor_store, write_buffer
+from apps.monitoring.services.stream_manager import StreamManager
+
 class HealthCheckView(APIView):
     def get(self, request):
-        return Response({"status":"ok"})
\ No newline at end of file
+        return Response({
+            "status": "ok",
+            "ai_dispatcher": ai_dispatcher.stats(),
+            "write_buffer": write_buffer.stats(),
+            "sensor_store": sensor_store.stats(),
+            "alert_recipient_cache": recipient_cache.stats(),
+            "person_index": person_index.stats(),
+            "live_stream": StreamManager.hub_stats(),
+            "stream_store": StreamManager.backend_stats(),
+        })
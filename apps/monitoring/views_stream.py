@@ -3,10 +3,11 @@
 
 
 import json
-import threading
-from datetime import datetime
+from datetime import datetime, timedelta
+
 
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.http import StreamingHttpResponse, JsonResponse
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
@@ -17,12 +18,19 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework import status
 
-from apps.monitoring.services.stream_manager import StreamManager
+from apps.monitoring.services.stream_manager import StreamManager, etag, etag_matches
 from apps.monitoring.services.ai_dispatcher import dispatch
 from apps.monitoring.services.result_processor import ResultProcessor
-from apps.monitoring.models import ActivityLog, SensorReading
+from apps.monitoring.services import sensor_store
+from apps.monitoring.models import ActivityLog
 from apps.accounts.services.patient_service import PatientService
 
+# Upper bound for ?wait= on the latest-detections long poll
+DETECTIONS_MAX_WAIT_SECONDS = 10.0
+
+# Longest ?minutes= window for sensor history (7 days)
+SENSOR_HISTORY_MAX_MINUTES = 7 * 24 * 60
+
 
 # POST /api/stream/push-frame
 
@@ -51,19 +59,15 @@ class PushFrameView(APIView):
         # Buffer frame for MJPEG stream
         StreamManager.push_frame(patient_id, jpeg_bytes)
 
-        # Store sensor readings if provided (non-blocking — don't make the
-        # Pi wait on a MongoDB round-trip before it can send the next frame)
+        # Append sensor readings to the patient's current minute bucket
+        # (in memory, flushed in bulk — the Pi never waits on MongoDB)
         sensor_data = {
             "hrv": request.data.get("hrv"),
             "accel_x": request.data.get("accel_x"),
             "accel_y": request.data.get("accel_y"),
             "accel_z": request.data.get("accel_z"),
         }
-        threading.Thread(
-            target=_store_sensor_reading,
-            args=(patient_id, sensor_data),
-            daemon=True,
-        ).start()
+        _store_sensor_reading(patient_id, sensor_data)
 
         # Store Pi-side detections + AI state for Flutter AR overlay
         det_json = request.data.get("detections", "[]")
@@ -80,9 +84,8 @@ class PushFrameView(APIView):
         except Exception:
             pass
 
-        # Dispatch to AI servers asynchronously
-        django_port = request.META.get("SERVER_PORT", 8000)
-        dispatch(patient_id, jpeg_bytes, django_port=int(django_port))
+        # Dispatch to AI servers asynchronously (results are processed in-process)
+        dispatch(patient_id, jpeg_bytes)
 
         return Response({"detail": "accepted"}, status=status.HTTP_202_ACCEPTED)
 
@@ -94,11 +97,18 @@ class LiveStreamView(View):
     """
     MJPEG stream consumed by Flutter's Image.network().
     No DRF — uses raw Django streaming response.
+
+    Under ASGI (config.asgi) the stream is an async generator, so viewers
+    cost no worker thread; under WSGI each viewer holds one worker.
     """
 
     def get(self, request, patient_id: str):
+        if isinstance(request, ASGIRequest):
+            frames = StreamManager.mjpeg_generator_async(patient_id, fps=10)
+        else:
+            frames = StreamManager.mjpeg_generator(patient_id, fps=10)
         resp = StreamingHttpResponse(
-            StreamManager.mjpeg_generator(patient_id, fps=10),
+            frames,
             content_type="multipart/x-mixed-replace; boundary=frame",
         )
         resp["Access-Control-Allow-Origin"] = "*"
@@ -113,15 +123,24 @@ class SnapshotView(View):
     Returns the latest single JPEG frame for a patient.
     Flutter polls this at ~10fps to render a pseudo-live feed (Image.network
     cannot decode multipart/x-mixed-replace MJPEG streams).
+
+    The ETag is the frame's sequence number: a poll with a matching
+    If-None-Match gets 304 Not Modified instead of the JPEG again.
     """
 
     def get(self, request, patient_id: str):
-        from django.http import HttpResponse, HttpResponseNotFound
-        frame = StreamManager.get_latest_frame(patient_id)
+        from django.http import HttpResponse, HttpResponseNotFound, HttpResponseNotModified
+        frame, tag = StreamManager.get_latest_frame_etag(patient_id)
         if not frame:
             return HttpResponseNotFound("No frame available")
-        resp = HttpResponse(frame, content_type="image/jpeg")
-        resp["Cache-Control"] = "no-store"
+        if etag_matches(request.headers.get("If-None-Match", ""), tag):
+            resp = HttpResponseNotModified()
+        else:
+            resp = HttpResponse(frame, content_type="image/jpeg")
+        resp["ETag"] = tag
+        # Cacheable, but must be revalidated on every poll
+        resp["Cache-Control"] = "no-cache"
+        resp["Access-Control-Expose-Headers"] = "ETag"
         # CORS headers for Flutter Web
         resp["Access-Control-Allow-Origin"] = "*"
         resp["Access-Control-Allow-Methods"] = "GET, OPTIONS"
@@ -142,7 +161,8 @@ class SnapshotView(View):
 
 class AIResultView(APIView):
     """
-    Receives AI inference results from AIDispatcher callbacks.
+    Receives AI inference results from external AI servers.
+    (AIDispatcher delivers its results in-process via ResultWorker.)
     Routes to ResultProcessor which saves Events / ActivityLogs / Alerts.
     """
     parser_classes = (JSONParser,)
@@ -172,11 +192,75 @@ class LatestDetectionsView(APIView):
     """
     Returns the latest cached AI results for a patient, used by Flutter
     to render AR overlay boxes on top of the live MJPEG stream.
+
+    X-Detections-Seq / ETag carry the result sequence number.
+      If-None-Match: <etag>  -> 304 when nothing changed
+      ?since=<seq>&wait=2    -> long poll: blocks up to `wait` seconds
+                                (max DETECTIONS_MAX_WAIT_SECONDS) for a
+                                result newer than <seq>, else 304
+    """
+
+    def get(self, request, patient_id: str):
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = int(since)
+                wait = float(request.query_params.get("wait", "0"))
+            except ValueError:
+                return Response({"detail": "since and wait must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+            wait = min(max(wait, 0.0), DETECTIONS_MAX_WAIT_SECONDS)
+            seq, detections = StreamManager.wait_for_detections(patient_id, since, wait)
+            unchanged = seq == since
+        else:
+            seq, detections = StreamManager.get_detections_seq(patient_id)
+            unchanged = etag_matches(request.headers.get("If-None-Match", ""), etag(seq))
+
+        headers = {"ETag": etag(seq), "X-Detections-Seq": str(seq), "Cache-Control": "no-cache"}
+        if unchanged:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(detections, status=status.HTTP_200_OK, headers=headers)
+
+
+# GET /api/stream/sensor-history/<patient_id>?minutes=60&resolution=1m
+
+class SensorHistoryView(APIView):
+    """
+    Accelerometer / HRV history from the per-minute SensorBucket documents.
+    resolution: raw | 10s | 1m | 5m | 15m | 1h  (default 1m; at 1m and
+    coarser only the stored minute summaries are read).
     """
 
     def get(self, request, patient_id: str):
-        detections = StreamManager.get_detections(patient_id)
-        return Response(detections, status=status.HTTP_200_OK)
+        try:
+            patient = PatientService.get_patient_by_id(patient_id)
+        except Exception:
+            return Response({"detail": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        resolution = request.query_params.get("resolution", "1m")
+        if resolution not in sensor_store.RESOLUTIONS:
+            return Response(
+                {"detail": f"resolution must be one of {', '.join(sensor_store.RESOLUTIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            minutes = int(request.query_params.get("minutes", 60))
+        except ValueError:
+            minutes = 0
+        if minutes < 1:
+            return Response({"detail": "minutes must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+        minutes = min(minutes, SENSOR_HISTORY_MAX_MINUTES)
+
+        end = datetime.utcnow()
+        start = end - timedelta(minutes=minutes)
+        points = sensor_store.query(str(patient.id), start, end, resolution)
+
+        return Response({
+            "patient_id": str(patient.id),
+            "minutes": minutes,
+            "resolution": resolution,
+            "count": len(points),
+            "points": points,
+        }, status=status.HTTP_200_OK)
 
 
 # GET /api/stream/activity-log/<patient_id>
@@ -218,26 +302,11 @@ class ActivityLogView(APIView):
 
 def _store_sensor_reading(patient_id: str, data) -> None:
     """
-    Persist HRV and accelerometer values sent alongside a frame.
-    Silently skips if no sensor fields are present or patient lookup fails.
+    Append HRV and accelerometer values sent alongside a frame to the
+    patient's SensorBucket for the current minute.
+    Silently skips if no sensor fields are present or patient_id is not an ObjectId.
     """
-    hrv = data.get("hrv")
-    accel_x = data.get("accel_x")
-    accel_y = data.get("accel_y")
-    accel_z = data.get("accel_z")
-
-    if not any(v is not None for v in [hrv, accel_x, accel_y, accel_z]):
-        return
-
     try:
-        patient = PatientService.get_patient_by_id(patient_id)
-        SensorReading(
-            patient=patient,
-            hrv=float(hrv) if hrv is not None else None,
-            accel_x=float(accel_x) if accel_x is not None else None,
-            accel_y=float(accel_y) if accel_y is not None else None,
-            accel_z=float(accel_z) if accel_z is not None else None,
-            created_at=datetime.utcnow(),
-        ).save()
-    except Exception as e:
+        sensor_store.append(patient_id, data)
+    except (TypeError, ValueError) as e:
         print(f"[PushFrame] Sensor storage error: {e}")
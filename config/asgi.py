@@ -3,6 +3,11 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the production entry point (see Procfile / Dockerfile):
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+LiveStreamView serves async MJPEG generators here, so one worker handles
+any number of viewers; the DRF views still run in Django's thread pool.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
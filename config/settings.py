@@ -51,6 +51,7 @@ MIDDLEWARE = [
 ROOT_URLCONF = "config.urls_config"
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 # Templates (required even if API-only)
 TEMPLATES = [
@@ -90,6 +91,8 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 # CORS — allow Flutter app and Railway preview
 CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL_ORIGINS", "True") == "True"
+# Lets Flutter Web read the snapshot / latest-detections sequence headers
+CORS_EXPOSE_HEADERS = ["ETag", "X-Detections-Seq"]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -100,9 +103,45 @@ OBJECT_DETECTION_SERVER_URL = os.getenv("OBJECT_DETECTION_SERVER_URL", "http://1
 
 ACTIVITY_SERVER_URL = os.getenv("ACTIVITY_SERVER_URL", "http://127.0.0.1:5003")
 
+# AIDispatcher worker pools (per gunicorn worker process)
+AI_DISPATCH_ACTIVITY_WORKERS = int(os.getenv("AI_DISPATCH_ACTIVITY_WORKERS", "4"))
+AI_DISPATCH_FACE_WORKERS = int(os.getenv("AI_DISPATCH_FACE_WORKERS", "2"))
+AI_DISPATCH_MAX_PENDING = int(os.getenv("AI_DISPATCH_MAX_PENDING", "64"))
+# In-process AI result handling (StreamManager + ResultProcessor)
+AI_RESULT_WORKERS = int(os.getenv("AI_RESULT_WORKERS", "2"))
+AI_RESULT_MAX_QUEUE = int(os.getenv("AI_RESULT_MAX_QUEUE", "256"))
+# Write-behind buffer for ActivityLog / routine Event inserts
+WRITE_BUFFER_MAX_BATCH = int(os.getenv("WRITE_BUFFER_MAX_BATCH", "200"))
+WRITE_BUFFER_MAX_DELAY_SECONDS = float(os.getenv("WRITE_BUFFER_MAX_DELAY_SECONDS", "2.0"))
+# Per-minute SensorBucket upserts are flushed this often
+SENSOR_FLUSH_SECONDS = float(os.getenv("SENSOR_FLUSH_SECONDS", "5.0"))
+
 PI_API_KEY = os.getenv("PI_API_KEY", "sava-pi-dev-key")
 DJANGO_HOST = os.getenv("DJANGO_HOST", "127.0.0.1")
 
 FACE_UNKNOWN_THRESHOLD = float(os.getenv("FACE_UNKNOWN_THRESHOLD", "0.80"))
 ALERT_COOLDOWN_SECONDS = int(os.getenv("ALERT_COOLDOWN_SECONDS", "60"))
+ALERT_RECIPIENT_CACHE_SECONDS = int(os.getenv("ALERT_RECIPIENT_CACHE_SECONDS", "300"))
+# How often each worker checks for recipient invalidations made by other workers
+ALERT_RECIPIENT_SYNC_SECONDS = float(os.getenv("ALERT_RECIPIENT_SYNC_SECONDS", "2"))
+# Per-patient embedding index of tracked persons; rebuilt from MongoDB this often
+PERSON_INDEX_REFRESH_SECONDS = float(os.getenv("PERSON_INDEX_REFRESH_SECONDS", "10"))
+
+# Retention (MongoDB TTL indexes; 0 = keep forever). Changing these on an
+# existing database: python manage.py check_query_plans --sync-ttl
+ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv("ACTIVITY_LOG_RETENTION_DAYS", "90"))
+SENSOR_RETENTION_DAYS = int(os.getenv("SENSOR_RETENTION_DAYS", "30"))
+
+# StreamManager storage: "memory" (one worker) or "shm" (shared by every
+# gunicorn worker on the host — required with --workers > 1)
+STREAM_BACKEND = os.getenv("STREAM_BACKEND", "memory")
+STREAM_SHM_NAME = os.getenv("STREAM_SHM_NAME", "sava_stream")
+STREAM_SHM_SLOTS = int(os.getenv("STREAM_SHM_SLOTS", "64"))
+STREAM_SHM_FRAME_BYTES = int(os.getenv("STREAM_SHM_FRAME_BYTES", str(512 * 1024)))
+STREAM_SHM_DETECTION_BYTES = int(os.getenv("STREAM_SHM_DETECTION_BYTES", str(64 * 1024)))
+STREAM_SHM_POLL_SECONDS = float(os.getenv("STREAM_SHM_POLL_SECONDS", "0.02"))
+# Memory backend byte budget (frames + detections, LRU-evicted per patient)
+STREAM_MAX_BYTES = int(os.getenv("STREAM_MAX_BYTES", str(64 * 1024 * 1024)))
+STREAM_JANITOR_SECONDS = float(os.getenv("STREAM_JANITOR_SECONDS", "30"))
+
 print("DJANGO MONGODB_URI =", MONGODB_URI)
@@ -733,13 +733,23 @@ class ApiService {
   static String snapshotUrl(String patientId) =>
       '$_baseUrl/stream/snapshot/$patientId';
 
+  /// Last detection sequence seen per patient (X-Detections-Seq)
+  static final Map<String, String> _detectionsSeq = {};
+  static final Set<String> _detectionsInFlight = {};
+
   /// Polls latest cached AI detections for the patient and updates AppState.
   /// Called periodically by VisionPage while viewing the live feed.
+  /// Long-polls (`since` + `wait=2`): the server answers as soon as a new
+  /// result arrives, or 304 when nothing changed.
   static Future<void> fetchLatestDetections(String patientId) async {
+    if (!_detectionsInFlight.add(patientId)) return;
     try {
+      final since = _detectionsSeq[patientId] ?? '0';
       final resp = await http.get(
-        Uri.parse('$_baseUrl/stream/latest-detections/$patientId'),
+        Uri.parse('$_baseUrl/stream/latest-detections/$patientId?since=$since&wait=2'),
       );
+      final seq = resp.headers['x-detections-seq'];
+      if (seq != null) _detectionsSeq[patientId] = seq;
       if (resp.statusCode != 200) return;
       final data = json.decode(resp.body) as Map<String, dynamic>;
 
@@ -799,6 +809,8 @@ class ApiService {
       }
     } catch (e) {
       debugPrint('[fetchLatestDetections] error: $e');
+    } finally {
+      _detectionsInFlight.remove(patientId);
     }
   }
 
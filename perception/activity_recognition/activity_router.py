@@ -0,0 +1,263 @@
+"""
+SAVA Activity Recognition Router — multi-process front for activity_server.
+
+activity_server keeps every Session, YOLO, SkateFormer and MediaPipe graph in
+one process behind the GIL. This front spawns ACTIVITY_WORKERS copies of it
+(each on its own port, each with its own models) and shards patients across
+them with a consistent hash of patient_id, so a patient's 64-frame pose
+buffer always stays in the same worker process. A worker joins the ring
+only once its /health answers (its models are loaded), and leaves it while
+it is being restarted; SIGTERM/SIGINT stop every worker before exiting.
+
+Run with:
+    ACTIVITY_WORKERS=4 python -m perception.activity_recognition.activity_router
+
+Endpoints (same contract as activity_server):
+  POST /process-frame    forwarded to the worker owning patient_id
+  POST /reset-session    forwarded to the worker owning patient_id
+  GET  /health           aggregated: total active sessions + per-worker status
+"""
+
+import atexit
+import bisect
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+PORT = int(os.environ.get("ACTIVITY_SERVER_PORT", "5003"))
+NUM_WORKERS = int(os.environ.get("ACTIVITY_WORKERS", "2"))
+WORKER_BASE_PORT = int(os.environ.get("ACTIVITY_WORKER_BASE_PORT", str(PORT + 100)))
+WORKER_TIMEOUT = float(os.environ.get("ACTIVITY_WORKER_TIMEOUT", "30"))
+WORKER_STARTUP_TIMEOUT = float(os.environ.get("ACTIVITY_WORKER_STARTUP_TIMEOUT", "300"))
+VIRTUAL_NODES = 64          # ring points per worker — evens out the shard sizes
+
+SERVER_SCRIPT = str(Path(__file__).resolve().parent / "activity_server.py")
+
+
+# ── Consistent hashing ────────────────────────────────────────────────────────
+def _hash(key):
+    # md5 rather than hash(): must be stable across processes and restarts
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Maps keys to nodes; adding/removing a node only moves ~1/N of the keys."""
+
+    def __init__(self, nodes, vnodes=VIRTUAL_NODES):
+        self._ring = sorted(
+            (_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes)
+        )
+        self._points = [p for p, _ in self._ring]
+
+    def node_for(self, key):
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._ring[idx][1]
+
+
+# ── Worker processes ──────────────────────────────────────────────────────────
+class Worker:
+    """One activity_server subprocess plus a keep-alive HTTP session to it."""
+
+    def __init__(self, index):
+        self.index = index
+        self.port = WORKER_BASE_PORT + index
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.http = requests.Session()
+        self.proc = None
+        self.restarts = 0
+        self.ready = False
+
+    def start(self):
+        self.ready = False
+        env = dict(os.environ, ACTIVITY_SERVER_PORT=str(self.port))
+        self.proc = subprocess.Popen([sys.executable, SERVER_SCRIPT], env=env)
+        print(f"[ActivityRouter] Worker {self.index} started (pid={self.proc.pid}, port={self.port})")
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def wait_ready(self, timeout=WORKER_STARTUP_TIMEOUT):
+        """Poll /health until the worker has loaded its models; False if it died or timed out."""
+        deadline = time.time() + timeout
+        while self.alive() and time.time() < deadline and not _stopping.is_set():
+            try:
+                if self.http.get(f"{self.url}/health", timeout=2).json().get("status") == "ok":
+                    return True
+            except (requests.RequestException, ValueError):
+                pass
+            time.sleep(1)
+        return False
+
+    def stop(self):
+        if self.alive():
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+workers = [Worker(i) for i in range(NUM_WORKERS)]
+ring = None                 # HashRing over the ready workers; None until one is
+_ring_lock = threading.Lock()
+_stopping = threading.Event()
+
+
+def _rebuild_ring():
+    global ring
+    with _ring_lock:
+        ready = [w.index for w in workers if w.ready]
+        ring = HashRing(ready) if ready else None
+
+
+def _worker_for(patient_id):
+    current = ring
+    if current is None:
+        return None
+    return workers[current.node_for(patient_id or "_default")]
+
+
+def _admit(w):
+    """Background thread: add a (re)started worker to the ring once it is healthy."""
+    if w.wait_ready():
+        w.ready = True
+        _rebuild_ring()
+        print(f"[ActivityRouter] Worker {w.index} ready — added to the ring")
+    elif not _stopping.is_set():
+        print(f"[ActivityRouter] Worker {w.index} not healthy after {WORKER_STARTUP_TIMEOUT:.0f}s — restarting")
+        w.stop()   # the supervisor restarts it
+
+
+def _start(w):
+    w.start()
+    threading.Thread(target=_admit, args=(w,), daemon=True).start()
+
+
+def _supervise():
+    """Background thread: restart crashed workers on the same port (same shard)."""
+    while not _stopping.wait(5):
+        for w in workers:
+            if not w.alive() and not _stopping.is_set():
+                print(f"[ActivityRouter] Worker {w.index} exited (code={w.proc.returncode}) — restarting")
+                w.ready = False
+                _rebuild_ring()
+                w.restarts += 1
+                _start(w)
+
+
+def _stop_workers():
+    _stopping.set()
+    for w in workers:
+        w.stop()
+
+
+def _on_signal(signum, frame):
+    print(f"[ActivityRouter] Signal {signum} — stopping workers")
+    _stop_workers()
+    sys.exit(0)
+
+
+# ── App ───────────────────────────────────────────────────────────────────────
+app = Flask(__name__)
+CORS(app, resources={r"/*": {"origins": "*"}})
+
+
+def _relay(resp):
+    return Response(resp.content, status=resp.status_code,
+                    content_type=resp.headers.get("Content-Type", "application/json"))
+
+
+@app.route("/process-frame", methods=["POST"])
+def process_frame():
+    if "frame" not in request.files:
+        return jsonify({"error": "No frame provided"}), 400
+
+    patient_id = request.form.get("patient_id") or None
+    worker = _worker_for(patient_id)
+    if worker is None:
+        return jsonify({"error": "no activity worker ready yet"}), 503
+    upload = request.files["frame"]
+    try:
+        resp = worker.http.post(
+            f"{worker.url}/process-frame",
+            files={"frame": (upload.filename or "frame.jpg", upload.read(), upload.mimetype or "image/jpeg")},
+            data=request.form.to_dict(),
+            timeout=WORKER_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        return jsonify({"error": f"worker {worker.index} unavailable: {e}"}), 503
+    return _relay(resp)
+
+
+@app.route("/reset-session", methods=["POST"])
+def reset_session():
+    if request.is_json:
+        patient_id = (request.get_json(silent=True) or {}).get("patient_id")
+    else:
+        patient_id = request.form.get("patient_id")
+    worker = _worker_for(patient_id)
+    if worker is None:
+        return jsonify({"error": "no activity worker ready yet"}), 503
+    try:
+        resp = worker.http.post(
+            f"{worker.url}/reset-session",
+            data={"patient_id": patient_id or ""},
+            timeout=WORKER_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        return jsonify({"error": f"worker {worker.index} unavailable: {e}"}), 503
+    return _relay(resp)
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    per_worker = []
+    for w in workers:
+        entry = {"worker": w.index, "port": w.port, "alive": w.alive(), "ready": w.ready, "restarts": w.restarts}
+        try:
+            entry.update(w.http.get(f"{w.url}/health", timeout=2).json())
+        except (requests.RequestException, ValueError) as e:
+            entry["status"] = "unreachable"
+            entry["error"] = str(e)
+        per_worker.append(entry)
+
+    healthy = [e for e in per_worker if e.get("status") == "ok"]
+    return jsonify({
+        "status": "ok" if len(healthy) == len(workers) else ("degraded" if healthy else "down"),
+        "workers": len(workers),
+        "healthy_workers": len(healthy),
+        "active_sessions": sum(e.get("active_sessions", 0) for e in healthy),
+        "per_worker": per_worker,
+    }), (200 if healthy else 503)
+
+
+if __name__ == "__main__":
+    atexit.register(_stop_workers)
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+    for w in workers:
+        _start(w)
+    threading.Thread(target=_supervise, daemon=True).start()
+
+    print(f"[ActivityRouter] {NUM_WORKERS} workers on ports "
+          f"{WORKER_BASE_PORT}-{WORKER_BASE_PORT + NUM_WORKERS - 1}")
+    print(f"[ActivityRouter] Listening on http://0.0.0.0:{PORT}")
+    try:
+        try:
+            from waitress import serve
+            serve(app, host="0.0.0.0", port=PORT, threads=8)
+        except ImportError:
+            print("[ActivityRouter] waitress not installed — falling back to Flask dev server.")
+            app.run(host="0.0.0.0", port=PORT, debug=False, threaded=True)
+    finally:
+        _stop_workers()
@@ -4,7 +4,8 @@ Receives JPEG frames from the Flutter app or Raspberry Pi camera and runs the
 full activity recognition pipeline:
   - YOLO person detection
   - MediaPipe pose estimation (64-frame sliding window per session)
-  - SkateFormer 9-class activity recognition (with temporal smoothing)
+  - SkateFormer 9-class activity recognition (with temporal smoothing),
+    micro-batched across sessions by BatchInferenceEngine
   - Wandering detection
   - Dangerous object detection
   - Returns all results as JSON — Django's AIDispatcher handles event storage and alerting
@@ -12,11 +13,17 @@ full activity recognition pipeline:
 Run with:
     .\venv310\Scripts\python -m perception.activity_recognition.activity_server
 
+To scale past one process, run activity_router.py instead: it starts N copies
+of this server and shards patients across them by patient_id.
+
 Endpoints:
   POST /process-frame    multipart "frame" (JPEG) + form field "patient_id"
                          Returns activity prediction, wandering flag, dangerous
                          objects, person bbox.
-  GET  /health           Server status + model info.
+  GET  /health           Server status + model info + batching stats
+                         (queue depth, batch-size histogram, wait times).
+  GET  /metrics          Prometheus text: per-stage latency quantiles and
+                         frame counters (same stage names as camera.py).
   POST /reset-session    Reset state for a patient (clears pose buffer, etc.)
 """
 
@@ -25,28 +32,34 @@ import os
 import sys
 import time
 import threading
-from collections import deque
 from pathlib import Path
 
 import cv2
 import numpy as np
 import torch
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from PIL import Image, ImageOps
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 # Reuse existing pipeline components
-from pose_estimator import PoseEstimator
+from pose_estimator import PoseEstimator, WINDOW_SIZE
 from camera import (
     CLASS_NAMES,
     _load_model,
-    _predict,
+    _predict_batch,
+    ProbsSmoother,
     WanderingDetector,
 )
+from batch_inference import BatchInferenceEngine
 from object_detector import DangerousObjectDetector
-from config import TARGET_FPS
+from detection_stage import DetectionStage
+from stage_metrics import PROMETHEUS_CONTENT_TYPE, StageMetrics
+from config import (
+    TARGET_FPS, INFERENCE_STRIDE, MOTION_TRIGGER_SPEED,
+    POSE_ROI_ENABLED, POSE_ROI_PADDING,
+)
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 PORT = int(os.environ.get("ACTIVITY_SERVER_PORT", "5003"))
@@ -57,6 +70,14 @@ CONFIDENCE_THRESH = 0.60
 CLASS_THRESHOLDS = {"FALL": 0.75, "CHEST_PAIN": 0.75}
 FALL_PERSIST_FRAMES = 10
 
+# Cross-session micro-batching: one SkateFormer pass per batch of up to
+# BATCH_MAX_SIZE windows, flushed at most BATCH_MAX_WAIT_MS after the first.
+BATCH_MAX_SIZE = int(os.environ.get("ACTIVITY_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("ACTIVITY_BATCH_MAX_WAIT_MS", "20"))
+
+# Run SkateFormer every N new pose frames; fast hip motion forces a run.
+INFERENCE_STRIDE = int(os.environ.get("ACTIVITY_INFERENCE_STRIDE", str(INFERENCE_STRIDE)))
+
 # ── App init ──────────────────────────────────────────────────────────────────
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
@@ -81,6 +102,14 @@ yolo(np.zeros((640, 640, 3), dtype=np.uint8), classes=[0], verbose=False)
 
 print("[ActivityServer] Loading SkateFormer activity model...")
 skateformer_model = _load_model(device)
+inference_engine = None
+if skateformer_model is not None:
+    inference_engine = BatchInferenceEngine(
+        lambda windows: _predict_batch(skateformer_model, device, windows),
+        max_batch=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+    )
+    inference_engine.start()
 
 print("[ActivityServer] Loading dangerous object detector...")
 obj_detector = DangerousObjectDetector()
@@ -90,14 +119,22 @@ if obj_loaded:
 else:
     print("[ActivityServer]   Object detection disabled — model not found.")
 
+# Per-stage latency histograms + frame counters, shared by all sessions
+metrics = StageMetrics()
+
+# Person + dangerous-object YOLO share one letterboxed tensor per frame
+detection = DetectionStage(yolo, obj_detector if obj_loaded else None, metrics=metrics)
+
 
 # ── Per-session state ─────────────────────────────────────────────────────────
 class Session:
     """Holds per-patient pipeline state (pose buffer, smoothing buffer, wandering)."""
 
     def __init__(self):
-        self.pose_est = PoseEstimator()
-        self.probs_buffer = deque(maxlen=SMOOTH_WINDOW)
+        self.pose_est = PoseEstimator(inference_stride=INFERENCE_STRIDE,
+                                      motion_trigger=MOTION_TRIGGER_SPEED,
+                                      roi_padding=POSE_ROI_PADDING)
+        self.probs_buffer = ProbsSmoother(SMOOTH_WINDOW)
         self.wandering = WanderingDetector()
         self.last_pred = None
         self.last_conf = 0.0
@@ -155,34 +192,6 @@ def _decode_frame(frame_bytes):
     return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
 
 
-def _detect_person(frame):
-    """Run YOLO person detection. Returns (bbox_center, boxes_list_normalized)."""
-    results = yolo(frame, classes=[0], verbose=False)
-    boxes = results[0].boxes
-    h, w = frame.shape[:2]
-
-    center = None
-    person_boxes = []
-    if boxes is not None and len(boxes) > 0:
-        # Highest-confidence person box for tracking centre
-        best = boxes[boxes.conf.argmax()]
-        x1, y1, x2, y2 = best.xyxy[0].cpu().numpy()
-        center = (int((x1 + x2) / 2), int((y1 + y2) / 2))
-
-        # Return all person boxes (normalized) for the client to draw
-        for box in boxes:
-            bx1, by1, bx2, by2 = box.xyxy[0].cpu().numpy()
-            person_boxes.append({
-                "x1": round(float(bx1) / w, 4),
-                "y1": round(float(by1) / h, 4),
-                "x2": round(float(bx2) / w, 4),
-                "y2": round(float(by2) / h, 4),
-                "confidence": round(float(box.conf[0]), 3),
-            })
-
-    return center, person_boxes
-
-
 @app.route("/process-frame", methods=["POST"])
 def process_frame():
     if "frame" not in request.files:
@@ -191,42 +200,46 @@ def process_frame():
     patient_id = request.form.get("patient_id") or None
     sess = _get_session(patient_id)
 
+    t_frame = time.perf_counter()
     try:
         frame_bytes = request.files["frame"].read()
-        frame = _decode_frame(frame_bytes)
+        with metrics.time("decode"):
+            frame = _decode_frame(frame_bytes)
         h, w = frame.shape[:2]
 
-        # 1) Person detection
-        bbox_center, person_boxes = _detect_person(frame)
+        # 1) Person + dangerous-object detection (objects every OBJECT_DETECTION_INTERVAL s)
+        det = detection.run(frame)
+        bbox_center = det.center
 
-        # 2) Pose estimation → fills 64-frame buffer (no drawing — Flutter renders overlays)
-        _, kps = sess.pose_est.extract(frame, draw=False)
+        # 2) Pose estimation on the person box → fills 64-frame buffer
+        #    (no drawing — Flutter renders overlays)
+        with metrics.time("pose"):
+            _, kps = sess.pose_est.extract(frame, draw=False,
+                                           roi=det.best_bbox if POSE_ROI_ENABLED else None)
         pose_detected = kps is not None
 
-        # 3) Activity recognition (SkateFormer)
-        activity = None
-        confidence = 0.0
+        # 3) Activity recognition (SkateFormer) — only every INFERENCE_STRIDE
+        #    pose frames or on a motion trigger; in between, the last smoothed
+        #    prediction is reported.
         buffer_progress = 0
-        if skateformer_model is not None:
+        if inference_engine is not None:
             sk_input = sess.pose_est.get_skateformer_input()
+            if sk_input is None and sess.pose_est.buffer_len == WINDOW_SIZE:
+                metrics.incr("inference_skipped")    # stride: window reused
             if sk_input is not None:
-                probs = _predict(skateformer_model, device, sk_input)
-                sess.probs_buffer.append(probs)
-                avg_probs = np.mean(sess.probs_buffer, axis=0)
+                with metrics.time("skateformer"):    # includes batching wait
+                    probs = inference_engine.submit(sk_input)
+                sess.probs_buffer.append(probs, sess.pose_est.last_window_frames)
+                avg_probs = sess.probs_buffer.mean()
                 best_id = int(np.argmax(avg_probs))
                 best_conf = float(avg_probs[best_id])
                 pred_name = CLASS_NAMES[best_id]
                 threshold = CLASS_THRESHOLDS.get(pred_name, CONFIDENCE_THRESH)
-                if best_conf >= threshold:
-                    sess.last_pred = pred_name
-                    sess.last_conf = best_conf
-                    activity = pred_name
-                    confidence = best_conf
-                else:
-                    sess.last_pred = None
-                    sess.last_conf = best_conf
-                    confidence = best_conf
-            buffer_progress = min(len(sess.pose_est._buffer), 64)
+                sess.last_pred = pred_name if best_conf >= threshold else None
+                sess.last_conf = best_conf
+            buffer_progress = sess.pose_est.buffer_len
+        activity = sess.last_pred
+        confidence = sess.last_conf
 
         # 4) FALL persistence
         if sess.last_pred == "FALL":
@@ -240,7 +253,7 @@ def process_frame():
         is_wandering = sess.wandering.is_wandering
 
         # 6) Dangerous objects
-        obj_dets = obj_detector.detect(frame) if obj_loaded else []
+        obj_dets = det.objects
         dangerous_objects = [
             {
                 "label": d["label"],
@@ -251,6 +264,8 @@ def process_frame():
             for d in obj_dets
         ]
 
+        metrics.observe("pipeline", time.perf_counter() - t_frame)
+        metrics.incr("frames_processed")
         return jsonify({
             "activity": activity,
             "confidence": round(confidence, 3),
@@ -259,7 +274,7 @@ def process_frame():
             "pose_detected": pose_detected,
             "buffer_progress": buffer_progress,
             "buffer_target": 64,
-            "person_boxes": person_boxes,
+            "person_boxes": det.person_boxes_norm(),
             "dangerous_objects": dangerous_objects,
             "frame_size": {"w": w, "h": h},
         })
@@ -267,6 +282,7 @@ def process_frame():
     except Exception as e:
         import traceback
         traceback.print_exc()
+        metrics.incr("frames_failed")
         return jsonify({"error": str(e)}), 500
 
 
@@ -281,6 +297,27 @@ def reset_session():
     return jsonify({"reset": True, "patient_id": key})
 
 
+def _pose_timing():
+    """Pose-stage frame counts and mean ms per mode, summed over live sessions."""
+    totals = {}
+    resets = 0
+    with _sessions_lock:
+        stats = [s.pose_est.timing_stats() for s in _sessions.values()]
+    for st in stats:
+        resets += st.pop("graph_resets", 0)
+        for mode, v in st.items():
+            t = totals.setdefault(mode, {"frames": 0, "total_ms": 0.0})
+            t["frames"] += v["frames"]
+            t["total_ms"] += v["frames"] * v["mean_ms"]
+    out = {
+        mode: {"frames": t["frames"],
+               "mean_ms": round(t["total_ms"] / t["frames"], 2) if t["frames"] else 0.0}
+        for mode, t in totals.items()
+    }
+    out["graph_resets"] = resets
+    return out
+
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({
@@ -290,9 +327,17 @@ def health():
         "object_detection_loaded": obj_loaded,
         "active_sessions": len(_sessions),
         "classes": CLASS_NAMES,
+        "inference": inference_engine.stats() if inference_engine is not None else None,
+        "pose_timing": _pose_timing(),
+        "stages": metrics.snapshot(),
     })
 
 
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.prometheus_text(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     print(f"[ActivityServer] Listening on http://0.0.0.0:{PORT}")
     # Use waitress on Windows — Flask's dev server hits a click/_winconsole
@@ -0,0 +1,155 @@
+"""
+BatchInferenceEngine — cross-session micro-batching for SkateFormer.
+
+Request threads call submit(window) with a (3, 64, 24, 2) window and block
+until their probabilities are ready. A single worker thread:
+  1. waits for the first queued window
+  2. keeps collecting until max_batch windows are queued or max_wait_ms has
+     passed since the first one arrived
+  3. runs ONE batched forward pass and scatters each row back to its caller
+
+This replaces N concurrent batch-of-1 passes (all fighting over
+torch.set_num_threads) with one pass per window of time.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchInferenceEngine:
+    """Collects windows from many sessions and runs them as one batch."""
+
+    # Number of recent per-request wait times kept for the percentiles in stats()
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, predict_batch_fn, max_batch=8, max_wait_ms=20.0):
+        """
+        predict_batch_fn : callable(list of ndarray) -> ndarray (B, num_classes)
+        max_batch        : flush as soon as this many windows are queued
+        max_wait_ms      : flush at most this long after the first window arrived
+        """
+        self._predict_batch = predict_batch_fn
+        self._max_batch     = max(1, int(max_batch))
+        self._max_wait      = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue   = queue.Queue()
+        self._running = False
+        self._thread  = None
+
+        self._stats_lock     = threading.Lock()
+        self._batch_hist     = {}                       # batch size → count
+        self._waits_ms       = deque(maxlen=self.WAIT_SAMPLES)
+        self._total_requests = 0
+        self._total_batches  = 0
+        self._total_errors   = 0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread  = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)   # wake the worker
+
+    def submit(self, window, timeout=None):
+        """
+        Enqueue one (3, 64, 24, 2) window and block until its probability
+        vector is ready. Raises whatever the batched forward pass raised.
+        The window is copied: PoseEstimator hands out a ring-buffer view that
+        the next request for the same session may overwrite while queued.
+        """
+        fut = Future()
+        self._queue.put((np.array(window, copy=True), fut, time.perf_counter()))
+        return fut.result(timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _collect(self):
+        """Block for the first item, then gather more until full or timed out."""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch    = [first]
+        deadline = time.perf_counter() + self._max_wait
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            windows = [w for w, _, _ in batch]
+            try:
+                probs = np.asarray(self._predict_batch(windows))
+            except Exception as e:
+                with self._stats_lock:
+                    self._total_errors += len(batch)
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self._total_batches  += 1
+                self._total_requests += len(batch)
+                self._batch_hist[len(batch)] = self._batch_hist.get(len(batch), 0) + 1
+                for _, _, enqueued in batch:
+                    self._waits_ms.append((started - enqueued) * 1000.0)
+
+            for i, (_, fut, _) in enumerate(batch):
+                fut.set_result(probs[i])
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def stats(self):
+        """Snapshot for /health: queue depth, batch-size histogram, wait times (ms)."""
+        with self._stats_lock:
+            waits = np.array(self._waits_ms, dtype=np.float64)
+            hist  = dict(sorted(self._batch_hist.items()))
+            total_requests = self._total_requests
+            total_batches  = self._total_batches
+            total_errors   = self._total_errors
+
+        if waits.size:
+            wait_ms = {
+                "mean": round(float(waits.mean()), 2),
+                "p50":  round(float(np.percentile(waits, 50)), 2),
+                "p95":  round(float(np.percentile(waits, 95)), 2),
+                "max":  round(float(waits.max()), 2),
+            }
+        else:
+            wait_ms = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+
+        return {
+            "max_batch": self._max_batch,
+            "max_wait_ms": round(self._max_wait * 1000.0, 2),
+            "queue_depth": self._queue.qsize(),
+            "total_requests": total_requests,
+            "total_batches": total_batches,
+            "total_errors": total_errors,
+            "mean_batch_size": round(total_requests / total_batches, 2) if total_batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in hist.items()},
+            "wait_ms": wait_ms,
+        }
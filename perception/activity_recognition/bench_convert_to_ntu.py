@@ -0,0 +1,106 @@
+"""
+bench_convert_to_ntu.py
+-----------------------
+Parity + speed benchmark for the vectorized mediapipe_to_ntu /
+normalize_skeleton against the previous per-frame Python loops.
+
+Sizes: 1 frame (live PoseEstimator path), 64 frames (one window) and a
+10k-frame video (extract_keypoints_* scripts).
+
+Run from perception/activity_recognition:
+    python bench_convert_to_ntu.py [--repeat 20]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from data_preprocessing.convert_to_ntu import mediapipe_to_ntu, normalize_skeleton
+
+SIZES = (1, 64, 10_000)
+ATOL  = 1e-5   # float32 vs float64 reference
+
+
+# ---------------------------------------------------------------------------
+# Reference copies of the previous implementations
+# ---------------------------------------------------------------------------
+def mediapipe_to_ntu_loop(skeleton_33):
+    T = skeleton_33.shape[0]
+    ntu = np.zeros((T, 25, 3))
+
+    def midpoint(a, b):
+        return (a + b) / 2
+
+    for t in range(T):
+        s = skeleton_33[t]
+        hip_mid      = midpoint(s[23], s[24])
+        shoulder_mid = midpoint(s[11], s[12])
+        ntu[t, 0] = hip_mid
+        ntu[t, 1] = midpoint(hip_mid, shoulder_mid)
+        ntu[t, 2] = shoulder_mid
+        ntu[t, 3] = midpoint(s[7], s[8])
+        ntu[t, 4], ntu[t, 5], ntu[t, 6], ntu[t, 7] = s[11], s[13], s[15], s[19]
+        ntu[t, 8], ntu[t, 9], ntu[t, 10], ntu[t, 11] = s[12], s[14], s[16], s[20]
+        ntu[t, 12], ntu[t, 13], ntu[t, 14], ntu[t, 15] = s[23], s[25], s[27], s[31]
+        ntu[t, 16], ntu[t, 17], ntu[t, 18], ntu[t, 19] = s[24], s[26], s[28], s[32]
+        ntu[t, 20] = midpoint(s[11], s[12])
+        ntu[t, 21], ntu[t, 22], ntu[t, 23], ntu[t, 24] = s[19], s[21], s[20], s[22]
+    return ntu
+
+
+def normalize_skeleton_frame(ntu25):
+    hip  = ntu25[0].copy()
+    neck = ntu25[2].copy()
+    centered  = ntu25 - hip
+    torso_len = np.linalg.norm(neck - hip)
+    return (centered / (torso_len + 1e-6)).astype(np.float32)
+
+
+def old_pipeline(seq_33):
+    ntu = mediapipe_to_ntu_loop(seq_33)
+    return np.stack([normalize_skeleton_frame(ntu[t]) for t in range(len(ntu))], axis=0)
+
+
+def new_pipeline(seq_33):
+    return normalize_skeleton(mediapipe_to_ntu(seq_33))
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'frames':>8} {'max |diff|':>12} {'loop ms':>10} {'vector ms':>10} {'speedup':>9}")
+    for T in SIZES:
+        # MediaPipe-like normalized image coordinates
+        seq = rng.uniform(0.0, 1.0, size=(T, 33, 3)).astype(np.float32)
+
+        ref = old_pipeline(seq)
+        out = new_pipeline(seq)
+        assert out.shape == ref.shape == (T, 25, 3)
+        assert out.dtype == np.float32
+        diff = float(np.abs(out - ref).max())
+        assert np.allclose(out, ref, atol=ATOL), f"parity failed at T={T}: max diff {diff}"
+        assert np.allclose(mediapipe_to_ntu(seq), mediapipe_to_ntu_loop(seq), atol=ATOL)
+
+        repeat = max(1, args.repeat // 10) if T >= 10_000 else args.repeat
+        t_old = best_of(old_pipeline, seq, repeat)
+        t_new = best_of(new_pipeline, seq, repeat)
+        print(f"{T:>8} {diff:>12.2e} {t_old * 1e3:>10.3f} {t_new * 1e3:>10.3f} {t_old / t_new:>8.1f}x")
+
+    print("\nParity: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import socket
 import sys
 import time
 import threading
@@ -18,10 +19,13 @@ from config import (
     WANDERING_MIN_WALK_SECONDS, PAIN_MODEL_PATH, PAIN_FRAME_INTERVAL, PAIN_BASELINE_FRAMES,
     PAIN_ALERT_THRESH, PAIN_ALERT_PERSIST,
     ACCEL_ENABLED, HEADLESS_MODE,
+    INFERENCE_STRIDE, MOTION_TRIGGER_SPEED, SKATEFORMER_RUNTIME,
+    POSE_ROI_ENABLED, POSE_ROI_PADDING, METRICS_PORT,
 )
-from detector import detect_person
-from pose_estimator import PoseEstimator
+from pose_estimator import PoseEstimator, WINDOW_SIZE
 from object_detector import DangerousObjectDetector
+from detection_stage import DetectionStage
+from stage_metrics import StageMetrics, serve_metrics
 # Try to import PainClassifier (may fail in Docker due to relative imports)
 try:
     from ..emotion_recognition.pain_classifier import PainClassifier
@@ -38,9 +42,7 @@ except ImportError:
 # SkateFormer paths & config
 # ----------------------x------
 import os
-SKATEFORMER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "SkateFormer")
-CHECKPOINT      = Path(os.path.join(os.path.dirname(__file__), "work_dir", "sava_8class", "best_8class.pt"))
-CLASS_NAMES     = ["EAT", "DRINK", "SLEEP", "FALL", "WALK", "SIT", "STAND", "USE_PHONE"]
+from skateformer_runtime import CLASS_NAMES, load_skateformer
 
 # Overlay colours per label
 LABEL_COLORS = {
@@ -60,49 +62,12 @@ LABEL_COLORS = {
 # ---------------------------------------------------------------------------
 
 def _load_model(device):
-    """Load fine-tuned 8-class SkateFormer. Returns model or None if checkpoint missing."""
-    if not CHECKPOINT.exists():
-        print(f"  Checkpoint not found: {CHECKPOINT}")
-        print("   Run train_finetune_v2.py first. Running without activity recognition.")
-        return None
-
-    if SKATEFORMER_DIR not in sys.path:
-        sys.path.insert(0, SKATEFORMER_DIR)
-
-    try:
-        from model.SkateFormer import SkateFormer
-    except ImportError:
-        print("  SkateFormer model not found. Running without activity recognition.")
-        return None
-
-    model = SkateFormer(
-        in_channels=3,
-        depths=(2, 2, 2, 2),
-        channels=(96, 192, 192, 192),
-        num_classes=len(CLASS_NAMES),   # 8
-        embed_dim=96,
-        num_people=2,
-        num_frames=64,
-        num_points=24,
-        kernel_size=7,
-        num_heads=32,
-        type_1_size=(8, 8),
-        type_2_size=(8, 12),
-        type_3_size=(8, 8),
-        type_4_size=(8, 12),
-        attn_drop=0.5,
-        head_drop=0.0,
-        rel=True,
-        drop_path=0.2,
-        mlp_ratio=4.0,
-        index_t=True
-    ).to(device)
-
-    ckpt = torch.load(str(CHECKPOINT), map_location=device)
-    model.load_state_dict(ckpt["model"], strict=True)
-    model.eval()
-    print(f" Loaded 8-class SkateFormer from {CHECKPOINT}")
-    return model
+    """
+    Load the 8-class SkateFormer through the runtime chosen by SKATEFORMER_RUNTIME
+    (exported ONNX / TorchScript engine when present, eager PyTorch otherwise).
+    Returns a callable model or None if nothing could be loaded.
+    """
+    return load_skateformer(device, SKATEFORMER_RUNTIME)
 
 
 @torch.no_grad()
@@ -111,13 +76,71 @@ def _predict(model, device, skateformer_input):
     skateformer_input: ndarray (3, 64, 24, 2)
     Returns softmax probability vector (8,) as ndarray.
     """
-    x       = torch.from_numpy(skateformer_input).float().unsqueeze(0).to(device)
-    index_t = torch.arange(64, dtype=torch.long).unsqueeze(0).to(device)
+    return _predict_batch(model, device, [skateformer_input])[0]
+
+
+@torch.no_grad()
+def _predict_batch(model, device, skateformer_inputs):
+    """
+    skateformer_inputs: list of ndarray (3, 64, 24, 2)
+    Runs one forward pass over the whole batch.
+    Returns softmax probabilities (B, 8) as ndarray.
+    """
+    x       = torch.from_numpy(np.stack(skateformer_inputs, axis=0)).float().to(device)
+    index_t = torch.arange(64, dtype=torch.long).unsqueeze(0).expand(x.shape[0], -1).to(device)
     logits  = model(x, index_t)
-    probs   = torch.softmax(logits, dim=1)[0].cpu().numpy()
+    probs   = torch.softmax(logits, dim=1).cpu().numpy()
     return probs
 
 
+# ---------------------------------------------------------------------------
+# Temporal smoothing
+# ---------------------------------------------------------------------------
+
+class ProbsSmoother:
+    """
+    Frame-weighted moving average of SkateFormer probability vectors.
+
+    With stride-based scheduling each prediction stands for several pose
+    frames (PoseEstimator.last_window_frames), so a plain mean over the last
+    N predictions would cover N * stride frames and under-weight triggered
+    samples. Instead each sample carries a frame weight and the average
+    spans exactly the most recent `window_frames` frames.
+    """
+
+    def __init__(self, window_frames):
+        self.window_frames = window_frames
+        self._samples      = deque()   # (probs, frames)
+        self._frames       = 0
+
+    def append(self, probs, frames=1):
+        frames = max(1, int(frames))
+        self._samples.append((np.asarray(probs, dtype=np.float64), frames))
+        self._frames += frames
+        # Drop samples that fall completely outside the window
+        while self._frames - self._samples[0][1] >= self.window_frames:
+            _, old = self._samples.popleft()
+            self._frames -= old
+
+    @property
+    def frames_covered(self):
+        return min(self._frames, self.window_frames)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def mean(self):
+        """Weighted average over the last `window_frames` frames (oldest sample clipped)."""
+        overflow = max(0, self._frames - self.window_frames)
+        total    = None
+        weight   = 0
+        for i, (probs, frames) in enumerate(self._samples):
+            w = frames - overflow if i == 0 else frames
+            total   = probs * w if total is None else total + probs * w
+            weight += w
+        return total / weight
+
+
 # ---------------------------------------------------------------------------
 # Wandering Detector
 # ---------------------------------------------------------------------------
@@ -187,9 +210,13 @@ class WanderingDetector:
 
 DJANGO_API_URL = os.environ.get("DJANGO_API_URL", "http://192.168.1.3:8000/api")
 AI_FACE_SERVER_URL = os.environ.get("AI_FACE_SERVER_URL", "http://localhost:5000")
+# Identifies this camera to the face server (its orientation cache is per camera)
+CAMERA_ID = os.environ.get("CAMERA_ID", "").strip() or socket.gethostname()
 
 # How often to run face recognition (seconds) — not every frame
 FACE_RECOGNITION_INTERVAL = 5
+# Person crops sent in one /analyze-faces request while identifying
+FACE_BATCH_MAX_CROPS = 4
 
 # Cooldowns for activity alerts (seconds)
 _ALERT_COOLDOWNS = {
@@ -242,19 +269,26 @@ class PatientIdentifier:
         self._name_to_id_cache = {}
         # Tracking state
         self._known_embedding = None      # 128-d face embedding of identified patient
+        self._tracked_bbox = None         # person box the patient was last matched / tracked in
         self._tracking_lost_count = 0     # consecutive frames where tracking failed
 
-    def identify(self, frame, yolo_boxes):
+    def identify(self, frame, person_bbox, person_boxes=None):
         """
         Non-blocking. Returns the cached patient_id immediately.
         Kicks off background work every FACE_RECOGNITION_INTERVAL seconds.
+        person_bbox  : best (x1, y1, x2, y2) person box from DetectionResult, or None
+        person_boxes : all person boxes (DetectionResult.person_xyxy); while
+                       identifying, up to FACE_BATCH_MAX_CROPS of them are
+                       sent in one request so visitors don't hide the patient;
+                       while tracking, the one nearest the patient's last box
+                       is followed instead of the highest-confidence one
         """
         now = time.time()
         if self._busy or (now - self._last_check < FACE_RECOGNITION_INTERVAL):
             return self.patient_id
         self._last_check = now
 
-        if yolo_boxes is None or len(yolo_boxes) == 0:
+        if person_bbox is None:
             # No person in frame
             if self.state == self.STATE_TRACKING:
                 self._tracking_lost_count += 1
@@ -262,52 +296,95 @@ class PatientIdentifier:
                     self._transition_to_identifying("No person detected for multiple checks")
             return self.patient_id
 
-        # Crop the best person detection
-        best = yolo_boxes[yolo_boxes.conf.argmax()]
-        x1, y1, x2, y2 = [int(v) for v in best.xyxy[0].cpu().numpy()]
+        # Best person first, then the others
+        boxes = [person_bbox]
+        for box in (person_boxes if person_boxes is not None else []):
+            box = tuple(int(v) for v in box)
+            if box != person_bbox:
+                boxes.append(box)
+
+        if self.state == self.STATE_IDENTIFYING:
+            crops, crop_boxes = [], []
+            for box in boxes[:FACE_BATCH_MAX_CROPS]:
+                jpeg_bytes = self._crop_jpeg(frame, box)
+                if jpeg_bytes:
+                    crops.append(jpeg_bytes)
+                    crop_boxes.append(box)
+            if not crops:
+                return self.patient_id
+            self._busy = True
+            threading.Thread(target=self._do_face_recognition, args=(crops, crop_boxes), daemon=True).start()
+        else:
+            if self._tracked_bbox is not None:
+                self._tracked_bbox = self._nearest_box(self._tracked_bbox, boxes)
+            jpeg_bytes = self._crop_jpeg(frame, self._tracked_bbox or person_bbox)
+            if not jpeg_bytes:
+                return self.patient_id
+            self._busy = True
+            threading.Thread(target=self._do_tracking, args=(jpeg_bytes,), daemon=True).start()
+
+        return self.patient_id
+
+    @staticmethod
+    def _nearest_box(ref, boxes):
+        """The box overlapping ref the most (IoU), or with the nearest centre if none overlaps."""
+        def iou(a, b):
+            iw = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+            ih = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+            inter = iw * ih
+            union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+            return inter / union if union > 0 else 0.0
+
+        def centre_dist(a, b):
+            return ((a[0] + a[2] - b[0] - b[2]) ** 2 + (a[1] + a[3] - b[1] - b[3]) ** 2) ** 0.5
+
+        return max(boxes, key=lambda b: (iou(ref, b), -centre_dist(ref, b)))
+
+    @staticmethod
+    def _crop_jpeg(frame, bbox):
+        """JPEG bytes of the person box, or None if it is empty."""
+        x1, y1, x2, y2 = bbox
         h, w = frame.shape[:2]
         x1, y1 = max(0, x1), max(0, y1)
         x2, y2 = min(w, x2), min(h, y2)
         person_crop = frame[y1:y2, x1:x2]
 
         if person_crop.size == 0:
-            return self.patient_id
+            return None
 
         _, buf = cv2.imencode(".jpg", person_crop)
-        jpeg_bytes = buf.tobytes()
-
-        self._busy = True
-        if self.state == self.STATE_IDENTIFYING:
-            threading.Thread(target=self._do_face_recognition, args=(jpeg_bytes,), daemon=True).start()
-        else:
-            threading.Thread(target=self._do_tracking, args=(jpeg_bytes,), daemon=True).start()
-
-        return self.patient_id
+        return buf.tobytes()
 
     # ------------------------------------------------------------------
     # Phase 1: Face Recognition (runs until patient is identified)
     # ------------------------------------------------------------------
-    def _do_face_recognition(self, jpeg_bytes):
-        """Background thread: call /analyze-face to identify the patient."""
+    def _do_face_recognition(self, crops, crop_boxes):
+        """Background thread: call /analyze-faces once for all person crops to identify the patient."""
         try:
             resp = requests.post(
-                f"{AI_FACE_SERVER_URL}/analyze-face",
-                files={"frame": ("face.jpg", jpeg_bytes, "image/jpeg")},
-                data={"patient_id": "camera_auto"},
-                timeout=5,
+                f"{AI_FACE_SERVER_URL}/analyze-faces",
+                files=[("frames", (f"person_{i}.jpg", c, "image/jpeg")) for i, c in enumerate(crops)],
+                data={"patient_id": "camera_auto", "camera_id": CAMERA_ID},
+                timeout=5 + len(crops),
             )
             if resp.status_code != 200:
                 return
 
-            result = resp.json()
-            payload = result.get("payload", {})
-            person_name = payload.get("person_name")
-            is_known = payload.get("known", False)
+            # The first known face that is a patient (not a visiting relative)
+            pid = person_name = matched_image = matched_face = None
+            for image in resp.json().get("images", []):
+                for face in image.get("faces", []):
+                    payload = face.get("payload", {})
+                    if not payload.get("known", False) or not payload.get("person_name"):
+                        continue
+                    pid = self._resolve_patient_id(payload["person_name"])
+                    if pid:
+                        person_name = payload["person_name"]
+                        matched_image, matched_face = image["index"], face
+                        break
+                if pid:
+                    break
 
-            if not is_known or not person_name:
-                return  # Keep trying next interval
-
-            pid = self._resolve_patient_id(person_name)
             if pid:
                 first_time = pid != self.patient_id
                 self.patient_id = pid
@@ -316,8 +393,13 @@ class PatientIdentifier:
                     print(f" Patient identified: {person_name} (id={pid})")
                     _flush_pending_events(pid)
 
-                # Get embedding for tracking via /track-person
-                self._fetch_and_store_embedding(jpeg_bytes)
+                # Track the person box the patient's face was found in, seeded
+                # with that face's embedding (the crop may hold other faces too)
+                self._tracked_bbox = crop_boxes[matched_image]
+                if matched_face.get("embedding"):
+                    self._known_embedding = matched_face["embedding"]
+                else:
+                    self._fetch_and_store_embedding(crops[matched_image])
 
                 # Transition to tracking phase
                 self.state = self.STATE_TRACKING
@@ -417,6 +499,7 @@ class PatientIdentifier:
         if _env_pid:
             # Patient is pinned via env var — don't clear the ID, just reset tracking
             self._known_embedding = None
+            self._tracked_bbox = None
             self._tracking_lost_count = 0
             return
         if self.patient_id is not None:
@@ -424,6 +507,7 @@ class PatientIdentifier:
         self.patient_id = None
         self.patient_name = None
         self._known_embedding = None
+        self._tracked_bbox = None
         self._tracking_lost_count = 0
         self.state = self.STATE_IDENTIFYING
 
@@ -589,41 +673,6 @@ def _send_object_detection_event(patient_id, detections):
 # Camera helpers
 # ---------------------------------------------------------------------------
 
-def _get_bbox_center(frame_before, frame_after):
-    """
-    Extract the centre of the first detected person bounding box.
-    We compare annotated frames — instead, detector.py is called separately,
-    so we pass the raw detections through a lightweight re-use pattern.
-    Returns (cx, cy) or None.
-    """
-    # detect_person() draws on the frame but doesn't return boxes.
-    # For the wandering tracker we use a simple colour-independent approach:
-    # re-run ultralytics on the frame to get boxes.
-    return None  # placeholder — see _detect_and_get_center() below
-
-
-def _detect_and_get_center(frame, yolo_model):
-    """
-    Run YOLO, draw boxes, and return centre + all boxes + best person bbox.
-    Returns (annotated_frame, (cx, cy) or None, boxes, (x1,y1,x2,y2) or None).
-    boxes       — all YOLO person boxes (needed by PatientIdentifier)
-    person_bbox — single best-confidence bbox tuple (needed for pain crop)
-    """
-    results   = yolo_model(frame, classes=[0], verbose=False, device='cpu')
-    annotated = results[0].plot()
-
-    center = None
-    bbox   = None
-    boxes  = results[0].boxes
-    if boxes is not None and len(boxes) > 0:
-        best            = boxes[boxes.conf.argmax()]
-        x1, y1, x2, y2 = best.xyxy[0].cpu().numpy()
-        center          = (int((x1 + x2) / 2), int((y1 + y2) / 2))
-        bbox            = (int(x1), int(y1), int(x2), int(y2))
-
-    return annotated, center, boxes, bbox
-
-
 def _face_crop_from_bbox(frame, bbox):
     """
     Crop the upper 30% of a YOLO person bounding box as a face region.
@@ -673,7 +722,9 @@ def run_camera():
     yolo = YOLO(yolo_path)
 
     model      = _load_model(device)
-    pose_est   = PoseEstimator()
+    pose_est   = PoseEstimator(inference_stride=INFERENCE_STRIDE,
+                               motion_trigger=MOTION_TRIGGER_SPEED,
+                               roi_padding=POSE_ROI_PADDING)
     wandering  = WanderingDetector()
     identifier = PatientIdentifier()
 
@@ -682,6 +733,16 @@ def run_camera():
     if not obj_loaded:
         print("⚠️  Object detection disabled — model not found.")
 
+    # Per-stage latency histograms + dropped/skipped counters
+    metrics = StageMetrics()
+    if HEADLESS_MODE and METRICS_PORT:
+        serve_metrics(metrics, METRICS_PORT)
+        print(f"📈 Metrics on http://0.0.0.0:{METRICS_PORT}/metrics")
+
+    # Person + dangerous-object YOLO share one letterboxed tensor per frame
+    detection = DetectionStage(yolo, obj_detector if obj_loaded else None, device='cpu',
+                               metrics=metrics)
+
     # Accelerometer — graceful fallback if hardware not connected or smbus2 not installed
     accel = None
     if ACCEL_ENABLED:
@@ -713,6 +774,7 @@ def run_camera():
     # Both are independent of SkateFormer inference speed.
     _PI_API_KEY      = os.environ.get("PI_API_KEY", "sava-pi-dev-key")
     _latest_raw      = None
+    _raw_fresh       = [False]   # _latest_raw not yet picked up by the main loop
     _raw_lock        = threading.Lock()
     _cap_stop        = [False]
     _ai_state        = [{"person_boxes": [], "activity": None, "confidence": 0.0}]
@@ -727,7 +789,10 @@ def run_camera():
                 continue
             f = cv2.resize(f, (FRAME_WIDTH, FRAME_HEIGHT))
             with _raw_lock:
-                _latest_raw = f
+                if _raw_fresh[0]:
+                    metrics.incr("frames_dropped")   # overwritten before processing
+                _latest_raw   = f
+                _raw_fresh[0] = True
 
     def _stream_loop():
         import json as _json
@@ -755,17 +820,24 @@ def run_camera():
                 ])
                 with _ai_state_lock:
                     ai_payload = _json.dumps(_ai_state[0])
-                r = sess.post(
-                    f"{DJANGO_API_URL}/stream/push-frame",
-                    headers={"X-Api-Key": _PI_API_KEY},
-                    files={"frame": ("f.jpg", buf.tobytes(), "image/jpeg")},
-                    data={"patient_id": pid, "accel_x": ax, "accel_y": ay, "accel_z": az,
-                          "detections": dets_payload, "ai_state": ai_payload},
-                    timeout=8,
-                )
+                with metrics.time("stream_post"):
+                    r = sess.post(
+                        f"{DJANGO_API_URL}/stream/push-frame",
+                        headers={"X-Api-Key": _PI_API_KEY},
+                        files={"frame": ("f.jpg", buf.tobytes(), "image/jpeg")},
+                        data={"patient_id": pid, "accel_x": ax, "accel_y": ay, "accel_z": az,
+                              "detections": dets_payload, "ai_state": ai_payload},
+                        timeout=8,
+                    )
+                metrics.incr("stream_posts")
                 if r.status_code not in (200, 202):
+                    metrics.incr("stream_errors")
                     print(f"[stream] {r.status_code}: {r.text[:80]}")
+            except requests.Timeout:
+                metrics.incr("stream_timeouts")
+                print("[stream] timeout")
             except Exception as e:
+                metrics.incr("stream_errors")
                 print(f"[stream] error: {e}")
         sess.close()
 
@@ -779,6 +851,8 @@ def run_camera():
         time.sleep(0.05)
 
     recorder = initialize_recorder()
+    # Only render boxes / skeleton when someone can see the frame
+    annotate = not HEADLESS_MODE or recorder is not None
 
     print(" Camera started successfully.")
     print(" Waiting for face recognition to identify patient...")
@@ -798,30 +872,46 @@ def run_camera():
     FALL_PERSIST_FRAMES  = 5
     DRINK_PERSIST_FRAMES = 12    # DRINK must hold N frames before confirming
     DRINK_EAT_MARGIN     = 0.45  # DRINK needs 45% lead over EAT to win
-    probs_buffer         = deque(maxlen=SMOOTH_WINDOW)
+    probs_buffer         = ProbsSmoother(SMOOTH_WINDOW)
+    POSE_REPORT_INTERVAL = 60    # seconds between pose ROI/full-frame timing logs
+    last_pose_report     = time.time()
 
     while True:
+        t_frame = time.perf_counter()
         with _raw_lock:
             frame = _latest_raw.copy()
-        raw_frame = frame.copy()  # Keep a clean copy for face recognition
+            _raw_fresh[0] = False
+        # Keep a clean copy for face recognition (only needed if we draw on frame)
+        raw_frame = frame.copy() if annotate else frame
 
-        # 1️⃣ Person Detection (YOLO) — boxes for face recognition, bbox for pain crop
-        frame, bbox_center, yolo_boxes, person_bbox = _detect_and_get_center(frame, yolo)
+        # 1️⃣ Detection (YOLO person + dangerous objects, one shared tensor) —
+        #    bbox for face recognition / pain crop, centre for wandering
+        det = detection.run(frame, annotate=annotate)
+        bbox_center, person_bbox = det.center, det.best_bbox
 
         # 2️ Face Recognition — identify patient from detected person
-        patient_id = identifier.identify(raw_frame, yolo_boxes)
+        with metrics.time("face_id"):
+            patient_id = identifier.identify(raw_frame, person_bbox, det.person_xyxy)
 
-        # 3️ Pose Estimation (MediaPipe) — fills 64-frame sliding window
-        frame, _ = pose_est.extract(frame, draw=True)
+        # 3️ Pose Estimation (MediaPipe on the person box) — fills 64-frame sliding window
+        with metrics.time("pose"):
+            frame, _ = pose_est.extract(frame, draw=annotate,
+                                        roi=person_bbox if POSE_ROI_ENABLED else None)
+        if time.time() - last_pose_report >= POSE_REPORT_INTERVAL:
+            last_pose_report = time.time()
+            print(f"[pose] {pose_est.timing_stats()}")
 
         # 4️ Activity Recognition (SkateFormer)
         if model is not None:
             sk_input = pose_est.get_skateformer_input()
+            if sk_input is None and pose_est.buffer_len == WINDOW_SIZE:
+                metrics.incr("inference_skipped")    # stride: window reused
             if sk_input is not None:
-                probs = _predict(model, device, sk_input)
-                probs_buffer.append(probs)
+                with metrics.time("skateformer"):
+                    probs = _predict(model, device, sk_input)
+                probs_buffer.append(probs, pose_est.last_window_frames)
                 # Average across recent frames to smooth out noise
-                avg_probs = np.mean(probs_buffer, axis=0)
+                avg_probs = probs_buffer.mean()
                 best_id   = int(np.argmax(avg_probs))
                 best_conf = float(avg_probs[best_id])
                 pred_name = CLASS_NAMES[best_id]
@@ -856,24 +946,16 @@ def run_camera():
             fall_consec = 0
 
         # Share person boxes + activity with _stream_loop for Flutter AR overlay
-        _h, _w = frame.shape[:2]
-        _person_boxes = []
-        if yolo_boxes is not None:
-            for _box in yolo_boxes:
-                _x1, _y1, _x2, _y2 = _box.xyxy[0].tolist()
-                _person_boxes.append({
-                    "x1": round(_x1 / _w, 4), "y1": round(_y1 / _h, 4),
-                    "x2": round(_x2 / _w, 4), "y2": round(_y2 / _h, 4),
-                })
         with _ai_state_lock:
             _ai_state[0] = {
-                "person_boxes": _person_boxes,
+                "person_boxes": det.person_boxes_norm(with_confidence=False),
                 "activity": last_pred,
                 "confidence": round(last_conf, 3),
             }
 
-        # 5️ Dangerous Object Detection (runs every OBJECT_DETECTION_INTERVAL seconds)
-        obj_detections = obj_detector.detect(raw_frame)
+        # 5️ Dangerous Object Detection (ran in the detection stage every
+        #    OBJECT_DETECTION_INTERVAL seconds; cached in between)
+        obj_detections = det.objects
 
         # 6️ Wandering Detection (only meaningful when label is confident)
         wandering.update(last_pred or "", bbox_center)
@@ -907,7 +989,9 @@ def run_camera():
         # FPS control
         current_time = time.time()
         elapsed      = current_time - prev_time
+        metrics.observe("pipeline", time.perf_counter() - t_frame)
         if elapsed < 1.0 / TARGET_FPS:
+            metrics.incr("frames_skipped")   # over TARGET_FPS — no pain / overlay
             continue
         fps       = 1.0 / elapsed if elapsed > 0 else 0
         prev_time = current_time
@@ -916,12 +1000,14 @@ def run_camera():
         #    Falls back to EfficientNet-B0 when pain_efficientnet_b0.pt is available.
         frame_count += 1
         if frame_count % PAIN_FRAME_INTERVAL == 0:
-            if pain_clf is not None and pain_clf._model is not None:
-                face_crop = _face_crop_from_bbox(frame, person_bbox)
-                if face_crop is not None:
-                    last_pain_prob = pain_clf.predict(face_crop)
-            elif pain_det is not None:
-                last_pain_prob = pain_det.predict(frame)
+            with metrics.time("pain"):
+                if pain_clf is not None and pain_clf._model is not None:
+                    face_crop = _face_crop_from_bbox(frame, person_bbox)
+                    if face_crop is not None:
+                        last_pain_prob = pain_clf.predict(face_crop)
+                elif pain_det is not None:
+                    last_pain_prob = pain_det.predict(frame)
+        t_overlay = time.perf_counter()
 
         # ----------------------------------------------------------------
         # Overlay rendering
@@ -949,8 +1035,8 @@ def run_camera():
 
         # Activity label
         if model is not None:
-            if len(probs_buffer) < SMOOTH_WINDOW:
-                act_text  = f"Collecting frames... ({len(probs_buffer)}/{SMOOTH_WINDOW})"
+            if probs_buffer.frames_covered < SMOOTH_WINDOW:
+                act_text  = f"Collecting frames... ({probs_buffer.frames_covered}/{SMOOTH_WINDOW})"
                 act_color = (180, 180, 180)
             elif last_pred is not None:
                 act_text  = f"{last_pred}  ({last_conf * 100:.1f}%)"
@@ -1014,6 +1100,8 @@ def run_camera():
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
                 y_off += 30
 
+        metrics.observe("overlay", time.perf_counter() - t_overlay)
+
         if not HEADLESS_MODE:
             cv2.imshow("SAVA - Alzheimer Monitoring", frame)
 
@@ -14,6 +14,34 @@ FRAME_WIDTH  = 640
 FRAME_HEIGHT = 480
 TARGET_FPS   = 15
 
+# SkateFormer Runtime
+# "auto" prefers an exported ONNX / TorchScript engine next to best_8class.pt
+# (see export_skateformer.py), else eager PyTorch. Also "onnx", "torchscript", "eager",
+# and "int8" for the quantized model from quantize_skateformer.py (use this on the Pi).
+SKATEFORMER_RUNTIME = _os.environ.get("SKATEFORMER_RUNTIME", "auto")
+
+# SkateFormer Inference Scheduling
+# Run SkateFormer every N new pose frames instead of on every frame once the
+# 64-frame window is full (consecutive windows differ by a single frame).
+INFERENCE_STRIDE = 4
+# Hip-centre speed (torso lengths per frame) that forces an immediate
+# inference regardless of stride — keeps FALL latency at one frame.
+MOTION_TRIGGER_SPEED = 0.15
+
+# Pose ROI
+# Run MediaPipe on the padded YOLO person box instead of the full frame
+# (falls back to the full frame when there is no box or no pose in the crop).
+# Off until the "[pose]" timing_stats() lines show roi beating full on the Pi;
+# SAVA_POSE_ROI=1 turns it on.
+POSE_ROI_ENABLED = _os.environ.get("SAVA_POSE_ROI", "0") == "1"
+POSE_ROI_PADDING = 0.25   # fraction of box width/height added on each side
+
+# Metrics
+# Per-stage latency + dropped/skipped frame counters (stage_metrics.py) are
+# served as Prometheus text on http://<pi>:METRICS_PORT/metrics when headless.
+# 0 disables the endpoint.
+METRICS_PORT = int(_os.environ.get("SAVA_METRICS_PORT", "9108"))
+
 # Recording Settings
 ENABLE_RECORDING  = False
 OUTPUT_VIDEO_NAME = "output.avi"
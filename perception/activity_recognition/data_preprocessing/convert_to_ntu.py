@@ -1,9 +1,31 @@
 import numpy as np
 
+# NTU joint ← MediaPipe landmark(s). Joints built from several landmarks are
+# the plain average of them (midpoints, and mid-spine = mean of hips+shoulders).
+_NTU_FROM_MEDIAPIPE = [
+    (23, 24),            # 0  hip center
+    (23, 24, 11, 12),    # 1  mid-spine (between hip and shoulder midpoints)
+    (11, 12),            # 2  neck ≈ shoulder midpoint (matches Kinect "Neck")
+    (7, 8),              # 3  head ≈ ear midpoint (matches Kinect "Head")
+    (11,), (13,), (15,), (19,),   # 4-7   left arm
+    (12,), (14,), (16,), (20,),   # 8-11  right arm
+    (23,), (25,), (27,), (31,),   # 12-15 left leg
+    (24,), (26,), (28,), (32,),   # 16-19 right leg
+    (11, 12),            # 20 spine shoulder
+    (19,), (21,),        # 21-22 left fingertip, thumb
+    (20,), (22,),        # 23-24 right fingertip, thumb
+]
+
+# (25, 33) gather/averaging matrix: ntu[t] = MEDIAPIPE_TO_NTU @ skeleton_33[t]
+MEDIAPIPE_TO_NTU = np.zeros((25, 33), dtype=np.float32)
+for _j, _src in enumerate(_NTU_FROM_MEDIAPIPE):
+    MEDIAPIPE_TO_NTU[_j, list(_src)] = 1.0 / len(_src)
+
+
 def mediapipe_to_ntu(skeleton_33):
     """
     skeleton_33: (T, 33, 3)
-    return: (T, 25, 3)
+    return: (T, 25, 3) float32
 
     NTU joint mapping (0-indexed):
       0=hip_center, 1=spine_mid, 2=neck, 3=head,
@@ -13,69 +35,24 @@ def mediapipe_to_ntu(skeleton_33):
       16=r_hip, 17=r_knee, 18=r_ankle, 19=r_foot,
       20=spine_shoulder, 21=l_fingertip, 22=l_thumb,
       23=r_fingertip, 24=r_thumb
-    """
-
-    T = skeleton_33.shape[0]
-    ntu = np.zeros((T, 25, 3))
-
-    def midpoint(a, b):
-        return (a + b) / 2
-
-    for t in range(T):
-        s = skeleton_33[t]
-
-        hip_mid      = midpoint(s[23], s[24])
-        shoulder_mid = midpoint(s[11], s[12])
-
-        ntu[t, 0] = hip_mid                      # hip center
-        ntu[t, 1] = midpoint(hip_mid, shoulder_mid)  # mid-spine (between hip and shoulders)
-        ntu[t, 2] = shoulder_mid                 # neck ≈ shoulder midpoint (matches Kinect "Neck")
-        ntu[t, 3] = midpoint(s[7], s[8])         # head ≈ ear midpoint (matches Kinect "Head")
-
-        ntu[t, 4] = s[11]
-        ntu[t, 5] = s[13]
-        ntu[t, 6] = s[15]
-        ntu[t, 7] = s[19]
 
-        ntu[t, 8] = s[12]
-        ntu[t, 9] = s[14]
-        ntu[t,10] = s[16]
-        ntu[t,11] = s[20]
-
-        ntu[t,12] = s[23]
-        ntu[t,13] = s[25]
-        ntu[t,14] = s[27]
-        ntu[t,15] = s[31]
-
-        ntu[t,16] = s[24]
-        ntu[t,17] = s[26]
-        ntu[t,18] = s[28]
-        ntu[t,19] = s[32]
-
-        ntu[t,20] = midpoint(s[11], s[12])
-
-        ntu[t,21] = s[19]
-        ntu[t,22] = s[21]
-        ntu[t,23] = s[20]
-        ntu[t,24] = s[22]
-
-    return ntu
+    One matrix product covers the whole sequence: (25, 33) @ (T, 33, 3).
+    """
+    skeleton_33 = np.asarray(skeleton_33, dtype=np.float32)
+    return np.matmul(MEDIAPIPE_TO_NTU, skeleton_33)
 
 
 def normalize_skeleton(ntu25):
     """
-    Normalize one skeleton frame so coordinates are scale- and position-invariant.
+    Normalize skeleton frame(s) so coordinates are scale- and position-invariant.
     This ensures MediaPipe (0–1 range) and Kinect (meters) data live in the same space.
 
-    ntu25: (25, 3) — one frame in any coordinate system
-    returns: (25, 3) — centered on hip, scaled by torso length
+    ntu25: (25, 3) one frame, or (T, 25, 3) a sequence — any coordinate system
+    returns: same shape float32 — each frame centered on its hip, scaled by its torso length
     """
-    hip  = ntu25[0].copy()   # NTU joint 0 = hip center
-    neck = ntu25[2].copy()   # NTU joint 2 = neck
-
-    centered = ntu25 - hip
-
-    torso_len = np.linalg.norm(neck - hip)
-    normalized = centered / (torso_len + 1e-6)
+    ntu25 = np.asarray(ntu25, dtype=np.float32)
+    hip   = ntu25[..., 0:1, :]   # NTU joint 0 = hip center
+    neck  = ntu25[..., 2:3, :]   # NTU joint 2 = neck
 
-    return normalized.astype(np.float32)
\ No newline at end of file
+    torso_len = np.linalg.norm(neck - hip, axis=-1, keepdims=True)
+    return (ntu25 - hip) / (torso_len + 1e-6)
@@ -0,0 +1,152 @@
+"""
+DetectionStage — one preprocessing pass shared by every YOLO model.
+
+Each frame is letterboxed once to a stride-aligned RGB float tensor
+(LetterboxedFrame). The yolov8n person model and the dangerous-object model
+both run on that same tensor instead of each re-resizing / re-normalizing
+the frame, and boxes are mapped back to frame pixels once.
+
+The stage publishes a single DetectionResult that the patient identifier,
+wandering detector, pain crop, stream overlay state and renderer all read.
+Drawing is optional: with annotate=False (headless, no recorder) nothing is
+rendered — there is no equivalent of ultralytics' results.plot() copy.
+
+Given a StageMetrics (stage_metrics.py), the two models are timed as
+"detect_person" and "detect_objects".
+"""
+
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+import torch
+
+PERSON_BOX_COLOR = (0, 255, 0)
+
+
+class LetterboxedFrame:
+    """
+    BGR uint8 frame → (1, 3, H, W) RGB float32 tensor in [0, 1], resized to
+    fit `imgsz` and padded (grey 114, like ultralytics) to a multiple of
+    `stride`. Keeps the scale/padding needed to map boxes back.
+    """
+
+    def __init__(self, frame, imgsz=640, stride=32):
+        h, w = frame.shape[:2]
+        self.shape = (h, w)
+        self.ratio = min(imgsz / h, imgsz / w)
+        new_w, new_h = int(round(w * self.ratio)), int(round(h * self.ratio))
+
+        resized = frame
+        if (new_w, new_h) != (w, h):
+            resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        pad_w, pad_h = (-new_w) % stride, (-new_h) % stride
+        left, top = pad_w // 2, pad_h // 2
+        if pad_w or pad_h:
+            resized = cv2.copyMakeBorder(resized, top, pad_h - top, left, pad_w - left,
+                                         cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        self.pad = (left, top)
+
+        # HWC BGR → CHW RGB, one contiguous copy, then scale in place
+        chw = np.ascontiguousarray(resized[:, :, ::-1].transpose(2, 0, 1))
+        self.tensor = torch.from_numpy(chw).unsqueeze(0).float().div_(255.0)
+
+    def to_frame(self, xyxy):
+        """(N, 4) boxes in tensor pixels → frame pixels, clipped to the frame."""
+        boxes = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4).copy()
+        boxes[:, [0, 2]] -= self.pad[0]
+        boxes[:, [1, 3]] -= self.pad[1]
+        boxes /= self.ratio
+        h, w = self.shape
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+        return boxes
+
+
+class DetectionResult:
+    """Person + dangerous-object detections for one frame, in frame pixels."""
+
+    def __init__(self, frame_shape, person_xyxy, person_conf, objects):
+        self.frame_shape  = frame_shape
+        self.person_xyxy  = person_xyxy     # (N, 4) float32
+        self.person_conf  = person_conf     # (N,) float32
+        self.objects      = objects         # DangerousObjectDetector dicts
+
+        self.best_bbox = None               # (x1, y1, x2, y2) ints, highest confidence
+        self.center    = None               # (cx, cy) of best_bbox
+        if len(person_conf):
+            x1, y1, x2, y2 = person_xyxy[int(np.argmax(person_conf))]
+            self.best_bbox = (int(x1), int(y1), int(x2), int(y2))
+            self.center    = (int((x1 + x2) / 2), int((y1 + y2) / 2))
+
+    @property
+    def has_person(self):
+        return self.best_bbox is not None
+
+    def person_boxes_norm(self, with_confidence=True):
+        """Person boxes as normalized dicts for JSON payloads (Flutter overlay)."""
+        h, w = self.frame_shape
+        boxes = []
+        for (x1, y1, x2, y2), conf in zip(self.person_xyxy, self.person_conf):
+            box = {
+                "x1": round(float(x1) / w, 4),
+                "y1": round(float(y1) / h, 4),
+                "x2": round(float(x2) / w, 4),
+                "y2": round(float(y2) / h, 4),
+            }
+            if with_confidence:
+                box["confidence"] = round(float(conf), 3)
+            boxes.append(box)
+        return boxes
+
+    def draw_persons(self, frame):
+        """Draw person boxes in place (replaces ultralytics results.plot())."""
+        for (x1, y1, x2, y2), conf in zip(self.person_xyxy.astype(int), self.person_conf):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), PERSON_BOX_COLOR, 2)
+            cv2.putText(frame, f"person {conf:.2f}", (x1, max(y1 - 6, 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, PERSON_BOX_COLOR, 1)
+        return frame
+
+
+class DetectionStage:
+    """Runs the person model and (optionally) the dangerous-object model on one shared tensor."""
+
+    def __init__(self, person_model, object_detector=None, imgsz=640, device=None, metrics=None):
+        self._person_model = person_model
+        self._objects      = object_detector
+        self._imgsz        = imgsz
+        self._predict_kw   = {"device": device} if device else {}
+        self._metrics      = metrics
+
+    def _timed(self, stage):
+        return self._metrics.time(stage) if self._metrics is not None else nullcontext()
+
+    def run(self, frame, annotate=False):
+        """
+        Detect on `frame`. When annotate=True person boxes are drawn onto
+        `frame` in place. Returns a DetectionResult.
+        """
+        with self._timed("detect_person"):
+            lb = LetterboxedFrame(frame, self._imgsz)
+
+            results = self._person_model(lb.tensor, classes=[0], verbose=False, **self._predict_kw)
+            boxes = results[0].boxes
+            if boxes is not None and len(boxes) > 0:
+                person_xyxy = lb.to_frame(boxes.xyxy.cpu().numpy())
+                person_conf = boxes.conf.cpu().numpy().astype(np.float32)
+            else:
+                person_xyxy = np.zeros((0, 4), dtype=np.float32)
+                person_conf = np.zeros((0,), dtype=np.float32)
+
+        objects = []
+        if self._objects is not None and self._objects.is_loaded:
+            # Only real model runs are timed — cached interval hits would
+            # drag the percentiles towards zero.
+            with self._timed("detect_objects") if self._objects.due else nullcontext():
+                objects = self._objects.detect(frame, letterboxed=lb)
+
+        result = DetectionResult(lb.shape, person_xyxy, person_conf, objects)
+        if annotate:
+            result.draw_persons(frame)
+        return result
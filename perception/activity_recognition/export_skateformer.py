@@ -0,0 +1,178 @@
+"""
+export_skateformer.py
+---------------------
+Exports work_dir/sava_8class/best_8class.pt to deployable artifacts that
+camera._load_model picks up automatically (SKATEFORMER_RUNTIME=auto):
+
+  best_8class.ts    traced TorchScript   (torch only)
+  best_8class.onnx  ONNX graph           (onnxruntime; export also needs `onnx`)
+
+Both graphs take x=(B, 3, 64, 24, 2) float32 and index_t=(B, 64) int64.
+The ONNX graph is exported with a dynamic batch axis, so activity_server's
+micro-batches (up to ACTIVITY_BATCH_MAX_SIZE) run in one call. The traced
+TorchScript graph is fixed at B=--batch-size and the runtime pads/splits
+other batch sizes to B: keep the default 1 for camera.py, or pass the
+server's ACTIVITY_BATCH_MAX_SIZE when activity_server runs TorchScript.
+
+After exporting, every engine is checked against eager PyTorch on saved
+keypoint windows (max |Δprob| and argmax agreement) and timed on this CPU.
+
+Run from perception/activity_recognition:
+    python export_skateformer.py [--format both] [--batch-size 1]
+                                 [--windows data/keypoints_v2] [--num-windows 64]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from skateformer_runtime import (
+    CHECKPOINT,
+    NUM_FRAMES,
+    ONNX_PATH,
+    TORCHSCRIPT_PATH,
+    OnnxEngine,
+    TorchScriptEngine,
+    build_eager_model,
+)
+
+DEFAULT_WINDOWS_DIR = Path(__file__).resolve().parent / "data" / "keypoints_v2"
+PARITY_ATOL = 1e-4   # on softmax probabilities
+
+
+def _example_inputs(batch_size):
+    x       = torch.zeros((batch_size, 3, NUM_FRAMES, 24, 2), dtype=torch.float32)
+    index_t = torch.arange(NUM_FRAMES, dtype=torch.long).unsqueeze(0).expand(batch_size, -1).contiguous()
+    return x, index_t
+
+
+def export_torchscript(model, batch_size):
+    x, index_t = _example_inputs(batch_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, (x, index_t), check_trace=False)
+    meta = {"batch_size": batch_size, "checkpoint": CHECKPOINT.name, "num_frames": NUM_FRAMES}
+    torch.jit.save(traced, str(TORCHSCRIPT_PATH), _extra_files={"meta.json": json.dumps(meta)})
+    print(f"  TorchScript → {TORCHSCRIPT_PATH}")
+
+
+def export_onnx(model, batch_size, opset):
+    # Trace with B >= 2 so no shape gets specialised to a size-1 batch
+    x, index_t = _example_inputs(max(2, batch_size))
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (x, index_t), str(ONNX_PATH),
+            input_names=["x", "index_t"],
+            output_names=["logits"],
+            dynamic_axes={"x": {0: "batch"}, "index_t": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    print(f"  ONNX        → {ONNX_PATH}")
+
+
+# ---------------------------------------------------------------------------
+# Verification
+# ---------------------------------------------------------------------------
+
+def load_windows(windows_dir, limit):
+    """Saved (3, 64, 24, 2) training windows; random windows if none are found."""
+    files = sorted(Path(windows_dir).rglob("*.npy"))[:limit] if windows_dir else []
+    if files:
+        print(f"  Parity windows: {len(files)} from {windows_dir}")
+        return np.stack([np.load(f).astype(np.float32) for f in files], axis=0)
+    print(f"  No saved windows under {windows_dir} — using {limit} random windows.")
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((limit, 3, NUM_FRAMES, 24, 2)).astype(np.float32)
+
+
+@torch.no_grad()
+def _probs(model, windows):
+    x       = torch.from_numpy(windows)
+    index_t = torch.arange(NUM_FRAMES, dtype=torch.long).unsqueeze(0).expand(x.shape[0], -1)
+    return torch.softmax(model(x, index_t), dim=1).numpy()
+
+
+@torch.no_grad()
+def _latency_ms(model, windows, batch, repeat):
+    """Median wall time (ms) of one forward pass over `batch` windows."""
+    x       = torch.from_numpy(windows[:batch])
+    index_t = torch.arange(NUM_FRAMES, dtype=torch.long).unsqueeze(0).expand(x.shape[0], -1)
+    model(x, index_t)   # warm-up
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        model(x, index_t)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(times))
+
+
+def verify(eager, engines, windows, batch_size, repeat):
+    ref     = _probs(eager, windows)
+    ref_cls = ref.argmax(axis=1)
+
+    print("\nParity vs eager (softmax probabilities):")
+    failed = []
+    for name, engine in engines.items():
+        out   = _probs(engine, windows)
+        diff  = float(np.abs(out - ref).max())
+        agree = float((out.argmax(axis=1) == ref_cls).mean())
+        passed = diff <= PARITY_ATOL and agree == 1.0
+        if not passed:
+            failed.append(name)
+        print(f"  {name:<12} max|Δ|={diff:.2e}  argmax agreement={agree:.2%}  {'OK' if passed else 'FAIL'}")
+
+    batches = sorted({1, batch_size})
+    print(f"\nCPU latency (median of {repeat}, torch threads={torch.get_num_threads()}):")
+    print(f"  {'runtime':<12}" + "".join(f"{f'B={b} ms':>12}" for b in batches))
+    for name, engine in {"eager": eager, **engines}.items():
+        row = "".join(f"{_latency_ms(engine, windows, b, repeat):>12.2f}" for b in batches)
+        print(f"  {name:<12}{row}")
+    return failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--format", choices=("torchscript", "onnx", "both"), default="both")
+    ap.add_argument("--batch-size", type=int, default=1, help="TorchScript batch size (ONNX is dynamic)")
+    ap.add_argument("--opset", type=int, default=17)
+    ap.add_argument("--windows", default=str(DEFAULT_WINDOWS_DIR))
+    ap.add_argument("--num-windows", type=int, default=64)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--skip-verify", action="store_true")
+    args = ap.parse_args()
+
+    torch.set_num_threads(2)   # match activity_server
+    model = build_eager_model("cpu")
+    if model is None:
+        raise SystemExit(1)
+
+    print(f"\nExporting (batch size {args.batch_size})...")
+    engines = {}
+    if args.format in ("torchscript", "both"):
+        export_torchscript(model, args.batch_size)
+        engines["torchscript"] = TorchScriptEngine(TORCHSCRIPT_PATH, "cpu")
+    if args.format in ("onnx", "both"):
+        export_onnx(model, args.batch_size, args.opset)
+        try:
+            engines["onnx"] = OnnxEngine(ONNX_PATH, num_threads=torch.get_num_threads())
+        except ImportError:
+            print("  onnxruntime not installed — ONNX artifact written but not verified.")
+
+    if args.skip_verify:
+        return
+    windows = load_windows(args.windows, max(args.num_windows, args.batch_size))
+    failed = verify(model, engines, windows, args.batch_size, args.repeat)
+    if failed:
+        # Remove mismatching artifacts so SKATEFORMER_RUNTIME=auto cannot pick them up
+        paths = {"torchscript": TORCHSCRIPT_PATH, "onnx": ONNX_PATH}
+        for name in failed:
+            paths[name].unlink(missing_ok=True)
+        raise SystemExit(f"Exported {', '.join(failed)} does not match eager PyTorch — artifact removed.")
+
+
+if __name__ == "__main__":
+    main()
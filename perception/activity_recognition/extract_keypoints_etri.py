@@ -125,11 +125,8 @@ def make_windows(skeleton_t25):
     for start in range(0, T - WINDOW_SIZE + 1, STRIDE):
         window_25 = skeleton_t25[start: start + WINDOW_SIZE]  # (64, 25, 3)
 
-        # Normalize each frame independently
-        window_norm = np.stack(
-            [normalize_skeleton(window_25[t]) for t in range(WINDOW_SIZE)],
-            axis=0
-        )  # (64, 25, 3)
+        # Normalize each frame independently (batched over T)
+        window_norm = normalize_skeleton(window_25)  # (64, 25, 3)
 
         # Reorder to 24 joints
         window_24 = window_norm[:, NEW_IDX_24, :]  # (64, 24, 3)
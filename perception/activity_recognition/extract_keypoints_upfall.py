@@ -111,11 +111,8 @@ def process_skeleton(skeleton_t33):
         # MediaPipe 33 → NTU 25
         window_25 = mediapipe_to_ntu(window_33)  # (64, 25, 3)
 
-        # Normalize each frame
-        window_norm = np.stack(
-            [normalize_skeleton(window_25[t]) for t in range(WINDOW_SIZE)],
-            axis=0
-        )  # (64, 25, 3)
+        # Normalize each frame (batched over T)
+        window_norm = normalize_skeleton(window_25)  # (64, 25, 3)
 
         # Reorder to 24 joints
         window_24 = window_norm[:, NEW_IDX_24, :]  # (64, 24, 3)
@@ -67,7 +67,17 @@ class DangerousObjectDetector:
     def last_detections(self) -> list:
         return self._last_detections
 
-    def detect(self, frame: np.ndarray) -> list:
+    @property
+    def due(self) -> bool:
+        """True when the next detect() call will run the model (not the cache)."""
+        return self.is_loaded and time.time() - self._last_run >= self._interval
+
+    def detect(self, frame: np.ndarray, letterboxed=None) -> list:
+        """
+        letterboxed: optional detection_stage.LetterboxedFrame of `frame`.
+        When given, the model runs on its shared tensor (no second resize /
+        normalize pass) and boxes are mapped back to frame pixels.
+        """
         if not self.is_loaded:
             return []
 
@@ -78,7 +88,7 @@ class DangerousObjectDetector:
         self._last_run = now
 
         results = self._model.predict(
-            source=frame,
+            source=letterboxed.tensor if letterboxed is not None else frame,
             conf=self._conf,
             verbose=False,
         )
@@ -92,7 +102,10 @@ class DangerousObjectDetector:
             label = self._model.names[cls_id].lower()
             danger_level = DANGER_LEVELS.get(label, "LOW")
 
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
+            if letterboxed is not None:
+                x1, y1, x2, y2 = letterboxed.to_frame(box.xyxy[0].cpu().numpy())[0].tolist()
+            else:
+                x1, y1, x2, y2 = box.xyxy[0].tolist()
             detections.append({
                 "label": label,
                 "confidence": round(confidence, 3),
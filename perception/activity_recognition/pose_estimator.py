@@ -1,7 +1,10 @@
+import time
+
 import numpy as np
 import mediapipe as mp
 
 from data_preprocessing.convert_to_ntu import mediapipe_to_ntu, normalize_skeleton
+from skeleton_buffer import SkeletonRingBuffer
 
 # SkateFormer partition joint order: maps NTU 25-joint → 24-joint
 # Matches feeder_ntu.py `new_idx` when partition=True
@@ -16,14 +19,43 @@ NEW_IDX_24 = np.array([
 
 WINDOW_SIZE = 64
 
+# ROI crops smaller than this (pixels, either side) are not worth a pose pass
+MIN_ROI_SIZE = 48
+# The crop is re-cut when the person box leaves it or its area changes by
+# more than this factor either way
+ROI_RECUT_SCALE = 1.5
+
 
 class PoseEstimator:
     """
     MediaPipe-based pose estimator with a 64-frame sliding window buffer.
     Produces SkateFormer-ready input tensors (C, T, V, M) = (3, 64, 24, 2).
+
+    Inference scheduling:
+      get_skateformer_input() only hands out a window every `inference_stride`
+      new pose frames, or immediately when the hip centre moves faster than
+      `motion_trigger` torso lengths per frame (sudden drop → possible FALL).
+      `last_window_frames` is the number of pose frames the latest window
+      stands for, used to weight it during temporal smoothing.
+
+    ROI mode:
+      extract(frame, roi=person_bbox) runs MediaPipe on the YOLO person box
+      padded by `roi_padding` (fraction of box size per side) and maps the
+      landmarks back to full-frame normalized coordinates. Without a box, or
+      when no pose is found in the crop, it falls back to the full frame.
+      timing_stats() reports frame counts and mean ms per mode.
+
+      One tracking Pose graph (static_image_mode=False) serves both. Its
+      tracking ROI and landmark smoothing live in the previous input's
+      normalized coordinates, so the crop is kept fixed from frame to frame
+      and only re-cut when the person box leaves it or changes scale by
+      ROI_RECUT_SCALE; while it is fixed, MediaPipe tracks inside it
+      without re-running its person detector. Whenever the input space
+      changes (re-cut, or crop <-> full frame) the graph is reset, so no
+      state leaks across coordinate spaces; timing_stats() counts resets.
     """
 
-    def __init__(self):
+    def __init__(self, inference_stride=1, motion_trigger=None, roi_padding=0.25):
         mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.pose = mp_pose.Pose(
@@ -34,59 +66,184 @@ class PoseEstimator:
             min_tracking_confidence=0.5
         )
         self.POSE_CONNECTIONS = mp_pose.POSE_CONNECTIONS
-        self._buffer = []  # list of (24, 3) frames
+        self._buffer = SkeletonRingBuffer(WINDOW_SIZE)  # (3, 64, 24, 2) ring
+
+        self.inference_stride   = max(1, int(inference_stride))
+        self.motion_trigger     = motion_trigger
+        self.last_window_frames = 0       # pose frames represented by the last window
+        self.last_trigger       = None    # "stride" | "motion" for the last window
+        self._frames_since_infer = 0
+        self._motion_triggered   = False
+        self._prev_hip           = None   # raw (x, y) hip centre of the previous pose frame
 
-    def extract(self, frame, draw=True):
+        self.roi_padding = roi_padding
+        self._crop       = None   # (x0, y0, x1, y1) crop currently fed to the graph
+        self._crop_area  = 0      # person box area when the crop was cut
+        self._space      = None   # coordinate space of the graph's state: crop box or "full"
+        self._resets     = 0
+        self._timing = {  # mode → [frames, total seconds]
+            "roi":      [0, 0.0],   # pose found in the person crop
+            "full":     [0, 0.0],   # no ROI given — full frame only
+            "fallback": [0, 0.0],   # ROI miss, then full frame (both passes timed)
+        }
+
+    def extract(self, frame, draw=True, roi=None):
         """
         Process one BGR frame through MediaPipe.
 
+        roi: optional (x1, y1, x2, y2) person box in pixels. When given, only
+             the padded crop is processed; landmarks are still returned in
+             full-frame normalized coordinates.
+
         Returns:
             (annotated_frame, kps_33) where kps_33 is ndarray (33, 3) or None if no pose.
         """
-        import cv2
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb)
-
+        t0 = time.perf_counter()
         kps_33 = None
-        if results.pose_landmarks:
-            if draw:
-                self.mp_drawing.draw_landmarks(
-                    frame, results.pose_landmarks, self.POSE_CONNECTIONS
-                )
-            kps_33 = np.array(
-                [[lm.x, lm.y, lm.z] for lm in results.pose_landmarks.landmark],
-                dtype=np.float32
-            )  # (33, 3)
+        mode = "full"
+
+        crop_box = self._stable_crop(roi, frame.shape) if roi is not None else None
+        if crop_box is not None:
+            x0, y0, x1, y1 = crop_box
+            self._use_space(crop_box)
+            # Slice is a view: drawing on it draws on the full frame
+            kps_33 = self._process(frame[y0:y1, x0:x1], draw)
+            if kps_33 is not None:
+                h, w = frame.shape[:2]
+                cw, ch = x1 - x0, y1 - y0
+                kps_33[:, 0] = (kps_33[:, 0] * cw + x0) / w
+                kps_33[:, 1] = (kps_33[:, 1] * ch + y0) / h
+                kps_33[:, 2] = kps_33[:, 2] * cw / w   # z shares x's scale
+                mode = "roi"
+            else:
+                mode = "fallback"
+                self._crop = None   # re-cut from the next box
+
+        if kps_33 is None:
+            self._use_space("full")
+            kps_33 = self._process(frame, draw)
+
+        stats = self._timing[mode]
+        stats[0] += 1
+        stats[1] += time.perf_counter() - t0
+
+        if kps_33 is not None:
             self._add_to_buffer(kps_33)
 
         return frame, kps_33
 
+    def _pad_roi(self, roi, shape):
+        """Pad a person box by roi_padding on each side, clip to the frame. None if too small."""
+        h, w = shape[:2]
+        x1, y1, x2, y2 = roi
+        px = (x2 - x1) * self.roi_padding
+        py = (y2 - y1) * self.roi_padding
+        x0, y0 = max(0, int(x1 - px)), max(0, int(y1 - py))
+        x1, y1 = min(w, int(x2 + px)), min(h, int(y2 + py))
+        if x1 - x0 < MIN_ROI_SIZE or y1 - y0 < MIN_ROI_SIZE:
+            return None
+        return x0, y0, x1, y1
+
+    def _stable_crop(self, roi, shape):
+        """The current crop while roi stays inside it at a similar scale, else a fresh padded crop."""
+        x1, y1, x2, y2 = roi
+        area = max(1, (x2 - x1) * (y2 - y1))
+        c = self._crop
+        if (c is not None
+                and c[0] <= x1 and c[1] <= y1 and x2 <= c[2] and y2 <= c[3]
+                and 1 / ROI_RECUT_SCALE <= area / self._crop_area <= ROI_RECUT_SCALE):
+            return c
+        self._crop = self._pad_roi(roi, shape)
+        self._crop_area = area
+        return self._crop
+
+    def _use_space(self, space):
+        """Reset the graph's tracking state when its input moves to another coordinate space."""
+        if self._space is not None and space != self._space:
+            self.pose.reset()
+            self._resets += 1
+        self._space = space
+
+    def _process(self, image, draw):
+        """Run MediaPipe on a BGR image. Returns (33, 3) landmarks normalized to `image`, or None."""
+        import cv2
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        results = self.pose.process(rgb)
+        if not results.pose_landmarks:
+            return None
+        if draw:
+            self.mp_drawing.draw_landmarks(
+                image, results.pose_landmarks, self.POSE_CONNECTIONS
+            )
+        return np.array(
+            [[lm.x, lm.y, lm.z] for lm in results.pose_landmarks.landmark],
+            dtype=np.float32
+        )  # (33, 3)
+
+    def timing_stats(self):
+        """Frames and mean pose-stage ms per mode (roi / full / fallback), plus graph resets."""
+        stats = {
+            mode: {
+                "frames": n,
+                "mean_ms": round(total * 1000.0 / n, 2) if n else 0.0,
+            }
+            for mode, (n, total) in self._timing.items()
+        }
+        stats["graph_resets"] = self._resets
+        return stats
+
     def _add_to_buffer(self, kps_33):
-        """Convert MediaPipe 33-joint frame → NTU 24-joint, normalize, add to sliding window."""
+        """Convert MediaPipe 33-joint frame → NTU 24-joint, normalize, write into the ring buffer."""
         # (1, 33, 3) → (1, 25, 3) → (25, 3)
         ntu25 = mediapipe_to_ntu(kps_33[np.newaxis, ...])[0]  # (25, 3)
+        self._update_motion(ntu25)
         ntu25 = normalize_skeleton(ntu25)                      # scale+position invariant
-        ntu24 = ntu25[NEW_IDX_24, :]                           # (24, 3)
-        self._buffer.append(ntu24)
-        if len(self._buffer) > WINDOW_SIZE:
-            self._buffer = self._buffer[-WINDOW_SIZE:]
+        self._buffer.push(ntu25[NEW_IDX_24, :])               # (24, 3) in place
+        self._frames_since_infer += 1
+
+    def _update_motion(self, ntu25_raw):
+        """
+        Hip-centre speed in torso lengths per frame, computed on the raw
+        (un-normalized) NTU joints — after normalize_skeleton() the hip is
+        always at the origin. Sets the motion trigger when above threshold.
+        """
+        hip   = ntu25_raw[0, :2]
+        torso = float(np.linalg.norm(ntu25_raw[2] - ntu25_raw[0]))
+        if self._prev_hip is not None and self.motion_trigger is not None:
+            speed = float(np.linalg.norm(hip - self._prev_hip)) / (torso + 1e-6)
+            if speed > self.motion_trigger:
+                self._motion_triggered = True
+        self._prev_hip = hip.copy()
+
+    def inference_due(self):
+        """True when the window is full and a stride or motion trigger has fired."""
+        if not self._buffer.is_full or self._frames_since_infer == 0:
+            return False
+        return self._motion_triggered or self._frames_since_infer >= self.inference_stride
 
     def get_skateformer_input(self):
         """
-        Returns SkateFormer-ready ndarray (3, 64, 24, 2) when the window is full,
-        otherwise returns None.
+        Returns SkateFormer-ready ndarray (3, 64, 24, 2) when the window is full
+        and an inference is due (see inference_due()), otherwise returns None.
+
+        The array is reused by the ring buffer — it is only valid until the
+        next call, so consume it (or copy it) before processing another frame.
         """
-        if len(self._buffer) < WINDOW_SIZE:
+        if not self.inference_due():
             return None
 
-        window = np.stack(self._buffer, axis=0)  # (64, 24, 3)
-
-        # Add second person (zeros)
-        p2 = np.zeros_like(window)
-        stacked = np.stack([window, p2], axis=-1)  # (64, 24, 3, 2)
+        self.last_trigger = "stride" if self._frames_since_infer >= self.inference_stride else "motion"
+        # Weight is capped at the stride so the very first window (64 new
+        # frames) does not swamp the smoothing buffer.
+        self.last_window_frames  = min(self._frames_since_infer, self.inference_stride)
+        self._frames_since_infer = 0
+        self._motion_triggered   = False
+        return self._buffer.window()
 
-        # (64, 24, 3, 2) → (3, 64, 24, 2)
-        return stacked.transpose(2, 0, 1, 3).astype(np.float32)
+    @property
+    def buffer_len(self):
+        """Number of pose frames currently in the window (0–64)."""
+        return len(self._buffer)
 
     def close(self):
         self.pose.close()
@@ -0,0 +1,211 @@
+"""
+quantize_skateformer.py
+-----------------------
+Builds an INT8 SkateFormer for the Raspberry Pi camera loop and saves it as
+work_dir/sava_8class/best_8class.int8.ts. Load it on the Pi with:
+
+    export SKATEFORMER_RUNTIME=int8
+
+Modes:
+  dynamic  (default) — torch dynamic quantization of every nn.Linear
+           (attention qkv/proj and the mlp_ratio=4 MLPs, the bulk of the
+           FLOPs). Weights INT8, activations quantized on the fly.
+  static   — FX graph-mode post-training quantization calibrated on stored
+           keypoints_v2 windows. Falls back to dynamic if SkateFormer cannot
+           be FX-traced.
+
+Then both models are evaluated on labelled keypoints_v2 windows with the
+same overall / per-class accuracy as train_finetune_v2.evaluate, and the
+per-class delta is printed. If FALL recall drops by more than
+--max-fall-drop the INT8 artifact is deleted so it cannot be deployed.
+
+Run from perception/activity_recognition (on the Pi, or pass --engine qnnpack):
+    python quantize_skateformer.py [--mode dynamic|static] [--windows data/keypoints_v2]
+"""
+
+import argparse
+import copy
+import json
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from skateformer_runtime import (
+    CHECKPOINT,
+    CLASS_NAMES,
+    INT8_PATH,
+    NUM_FRAMES,
+    TorchScriptEngine,
+    build_eager_model,
+    select_quantized_engine,
+)
+
+DEFAULT_WINDOWS_DIR = Path(__file__).resolve().parent / "data" / "keypoints_v2"
+SEED = 42
+
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+
+def labelled_windows(windows_dir, per_class):
+    """[(path, class_id)] from keypoints_v2/<CLASS>/*.npy, capped per class."""
+    items = []
+    for cid, cls in enumerate(CLASS_NAMES):
+        files = sorted((Path(windows_dir) / cls).glob("*.npy"))
+        if not files:
+            print(f"  {cls}: no windows — excluded from evaluation")
+            continue
+        random.Random(SEED).shuffle(files)
+        items.extend((str(f), cid) for f in files[:per_class])
+    if not items:
+        raise SystemExit(f"No labelled windows found under {windows_dir}")
+    return items
+
+
+def batches(items, batch_size):
+    """Yields (x, index_t, y) like the training DataLoader."""
+    for start in range(0, len(items), batch_size):
+        chunk   = items[start:start + batch_size]
+        x       = torch.from_numpy(np.stack([np.load(p).astype(np.float32) for p, _ in chunk]))
+        index_t = torch.arange(NUM_FRAMES, dtype=torch.long).unsqueeze(0).expand(x.shape[0], -1)
+        y       = [lbl for _, lbl in chunk]
+        yield x, index_t, y
+
+
+# ---------------------------------------------------------------------------
+# Evaluation (train_finetune_v2.evaluate, generalised to the 8 deployed classes)
+# ---------------------------------------------------------------------------
+
+@torch.no_grad()
+def evaluate(model, loader, device):
+    correct, total = 0, 0
+
+    class_correct = np.zeros(len(CLASS_NAMES), dtype=int)
+    class_total   = np.zeros(len(CLASS_NAMES), dtype=int)
+
+    for x, index_t, y in loader:
+        x       = x.to(device)
+        index_t = index_t.to(device)
+        y       = torch.as_tensor(y, device=device, dtype=torch.long)
+
+        logits  = model(x, index_t)
+        pred    = logits.argmax(dim=1)
+        correct += (pred == y).sum().item()
+        total   += y.numel()
+
+        for gt, p in zip(y.cpu().numpy(), pred.cpu().numpy()):
+            class_total[gt]   += 1
+            class_correct[gt] += int(gt == p)
+
+    overall_acc = correct / max(total, 1)
+
+    per_class = {}
+    for i, name in enumerate(CLASS_NAMES):
+        if class_total[i]:
+            per_class[name] = class_correct[i] / class_total[i]
+
+    return overall_acc, per_class
+
+
+@torch.no_grad()
+def latency_ms(model, repeat=20):
+    x       = torch.zeros((1, 3, NUM_FRAMES, 24, 2))
+    index_t = torch.arange(NUM_FRAMES, dtype=torch.long).unsqueeze(0)
+    model(x, index_t)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        model(x, index_t)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(times))
+
+
+# ---------------------------------------------------------------------------
+# Quantization
+# ---------------------------------------------------------------------------
+
+def quantize_dynamic(model):
+    return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8)
+
+
+@torch.no_grad()
+def quantize_static(model, engine, calib_items, batch_size):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    example  = next(batches(calib_items[:1], 1))[:2]
+    prepared = prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping(engine), example)
+    for x, index_t, _ in batches(calib_items, batch_size):
+        prepared(x, index_t)
+    return convert_fx(prepared)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mode", choices=("dynamic", "static"), default="dynamic")
+    ap.add_argument("--engine", default=None, help="quantized backend (default: qnnpack on ARM, x86 otherwise)")
+    ap.add_argument("--windows", default=str(DEFAULT_WINDOWS_DIR))
+    ap.add_argument("--eval-per-class", type=int, default=200)
+    ap.add_argument("--calib-windows", type=int, default=256)
+    ap.add_argument("--batch-size", type=int, default=8)
+    ap.add_argument("--max-fall-drop", type=float, default=0.02,
+                    help="largest acceptable FALL recall drop (absolute) before the artifact is rejected")
+    args = ap.parse_args()
+
+    torch.set_num_threads(2)
+    engine = select_quantized_engine(args.engine)
+    print(f"Quantized engine: {engine}")
+
+    fp32 = build_eager_model("cpu")
+    if fp32 is None:
+        raise SystemExit(1)
+
+    items = labelled_windows(args.windows, args.eval_per_class)
+
+    mode = args.mode
+    if mode == "static":
+        calib = random.Random(SEED).sample(items, min(args.calib_windows, len(items)))
+        try:
+            qmodel = quantize_static(fp32, engine, calib, args.batch_size)
+        except Exception as e:
+            print(f"  Static FX quantization failed ({type(e).__name__}: {e}) — falling back to dynamic.")
+            mode = "dynamic"
+    if mode == "dynamic":
+        qmodel = quantize_dynamic(fp32)
+
+    x       = torch.zeros((1, 3, NUM_FRAMES, 24, 2))
+    index_t = torch.arange(NUM_FRAMES, dtype=torch.long).unsqueeze(0)
+    with torch.no_grad():
+        traced = torch.jit.trace(qmodel, (x, index_t), check_trace=False)
+    meta = {"batch_size": 1, "mode": mode, "engine": engine, "checkpoint": CHECKPOINT.name}
+    torch.jit.save(traced, str(INT8_PATH), _extra_files={"meta.json": json.dumps(meta)})
+    int8 = TorchScriptEngine(INT8_PATH, "cpu")
+    print(f"Saved INT8 ({mode}) → {INT8_PATH}  "
+          f"[{CHECKPOINT.stat().st_size / 1e6:.1f} MB → {INT8_PATH.stat().st_size / 1e6:.1f} MB]")
+
+    print(f"\nEvaluating on {len(items)} windows...")
+    acc32, pc32 = evaluate(fp32, batches(items, args.batch_size), "cpu")
+    acc8,  pc8  = evaluate(int8, batches(items, args.batch_size), "cpu")
+
+    print(f"\n  {'class':<10} {'fp32':>7} {'int8':>7} {'delta':>8}")
+    for name in pc32:
+        print(f"  {name:<10} {pc32[name]:>7.3f} {pc8[name]:>7.3f} {pc8[name] - pc32[name]:>+8.3f}")
+    print(f"  {'overall':<10} {acc32:>7.3f} {acc8:>7.3f} {acc8 - acc32:>+8.3f}")
+    print(f"\n  latency (B=1): fp32 {latency_ms(fp32):.1f} ms  int8 {latency_ms(int8):.1f} ms")
+
+    if "FALL" in pc32:
+        fall_drop = pc32["FALL"] - pc8["FALL"]
+        if fall_drop > args.max_fall_drop:
+            INT8_PATH.unlink(missing_ok=True)
+            raise SystemExit(f"FALL recall dropped by {fall_drop:.3f} (> {args.max_fall_drop}) — INT8 model rejected.")
+    else:
+        print("  WARNING: no FALL windows found — FALL recall was not checked.")
+
+
+if __name__ == "__main__":
+    main()
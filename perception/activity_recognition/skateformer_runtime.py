@@ -0,0 +1,267 @@
+"""
+SkateFormer model loading with optional exported runtimes.
+
+  eager        — build SkateFormer from the SkateFormer/ checkout + best_8class.pt
+  torchscript  — traced best_8class.ts (needs torch only, no SkateFormer source)
+  onnx         — best_8class.onnx through onnxruntime (CPU)
+  int8         — best_8class.int8.ts, INT8-quantized TorchScript for the Pi
+                 (quantize_skateformer.py). Opt-in only: never chosen by auto.
+  auto         — onnx → torchscript → eager, first one that is present and
+                 not older than best_8class.pt
+
+Every runtime is returned as a callable model(x, index_t) -> logits tensor,
+so camera._predict / _predict_batch work unchanged.
+
+Export the artifacts with:
+    python export_skateformer.py
+    python quantize_skateformer.py
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+import platform
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import torch
+
+SKATEFORMER_DIR  = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "SkateFormer")
+CHECKPOINT       = Path(os.path.join(os.path.dirname(__file__), "work_dir", "sava_8class", "best_8class.pt"))
+TORCHSCRIPT_PATH = CHECKPOINT.with_suffix(".ts")
+ONNX_PATH        = CHECKPOINT.with_suffix(".onnx")
+INT8_PATH        = CHECKPOINT.with_suffix(".int8.ts")
+CLASS_NAMES      = ["EAT", "DRINK", "SLEEP", "FALL", "WALK", "SIT", "STAND", "USE_PHONE"]
+NUM_FRAMES       = 64
+
+RUNTIMES = ("auto", "onnx", "torchscript", "int8", "eager")
+
+
+def select_quantized_engine(preferred=None):
+    """
+    Pick the quantized kernel backend: qnnpack on ARM (Raspberry Pi),
+    x86/fbgemm elsewhere. Sets it on torch and returns its name.
+    """
+    supported = torch.backends.quantized.supported_engines
+    if preferred is None:
+        arm = platform.machine().lower() in ("aarch64", "arm64", "armv7l")
+        candidates = ("qnnpack",) if arm else ("x86", "fbgemm", "qnnpack")
+    else:
+        candidates = (preferred,)
+    for name in candidates:
+        if name in supported:
+            torch.backends.quantized.engine = name
+            return name
+    raise RuntimeError(f"No quantized engine among {candidates} (supported: {supported})")
+
+
+# ---------------------------------------------------------------------------
+# Eager PyTorch
+# ---------------------------------------------------------------------------
+
+def build_eager_model(device):
+    """Load fine-tuned 8-class SkateFormer. Returns model or None if checkpoint missing."""
+    if not CHECKPOINT.exists():
+        print(f"  Checkpoint not found: {CHECKPOINT}")
+        print("   Run train_finetune_v2.py first. Running without activity recognition.")
+        return None
+
+    if SKATEFORMER_DIR not in sys.path:
+        sys.path.insert(0, SKATEFORMER_DIR)
+
+    try:
+        from model.SkateFormer import SkateFormer
+    except ImportError:
+        print("  SkateFormer model not found. Running without activity recognition.")
+        return None
+
+    model = SkateFormer(
+        in_channels=3,
+        depths=(2, 2, 2, 2),
+        channels=(96, 192, 192, 192),
+        num_classes=len(CLASS_NAMES),   # 8
+        embed_dim=96,
+        num_people=2,
+        num_frames=NUM_FRAMES,
+        num_points=24,
+        kernel_size=7,
+        num_heads=32,
+        type_1_size=(8, 8),
+        type_2_size=(8, 12),
+        type_3_size=(8, 8),
+        type_4_size=(8, 12),
+        attn_drop=0.5,
+        head_drop=0.0,
+        rel=True,
+        drop_path=0.2,
+        mlp_ratio=4.0,
+        index_t=True
+    ).to(device)
+
+    ckpt = torch.load(str(CHECKPOINT), map_location=device)
+    model.load_state_dict(ckpt["model"], strict=True)
+    model.eval()
+    print(f" Loaded 8-class SkateFormer from {CHECKPOINT}")
+    return model
+
+
+# ---------------------------------------------------------------------------
+# Exported engines
+# ---------------------------------------------------------------------------
+
+class _FixedBatchEngine(ABC):
+    """
+    Adapts a graph exported for a fixed batch size B to model(x, index_t)
+    calls of any batch size: the input is split into chunks of B and the
+    last chunk is zero-padded, then the padding rows are dropped again.
+    batch_size=None (a graph with a dynamic batch axis) runs the input as is.
+    """
+
+    runtime = None
+
+    def __init__(self, batch_size):
+        self.batch_size = max(1, batch_size) if isinstance(batch_size, int) else None
+
+    def eval(self):
+        return self
+
+    def __call__(self, x, index_t):
+        bs   = self.batch_size
+        if bs is None:
+            return self._run(x, index_t)
+        outs = []
+        for start in range(0, x.shape[0], bs):
+            xb = x[start:start + bs]
+            tb = index_t[start:start + bs]
+            n  = xb.shape[0]
+            if n < bs:
+                xb = torch.cat([xb, xb.new_zeros((bs - n,) + tuple(xb.shape[1:]))], dim=0)
+                tb = torch.cat([tb, tb[:1].expand(bs - n, -1)], dim=0)
+            outs.append(self._run(xb, tb)[:n])
+        return torch.cat(outs, dim=0)
+
+    @abstractmethod
+    def _run(self, x, index_t):
+        """Run one batch (exactly batch_size rows unless it is None) -> logits."""
+
+
+class TorchScriptEngine(_FixedBatchEngine):
+    """Traced SkateFormer saved by export_skateformer.py."""
+
+    runtime = "torchscript"
+
+    def __init__(self, path, device):
+        extra = {"meta.json": ""}
+        self._module = torch.jit.load(str(path), map_location=device, _extra_files=extra)
+        self._module.eval()
+        self.meta = json.loads(extra["meta.json"] or "{}")
+        super().__init__(self.meta.get("batch_size", 1))
+
+    def _run(self, x, index_t):
+        return self._module(x, index_t)
+
+
+class OnnxEngine(_FixedBatchEngine):
+    """ONNX Runtime session on the CPU execution provider."""
+
+    runtime = "onnx"
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        if num_threads:
+            opts.intra_op_num_threads = num_threads
+        self._session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        inputs = self._session.get_inputs()
+        self._x_name = inputs[0].name
+        self._t_name = inputs[1].name
+        super().__init__(inputs[0].shape[0])   # "batch" (a str) when exported with a dynamic axis
+
+    def _run(self, x, index_t):
+        (logits,) = self._session.run(None, {
+            self._x_name: np.ascontiguousarray(x.detach().cpu().numpy()),
+            self._t_name: np.ascontiguousarray(index_t.detach().cpu().numpy()),
+        })
+        return torch.from_numpy(logits).to(x.device)
+
+
+def read_meta(path):
+    """meta.json saved alongside a TorchScript archive, read without loading the model."""
+    with zipfile.ZipFile(path) as zf:
+        name = next((n for n in zf.namelist() if n.endswith("/extra/meta.json")), None)
+        return json.loads(zf.read(name)) if name else {}
+
+
+def _is_fresh(path):
+    """Exported artifact exists and is not older than the training checkpoint."""
+    if not path.exists():
+        return False
+    if CHECKPOINT.exists() and path.stat().st_mtime < CHECKPOINT.stat().st_mtime:
+        print(f"  {path.name} is older than {CHECKPOINT.name} — re-run export_skateformer.py. Skipping.")
+        return False
+    return True
+
+
+def _load_onnx(device):
+    if device != "cpu" or not _is_fresh(ONNX_PATH):
+        return None
+    try:
+        engine = OnnxEngine(ONNX_PATH, num_threads=torch.get_num_threads())
+    except ImportError:
+        print("  onnxruntime not installed — skipping ONNX runtime.")
+        return None
+    print(f" Loaded 8-class SkateFormer (ONNX Runtime, batch={engine.batch_size or 'dynamic'}) from {ONNX_PATH}")
+    return engine
+
+
+def _load_torchscript(device):
+    if not _is_fresh(TORCHSCRIPT_PATH):
+        return None
+    engine = TorchScriptEngine(TORCHSCRIPT_PATH, device)
+    print(f" Loaded 8-class SkateFormer (TorchScript, batch={engine.batch_size}) from {TORCHSCRIPT_PATH}")
+    return engine
+
+
+def _load_int8(device):
+    if device != "cpu" or not _is_fresh(INT8_PATH):
+        return None
+    # Packed INT8 weights are re-packed at load time by the active quantized
+    # engine, so select the backend the model was converted for first.
+    meta = read_meta(INT8_PATH)
+    try:
+        select_quantized_engine(meta.get("engine"))
+        engine = TorchScriptEngine(INT8_PATH, "cpu")
+    except RuntimeError as e:
+        # e.g. converted for x86/fbgemm on a dev box, loaded on a qnnpack-only Pi
+        print(f"  {INT8_PATH.name} was quantized for engine {meta.get('engine')!r}, "
+              f"which this machine cannot load ({e}) — re-run quantize_skateformer.py here. Skipping.")
+        return None
+    print(f" Loaded 8-class SkateFormer (INT8 {meta.get('mode', 'dynamic')}, "
+          f"{torch.backends.quantized.engine}) from {INT8_PATH}")
+    return engine
+
+
+_LOADERS = {
+    "onnx":        _load_onnx,
+    "torchscript": _load_torchscript,
+    "int8":        _load_int8,
+    "eager":       build_eager_model,
+}
+
+
+def load_skateformer(device, runtime="auto"):
+    """
+    Load SkateFormer with the requested runtime (see module docstring).
+    An explicit exported runtime that is unavailable falls back to eager.
+    Returns a callable model or None when no runtime could be loaded.
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown SkateFormer runtime {runtime!r} — expected one of {RUNTIMES}")
+    order = ("onnx", "torchscript", "eager") if runtime == "auto" else (runtime, "eager")
+    for name in dict.fromkeys(order):
+        model = _LOADERS[name](device)
+        if model is not None:
+            return model
+    return None
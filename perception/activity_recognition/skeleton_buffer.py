@@ -0,0 +1,55 @@
+"""
+SkeletonRingBuffer — preallocated sliding window for SkateFormer input.
+
+Stores the last T skeletons directly in SkateFormer layout (C, T, V, M) =
+(3, T, 24, 2) float32. Each push() writes one (24, 3) frame in place at the
+ring head; person 2 stays all-zero. window() unrolls the ring into a second
+preallocated array only when an inference is due, so the per-frame path
+allocates nothing and the per-inference path does a single ordered copy.
+"""
+
+import numpy as np
+
+
+class SkeletonRingBuffer:
+    """Circular (3, T, V, M) float32 buffer of the most recent T skeletons."""
+
+    def __init__(self, window_size=64, num_points=24, num_people=2):
+        self.window_size = window_size
+        self._ring   = np.zeros((3, window_size, num_points, num_people), dtype=np.float32)
+        self._window = np.zeros_like(self._ring)   # ordered output, reused across calls
+        self._head   = 0      # next write position
+        self._count  = 0      # frames written, capped at window_size
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def is_full(self):
+        return self._count >= self.window_size
+
+    def push(self, skeleton):
+        """Write one (V, 3) skeleton for person 1 at the ring head."""
+        # (V, 3) → (3, V) straight into the ring slot — no intermediate copy
+        self._ring[:, self._head, :, 0] = skeleton.T
+        self._head = (self._head + 1) % self.window_size
+        if self._count < self.window_size:
+            self._count += 1
+
+    def window(self):
+        """
+        Returns the buffered frames oldest → newest as a contiguous
+        (3, T, V, M) float32 array, or None until the buffer is full.
+
+        The array is owned by the buffer and overwritten by the next call —
+        copy it if it must outlive the current inference.
+        """
+        if not self.is_full:
+            return None
+        if self._head == 0:
+            self._window[...] = self._ring
+        else:
+            tail = self.window_size - self._head
+            self._window[:, :tail] = self._ring[:, self._head:]
+            self._window[:, tail:] = self._ring[:, :self._head]
+        return self._window
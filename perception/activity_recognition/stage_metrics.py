@@ -0,0 +1,135 @@
+"""
+StageMetrics — per-stage latency and frame counters for the pipeline.
+
+Wrap each stage of a frame in a timer:
+
+    metrics = StageMetrics()
+    with metrics.time("detect_person"):
+        ...
+    metrics.incr("frames_skipped")
+
+Each stage keeps its last WINDOW samples; snapshot() reports p50/p95/p99
+over that rolling window plus lifetime count/sum. prometheus_text() renders
+the same data in the Prometheus text exposition format (stages as a
+summary, counters as *_total), and serve_metrics() exposes it on a
+local /metrics endpoint for the headless Pi loop. activity_server uses the
+same stage names on its own /metrics route.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageMetrics:
+    """Thread-safe rolling latency histograms per stage plus named counters."""
+
+    # Recent samples kept per stage for the percentiles
+    WINDOW = 1024
+
+    def __init__(self, prefix="sava"):
+        self.prefix    = prefix
+        self._lock     = threading.Lock()
+        self._samples  = {}     # stage → deque of seconds
+        self._count    = {}     # stage → lifetime observations
+        self._sum      = {}     # stage → lifetime seconds
+        self._counters = {}     # name → int
+
+    @contextmanager
+    def time(self, stage):
+        """Context manager: records the wall time of the block under `stage`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.WINDOW)
+                self._count[stage] = 0
+                self._sum[stage]   = 0.0
+            samples.append(seconds)
+            self._count[stage] += 1
+            self._sum[stage]   += seconds
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        """{"stages": {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}}, "counters": {...}}"""
+        with self._lock:
+            samples  = {k: np.array(v, dtype=np.float64) for k, v in self._samples.items()}
+            count    = dict(self._count)
+            total    = dict(self._sum)
+            counters = dict(self._counters)
+
+        stages = {}
+        for stage, s in sorted(samples.items()):
+            pct = np.percentile(s, [q * 100 for q in QUANTILES]) * 1000.0
+            stages[stage] = {
+                "count":   count[stage],
+                "mean_ms": round(total[stage] / count[stage] * 1000.0, 2),
+                "p50_ms":  round(float(pct[0]), 2),
+                "p95_ms":  round(float(pct[1]), 2),
+                "p99_ms":  round(float(pct[2]), 2),
+            }
+        return {"stages": stages, "counters": dict(sorted(counters.items()))}
+
+    def prometheus_text(self):
+        with self._lock:
+            samples  = {k: np.array(v, dtype=np.float64) for k, v in self._samples.items()}
+            count    = dict(self._count)
+            total    = dict(self._sum)
+            counters = dict(self._counters)
+
+        name  = f"{self.prefix}_stage_seconds"
+        lines = [
+            f"# HELP {name} Pipeline stage wall time (quantiles over the last {self.WINDOW} samples).",
+            f"# TYPE {name} summary",
+        ]
+        for stage, s in sorted(samples.items()):
+            for q, v in zip(QUANTILES, np.percentile(s, [q * 100 for q in QUANTILES])):
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {v:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total[stage]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count[stage]}')
+
+        for counter, value in sorted(counters.items()):
+            cname = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {cname} counter")
+            lines.append(f"{cname} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics, port, host="0.0.0.0"):
+    """Serve GET /metrics (Prometheus text) from a daemon thread. Returns the server."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass    # scraped every few seconds — keep the console quiet
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,3 +1,4 @@
+import inspect
 import logging
 import os
 import queue
@@ -11,6 +12,9 @@ import numpy as np
 # Silence tqdm progress bars BEFORE feat is imported (env var is read at tqdm import time)
 os.environ.setdefault("TQDM_DISABLE", "1")
 
+# py-feat builds without in-memory input still need a file: keep it in RAM
+_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
 
 class PainDetector:
     """
@@ -35,6 +39,7 @@ class PainDetector:
         self._queue = queue.Queue(maxsize=2)
         self._stop  = threading.Event()
         self._detector = None
+        self._array_input = False
 
         # Silence feat's verbose logging (safer than redirecting sys.stderr in a thread)
         for name in ("feat", "feat.detector", "feat.pretrained_models", "root"):
@@ -43,7 +48,10 @@ class PainDetector:
         try:
             from feat import Detector
             self._detector = Detector(au_model="xgb")
-            print("✅ py-feat pain detector loaded.")
+            # Newer py-feat: Detector.detect(tensor, data_type="tensor") takes frames directly
+            detect = getattr(self._detector, "detect", None)
+            self._array_input = detect is not None and "data_type" in inspect.signature(detect).parameters
+            print(f"✅ py-feat pain detector loaded ({'in-memory' if self._array_input else 'file'} input).")
         except Exception as e:
             print(f"⚠  py-feat not available ({e}). Run: pip install py-feat")
             return
@@ -122,22 +130,41 @@ class PainDetector:
     # AU detection
     # ------------------------------------------------------------------
 
-    def _compute_pspi(self, frame: np.ndarray) -> "float | None":
-        """Write frame to a temp JPEG, run py-feat, return raw PSPI (0-16) or None."""
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".jpg")
+    def _detect_array(self, frame: np.ndarray):
+        """Run py-feat on the BGR frame in memory (1×3×H×W RGB tensor)."""
+        import torch
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        tensor = torch.from_numpy(rgb).permute(2, 0, 1).unsqueeze(0)
+        return self._detector.detect(tensor, data_type="tensor")
+
+    def _detect_file(self, frame: np.ndarray):
+        """Older py-feat only reads paths: JPEG in tmpfs, run, unlink."""
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".jpg", dir=_TMP_DIR)
         os.close(tmp_fd)
         try:
             ok = cv2.imwrite(tmp_path, frame)
             if not ok:
                 print("[PainDetector] cv2.imwrite failed — skipping frame")
                 return None
-            result = self._detector.detect_image(tmp_path)
+            return self._detector.detect_image(tmp_path)
         finally:
             try:
                 os.unlink(tmp_path)
             except OSError:
                 pass
 
+    def _compute_pspi(self, frame: np.ndarray) -> "float | None":
+        """Run py-feat on the frame, return raw PSPI (0-16) or None."""
+        result = None
+        if self._array_input:
+            try:
+                result = self._detect_array(frame)
+            except Exception as e:
+                print(f"[PainDetector] in-memory detect failed ({e}); falling back to file input")
+                self._array_input = False
+        if not self._array_input:
+            result = self._detect_file(frame)
+
         if result is None or (hasattr(result, "empty") and result.empty):
             return None
 
@@ -0,0 +1,108 @@
+"""
+AIDispatcher backpressure check
+-------------------------------
+Runs the dispatcher's worker pools against two local stub AI servers (no
+Django server, no MongoDB, no models) and pushes frames faster than the
+slow stub can answer. Verifies that:
+  - the thread count stays at the pool size instead of growing per frame
+  - each patient has at most one call in flight and one frame queued
+  - older queued frames are dropped, not piled up
+
+Usage:
+    python test_ai_dispatcher.py [--patients 20] [--seconds 5] [--delay 0.5]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+
+settings.configure()
+
+from apps.monitoring.services.ai_dispatcher import AIDispatcher  # noqa: E402
+
+
+def _stub_server(delay, body):
+    """Local AI server stub: sleeps `delay` seconds, then returns `body` as JSON."""
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, so pooled sessions are reused
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(delay)
+            with lock:
+                active["now"] -= 1
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, active
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--patients", type=int, default=20)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--delay", type=float, default=0.5, help="activity stub response time (s)")
+    args = ap.parse_args()
+
+    activity_srv, activity_active = _stub_server(args.delay, {"activity": "WALK", "confidence": 0.9})
+    face_srv, _ = _stub_server(0.05, {"payload": {"known": True}})
+
+    results = []
+    dispatcher = AIDispatcher(
+        activity_url=f"http://127.0.0.1:{activity_srv.server_port}/process-frame",
+        face_url=f"http://127.0.0.1:{face_srv.server_port}/analyze-face",
+        on_result=lambda source, pid, result: results.append((source, pid)),
+        activity_workers=4,
+        face_workers=2,
+    )
+    dispatcher.start()
+    threads_before = threading.active_count()
+
+    frame = b"\xff\xd8" + b"\x00" * 20_000   # ~20 KB fake JPEG
+    deadline = time.time() + args.seconds
+    max_threads = threads_before
+    while time.time() < deadline:
+        for p in range(args.patients):
+            dispatcher.dispatch(f"patient-{p}", frame)
+        max_threads = max(max_threads, threading.active_count())
+        time.sleep(0.2)   # 5 FPS per patient, like the Pi stream
+
+    time.sleep(args.delay * 2)
+    stats = dispatcher.stats()
+    dispatcher.close()
+
+    print(json.dumps(stats, indent=2))
+    print(f"[check] results delivered: {len(results)}")
+    print(f"[check] threads: {threads_before} at start, {max_threads} max while pushing")
+    print(f"[check] concurrent calls seen by activity stub: {activity_active['max']}")
+
+    # Pool workers already exist in threads_before; the stub servers add one
+    # handler thread per keep-alive connection (at most 4 + 2).
+    assert max_threads <= threads_before + 8, "threads grew with frame count"
+    assert activity_active["max"] <= 4, "more concurrent activity calls than pool workers"
+    assert stats["activity"]["pending"] <= args.patients, "more than one queued frame per patient"
+    assert stats["activity"]["dropped"] > 0, "slow server should have forced drops"
+    print("[check] OK")
+
+
+if __name__ == "__main__":
+    main()
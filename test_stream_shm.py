@@ -0,0 +1,100 @@
+"""
+SharedMemoryBackend slot-reuse check
+------------------------------------
+Two processes share a one-slot segment. Process A looks up patient p1's
+slot; before A takes the slot lock, process B writes patient p2, which
+reassigns that slot (LRU reuse once more patients than STREAM_SHM_SLOTS
+are active). A must then see p1 as absent — never p2's detections or
+sequence numbers. When p1 takes a slot back, its sequence numbers must
+keep rising from where they were (ETags are never reused).
+
+No Django needed; runs on Linux (fcntl + POSIX shared memory).
+
+Usage:
+    python test_stream_shm.py
+"""
+
+import multiprocessing as mp
+import os
+import sys
+from multiprocessing import resource_tracker
+
+from apps.monitoring.services.stream_backends import SharedMemoryBackend
+
+NAME = f"sava_test_{os.getpid()}"
+
+
+def _writer(name, found, reassigned):
+    """Process B: once A has found p1's slot, take the slot over for p2."""
+    backend = SharedMemoryBackend(name, slots=1, frame_bytes=1024, detection_bytes=4096)
+    for _ in range(2):      # once for get_detections, once for frame_seq
+        found.wait()
+        found.clear()
+        backend.set_detection("p2", "objects", {"owner": "p2"})
+        backend.put_frame("p2", b"p2-frame")
+        reassigned.set()
+
+
+class _RacingBackend(SharedMemoryBackend):
+    """Process A: hands the slot to B between _find() and the slot lock."""
+
+    def __init__(self, found, reassigned):
+        self._found, self._reassigned = found, reassigned
+        self.armed = False
+        super().__init__(NAME, slots=1, frame_bytes=1024, detection_bytes=4096)
+
+    def _find(self, patient_id):
+        index = super()._find(patient_id)
+        if self.armed and patient_id == "p1":
+            self.armed = False
+            self._found.set()
+            self._reassigned.wait(10)
+            self._reassigned.clear()
+        return index
+
+
+def main() -> int:
+    found, reassigned = mp.Event(), mp.Event()
+    backend = _RacingBackend(found, reassigned)
+    writer = mp.Process(target=_writer, args=(NAME, found, reassigned), daemon=True)
+    writer.start()
+    failures = []
+    try:
+        det_seq = backend.set_detection("p1", "objects", {"owner": "p1"})
+        frame_seq = backend.put_frame("p1", b"p1-frame")
+
+        backend.armed = True
+        seq, dets, _ = backend.get_detections("p1", stale_seconds=60)
+        print(f"get_detections(p1) after reuse -> seq={seq} dets={dets}")
+        if dets or seq:
+            failures.append("get_detections returned another patient's slot")
+
+        new_det_seq = backend.set_detection("p1", "objects", {"owner": "p1"})
+        new_frame_seq = backend.put_frame("p1", b"p1-frame")
+        print(f"p1 seqs before/after reuse -> detections {det_seq}/{new_det_seq}, frame {frame_seq}/{new_frame_seq}")
+        if new_det_seq <= det_seq or new_frame_seq <= frame_seq:
+            failures.append("sequence numbers restarted after slot reuse")
+        backend.armed = True
+        seq = backend.frame_seq("p1")
+        print(f"frame_seq(p1) after reuse -> {seq}")
+        if seq:
+            failures.append("frame_seq returned another patient's sequence")
+
+        seq, ts, frame = backend.get_frame("p1")
+        print(f"get_frame(p1) -> seq={seq} frame={frame!r}")
+        if frame not in (None, b"p1-frame"):
+            failures.append("get_frame returned another patient's frame")
+    finally:
+        writer.join(10)
+        backend._shm.close()
+        resource_tracker.register(backend._shm._name, "shared_memory")   # unlink() unregisters it
+        backend._shm.unlink()
+
+    for f in failures:
+        print("FAIL:", f)
+    print("OK" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())